@@ -43,6 +43,16 @@ api_common_opts = [
     cfg.StrOpt(
         'osapi_share_base_URL',
         help='Base URL to be presented to users in links to the Share API'),
+    cfg.BoolOpt(
+        'osapi_stream_list_responses',
+        default=False,
+        help='If True, the detailed share list, the share access rule list '
+             'and the user message list are serialized incrementally and '
+             'returned as a chunked response, which caps the memory used '
+             'by the API workers for large listings. Since the response '
+             'status is sent before the body is built, an error while '
+             'building an item truncates the response instead of turning '
+             'it into an error response.'),
 ]
 
 CONF = cfg.CONF
@@ -88,6 +98,17 @@ def get_pagination_params(request):
     return params
 
 
+def get_limit_offset_marker(request, max_limit=None):
+    """Return limit, offset and marker to be applied by the database.
+
+    Unlike get_pagination_params(), the limit is always set: if it is not
+    specified or 0, it defaults to max_limit, the same way as limited() does.
+    """
+    params = get_pagination_params(request)
+    limit = params.get('limit') or max_limit or CONF.osapi_max_limit
+    return limit, params.get('offset'), params.get('marker')
+
+
 def _get_limit_param(request):
     """Extract integer limit from request or fail.
 
@@ -294,6 +315,9 @@ class ViewBuilder(object):
     def _get_next_link(self, request, identifier):
         """Return href string with proper limit and marker params."""
         params = request.params.copy()
+        # NOTE: the offset is applied after the marker, so it would skip
+        # items of every following page.
+        params.pop("offset", None)
         params["marker"] = identifier
         prefix = self._update_link_prefix(request.application_url,
                                           CONF.osapi_share_base_URL)
@@ -321,6 +345,17 @@ class ViewBuilder(object):
                             self._collection_name,
                             str(identifier))
 
+    def _list_items(self, func, request, items, key):
+        """Build the views of the items of a collection.
+
+        Returns a generator of the item views if streamed list responses
+        are enabled, otherwise a list.
+        """
+        item_views = (func(request, item)[key] for item in items)
+        if CONF.osapi_stream_list_responses:
+            return item_views
+        return list(item_views)
+
     def _get_collection_links(self, request, items, id_key="uuid"):
         """Retrieve 'next' link, if applicable."""
         links = []
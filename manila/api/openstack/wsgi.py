@@ -17,6 +17,7 @@ import functools
 import inspect
 import math
 import time
+import types
 
 from oslo_log import log
 from oslo_serialization import jsonutils
@@ -299,12 +300,55 @@ class DictSerializer(ActionDispatcher):
         return ""
 
 
+def _is_streamed(data):
+    """Check whether a response dict carries lazily built item lists."""
+    return isinstance(data, dict) and any(
+        isinstance(value, types.GeneratorType) for value in data.values())
+
+
 class JSONDictSerializer(DictSerializer):
     """Default JSON request body serialization."""
 
+    # Size in bytes of the chunks written by a streamed response.
+    chunk_size = 65536
+
     def default(self, data):
+        if _is_streamed(data):
+            return b''.join(self.serialize_iter(data))
         return six.b(jsonutils.dumps(data))
 
+    def serialize_iter(self, data):
+        """Serialize a response dict incrementally.
+
+        Generator values of the top level dict, as produced by the list
+        views when 'osapi_stream_list_responses' is enabled, are written
+        out as JSON arrays one item at a time, so that the complete list
+        of item views and its JSON encoding never have to be held in
+        memory together. Yields chunks of roughly ``chunk_size`` bytes.
+        """
+        buf = ['{']
+        size = 1
+        for index, (key, value) in enumerate(data.items()):
+            prefix = '%s%s: ' % (', ' if index else '', jsonutils.dumps(key))
+            if not isinstance(value, types.GeneratorType):
+                buf.append(prefix + jsonutils.dumps(value))
+                size += len(buf[-1])
+                continue
+            buf.append(prefix + '[')
+            size += len(buf[-1])
+            for item_index, item in enumerate(value):
+                buf.append(
+                    '%s%s' % (', ' if item_index else '',
+                              jsonutils.dumps(item)))
+                size += len(buf[-1])
+                if size >= self.chunk_size:
+                    yield six.b(''.join(buf))
+                    buf = []
+                    size = 0
+            buf.append(']')
+        buf.append('}')
+        yield six.b(''.join(buf))
+
 
 def serializers(**serializers):
     """Attaches serializers to a method.
@@ -469,7 +513,11 @@ class ResponseObject(object):
             response.headers[hdr] = six.text_type(value)
         response.headers['Content-Type'] = six.text_type(content_type)
         if self.obj is not None:
-            response.body = serializer.serialize(self.obj)
+            if (_is_streamed(self.obj) and
+                    hasattr(serializer, 'serialize_iter')):
+                response.app_iter = serializer.serialize_iter(self.obj)
+            else:
+                response.body = serializer.serialize(self.obj)
 
         return response
 
@@ -93,11 +93,13 @@ class ShareSnapshotMixin(object):
         search_opts = {}
         search_opts.update(req.GET)
         params = common.get_pagination_params(req)
-        limit, offset = [params.get('limit'), params.get('offset')]
+        limit, offset, marker = [params.get('limit'), params.get('offset'),
+                                 params.get('marker')]
 
         # Remove keys that are not related to share attrs
         search_opts.pop('limit', None)
         search_opts.pop('offset', None)
+        search_opts.pop('marker', None)
 
         show_count = False
         if 'with_count' in search_opts:
@@ -134,12 +136,12 @@ class ShareSnapshotMixin(object):
         if show_count:
             count, snapshots = self.share_api.get_all_snapshots_with_count(
                 context, search_opts=search_opts, limit=limit, offset=offset,
-                sort_key=sort_key, sort_dir=sort_dir)
+                sort_key=sort_key, sort_dir=sort_dir, marker=marker)
             total_count = count
         else:
             snapshots = self.share_api.get_all_snapshots(
                 context, search_opts=search_opts, limit=limit, offset=offset,
-                sort_key=sort_key, sort_dir=sort_dir)
+                sort_key=sort_key, sort_dir=sort_dir, marker=marker)
 
         if is_detail:
             snapshots = self._view_builder.detail_list(
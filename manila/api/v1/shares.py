@@ -123,10 +123,12 @@ class ShareMixin(object):
 
         search_opts = {}
         search_opts.update(req.GET)
+        limit, offset, marker = common.get_limit_offset_marker(req)
 
         # Remove keys that are not related to share attrs
         search_opts.pop('limit', None)
         search_opts.pop('offset', None)
+        search_opts.pop('marker', None)
         sort_key = search_opts.pop('sort_key', 'created_at')
         sort_dir = search_opts.pop('sort_dir', 'desc')
 
@@ -164,25 +166,29 @@ class ShareMixin(object):
         common.remove_invalid_options(
             context, search_opts, self._get_share_search_options())
 
+        # NOTE: pagination is applied by the database, so that only the
+        # requested page of shares is loaded.
+        search_opts['limit'] = limit
+        if offset:
+            search_opts['offset'] = offset
+        if marker:
+            search_opts['marker'] = marker
+
         total_count = None
         if show_count:
             count, shares = self.share_api.get_all_with_count(
                 context, search_opts=search_opts, sort_key=sort_key,
-                sort_dir=sort_dir)
+                sort_dir=sort_dir, detailed=is_detail)
             total_count = count
         else:
             shares = self.share_api.get_all(
                 context, search_opts=search_opts, sort_key=sort_key,
-                sort_dir=sort_dir)
-
-        limited_list = common.limited(shares, req)
+                sort_dir=sort_dir, detailed=is_detail)
 
         if is_detail:
-            shares = self._view_builder.detail_list(req, limited_list,
-                                                    total_count)
+            shares = self._view_builder.detail_list(req, shares, total_count)
         else:
-            shares = self._view_builder.summary_list(req, limited_list,
-                                                     total_count)
+            shares = self._view_builder.summary_list(req, shares, total_count)
         return shares
 
     def _get_share_search_options(self):
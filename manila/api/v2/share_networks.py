@@ -193,8 +193,13 @@ class ShareNetworkController(wsgi.Controller, wsgi.AdminActionsMixin):
             filters['security_service_id'] = search_opts.get(
                 'security_service_id')
 
-        networks = db_api.share_network_get_all_by_filter(context,
-                                                          filters=filters)
+        # NOTE: inexact filters are also applied by the database, which
+        # narrows the share networks down using its search index. They are
+        # still matched below, as the database match may ignore the case.
+        if req.api_version_request >= api_version.APIVersionRequest("2.36"):
+            for key in ('name~', 'description~'):
+                if key in search_opts:
+                    filters[key] = search_opts[key]
 
         opts_to_remove = [
             'all_tenants',
@@ -202,30 +207,45 @@ class ShareNetworkController(wsgi.Controller, wsgi.AdminActionsMixin):
             'created_before',
             'limit',
             'offset',
+            'marker',
             'security_service_id',
             'project_id'
         ]
         for opt in opts_to_remove:
             search_opts.pop(opt, None)
-        if search_opts:
-            for key, value in search_opts.items():
-                if key in ['ip_version', 'segmentation_id']:
-                    value = int(value)
-                if (req.api_version_request >=
-                        api_version.APIVersionRequest("2.36")):
-                    networks = [
-                        network for network in networks
-                        if network.get(key) == value or
-                        self._subnet_has_search_opt(key, value, network) or
-                        (value in network.get(key.rstrip('~'))
-                            if key.endswith('~') and
-                            network.get(key.rstrip('~')) else ())]
-                else:
-                    networks = [
-                        network for network in networks
-                        if network.get(key) == value or
-                        self._subnet_has_search_opt(key, value, network,
-                                                    exact_value=True)]
+
+        # NOTE: the remaining search options are matched against the share
+        # network subnets below, so pagination can be applied by the
+        # database only if there are none of them.
+        if not search_opts:
+            limit, offset, marker = common.get_limit_offset_marker(req)
+            networks = db_api.share_network_get_all_by_filter(
+                context, filters=filters, limit=limit, offset=offset,
+                marker=marker)
+            return self._view_builder.build_share_networks(
+                req, networks, is_detail)
+
+        networks = db_api.share_network_get_all_by_filter(context,
+                                                          filters=filters)
+
+        for key, value in search_opts.items():
+            if key in ['ip_version', 'segmentation_id']:
+                value = int(value)
+            if (req.api_version_request >=
+                    api_version.APIVersionRequest("2.36")):
+                networks = [
+                    network for network in networks
+                    if network.get(key) == value or
+                    self._subnet_has_search_opt(key, value, network) or
+                    (value in network.get(key.rstrip('~'))
+                        if key.endswith('~') and
+                        network.get(key.rstrip('~')) else ())]
+            else:
+                networks = [
+                    network for network in networks
+                    if network.get(key) == value or
+                    self._subnet_has_search_opt(key, value, network,
+                                                exact_value=True)]
 
         limited_list = common.limited(networks, req)
         return self._view_builder.build_share_networks(
@@ -88,22 +88,25 @@ class ShareReplicationController(wsgi.Controller, wsgi.AdminActionsMixin):
         """Returns list of replicas."""
         context = req.environ['manila.context']
 
+        limit, offset, marker = common.get_limit_offset_marker(req)
+
         share_id = req.params.get('share_id')
         if share_id:
             try:
                 replicas = db.share_replicas_get_all_by_share(
-                    context, share_id)
+                    context, share_id, limit=limit, offset=offset,
+                    marker=marker)
             except exception.NotFound:
                 msg = _("Share with share ID %s not found.") % share_id
                 raise exc.HTTPNotFound(explanation=msg)
         else:
-            replicas = db.share_replicas_get_all(context)
+            replicas = db.share_replicas_get_all(
+                context, limit=limit, offset=offset, marker=marker)
 
-        limited_list = common.limited(replicas, req)
         if is_detail:
-            replicas = self._view_builder.detail_list(req, limited_list)
+            replicas = self._view_builder.detail_list(req, replicas)
         else:
-            replicas = self._view_builder.summary_list(req, limited_list)
+            replicas = self._view_builder.summary_list(req, replicas)
 
         return replicas
 
@@ -55,8 +55,7 @@ class ViewBuilder(common.ViewBuilder):
                           for a pagination query
         :returns: message data in dictionary format
         """
-        messages_list = [func(request, message)['message']
-                         for message in messages]
+        messages_list = self._list_items(func, request, messages, 'message')
         messages_links = self._get_collection_links(request,
                                                     messages,
                                                     coll_name)
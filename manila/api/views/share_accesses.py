@@ -31,8 +31,8 @@ class ViewBuilder(common.ViewBuilder):
 
     def list_view(self, request, accesses):
         """View of a list of share accesses."""
-        return {'access_list': [self.summary_view(request, access)['access']
-                                for access in accesses]}
+        return {'access_list': self._list_items(
+            self.summary_view, request, accesses, 'access')}
 
     def summary_view(self, request, access):
         """Summarized view of a single share access."""
@@ -175,7 +175,7 @@ class ViewBuilder(common.ViewBuilder):
 
     def _list_view(self, func, request, shares, count=None):
         """Provide a view for a list of shares."""
-        shares_list = [func(request, share)['share'] for share in shares]
+        shares_list = self._list_items(func, request, shares, 'share')
         shares_links = self._get_collection_links(request,
                                                   shares,
                                                   self._collection_name)
@@ -76,6 +76,24 @@ class DataServiceHelper(object):
         self._change_data_access_to_instance(
             share_instance, access_ref_list, deny=True)
 
+    def cast_access_rules_to_readonly(self, share_instance):
+        """Casts the access rules of an instance to read-only and waits."""
+        self.db.share_instance_update(
+            self.context, share_instance['id'],
+            {'cast_rules_to_readonly': True})
+
+        # Rules already applied have to be applied again to be cast.
+        new_state = constants.ACCESS_STATE_QUEUED_TO_APPLY
+        conditionally_change = {
+            constants.ACCESS_STATE_APPLYING: new_state,
+            constants.ACCESS_STATE_ACTIVE: new_state,
+        }
+        self.access_helper.get_and_update_share_instance_access_rules(
+            self.context, share_instance_id=share_instance['id'],
+            conditionally_change=conditionally_change)
+
+        self._change_data_access_to_instance(share_instance)
+
     # NOTE(ganso): Cleanup methods do not throw exceptions, since the
     # exceptions that should be thrown are the ones that call the cleanup
 
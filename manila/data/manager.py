@@ -16,10 +16,15 @@
 Data Service
 """
 
+import json
 import os
 
+from eventlet import greenthread
+from eventlet import semaphore
+from eventlet import tpool
 from oslo_config import cfg
 from oslo_log import log
+from oslo_utils import units
 
 from manila.common import constants
 from manila import context
@@ -43,7 +48,61 @@ data_opts = [
         default=False,
         help="Chooses whether hash of each file should be checked on data "
              "copying."),
-
+    cfg.StrOpt(
+        'data_copy_engine',
+        default='legacy',
+        choices=['legacy', 'parallel'],
+        help="Engine copying the contents of shares. 'legacy' runs "
+             "commands such as cp through rootwrap for each file. "
+             "'parallel' walks the share once and copies several files "
+             "at a time within the data service, which then needs to be "
+             "able to read, write and change the ownership of all files "
+             "of the shares, for instance by running as root."),
+    cfg.IntOpt(
+        'data_copy_workers',
+        default=8,
+        min=1,
+        help="Maximum number of files copied concurrently by the "
+             "'parallel' data copy engine."),
+    cfg.StrOpt(
+        'data_copy_hash_algorithm',
+        default='sha256',
+        choices=['sha256', 'blake2b', 'xxh64'],
+        help="Hash algorithm with which the 'parallel' data copy engine "
+             "verifies the copied files if check_hash is enabled. The "
+             "checksum of each source file is computed while it is "
+             "copied. xxh64 is not a cryptographic hash and requires the "
+             "xxhash Python package. The 'legacy' engine always uses "
+             "sha256sum."),
+    cfg.StrOpt(
+        'data_copy_checkpoint_dir',
+        help="Folder in which the 'parallel' data copy engine saves its "
+             "jobs and the files they copied. If the data service is "
+             "restarted during a copy, the job is resumed when the "
+             "service starts again and the files that were already "
+             "copied and did not change since are skipped. Jobs are not "
+             "resumable if not set."),
+    cfg.IntOpt(
+        'data_copy_max_jobs',
+        default=0,
+        min=0,
+        help="Maximum number of shares copied at the same time. Other "
+             "copies wait for one of them to end before starting. With "
+             "the 'parallel' data copy engine, the data service runs "
+             "enough native threads for all of them to copy "
+             "data_copy_workers files at a time. Unlimited if 0."),
+    cfg.IntOpt(
+        'data_copy_max_bandwidth',
+        default=0,
+        min=0,
+        help="Maximum bandwidth used by all copies of the 'parallel' data "
+             "copy engine together, in MiB/s. Unlimited if 0."),
+    cfg.IntOpt(
+        'data_copy_job_max_bandwidth',
+        default=0,
+        min=0,
+        help="Maximum bandwidth used by each copy of the 'parallel' data "
+             "copy engine, in MiB/s. Unlimited if 0."),
 ]
 
 CONF = cfg.CONF
@@ -53,12 +112,22 @@ CONF.register_opts(data_opts)
 class DataManager(manager.Manager):
     """Receives requests to handle data and sends responses."""
 
-    RPC_API_VERSION = '1.0'
+    RPC_API_VERSION = '1.1'
 
     def __init__(self, service_name=None, *args, **kwargs):
         super(DataManager, self).__init__(*args, **kwargs)
         self.busy_tasks_shares = {}
         self.service_id = None
+        self.copy_jobs = None
+        if CONF.data_copy_max_jobs:
+            self.copy_jobs = semaphore.Semaphore(CONF.data_copy_max_jobs)
+            if CONF.data_copy_engine == 'parallel':
+                tpool.set_num_threads(
+                    CONF.data_copy_max_jobs * CONF.data_copy_workers)
+        self.throttle = None
+        if CONF.data_copy_max_bandwidth:
+            self.throttle = data_utils.Throttle(
+                CONF.data_copy_max_bandwidth * units.Mi)
 
     def init_host(self, service_id=None):
         ctxt = context.get_admin_context()
@@ -66,13 +135,83 @@ class DataManager(manager.Manager):
         shares = self.db.share_get_all(ctxt)
         for share in shares:
             if share['task_state'] in constants.BUSY_COPYING_STATES:
+                job = self._load_copy_job(share['id'])
+                if job is not None:
+                    LOG.info("Resuming the data copy of share %s.",
+                             share['id'])
+                    greenthread.spawn_n(self._resume_copy_job, ctxt, job)
+                    continue
                 self.db.share_update(
                     ctxt, share['id'],
                     {'task_state': constants.TASK_STATE_DATA_COPYING_ERROR})
 
+    def _get_copy_job_path(self, share_id, extension):
+        return os.path.join(CONF.data_copy_checkpoint_dir,
+                            '%s.%s' % (share_id, extension))
+
+    def _load_copy_job(self, share_id):
+        if (not CONF.data_copy_checkpoint_dir or
+                CONF.data_copy_engine != 'parallel'):
+            return None
+        try:
+            with open(self._get_copy_job_path(share_id, 'json')) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            LOG.exception("Could not load the data copy job of share %s.",
+                          share_id)
+            return None
+
+    def _save_copy_job(self, job):
+        """Saves the parameters of a copy job, to resume it on restart."""
+        os.makedirs(CONF.data_copy_checkpoint_dir, exist_ok=True)
+        path = self._get_copy_job_path(job['share_id'], 'json')
+        tmp_path = path + '.tmp'
+        # NOTE: the connection info may contain mount options of the shares.
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(job, f)
+        os.replace(tmp_path, path)
+
+    def _remove_copy_job(self, share_id):
+        if not CONF.data_copy_checkpoint_dir:
+            return
+        for extension in ('json', 'checkpoint'):
+            try:
+                os.remove(self._get_copy_job_path(share_id, extension))
+            except FileNotFoundError:
+                pass
+            except Exception:
+                LOG.warning("Could not remove the data copy %(extension)s "
+                            "file of share %(share_id)s.",
+                            {'extension': extension, 'share_id': share_id})
+
+    def _resume_copy_job(self, context, job):
+        share = self.db.share_get(context, job['share_id'])
+        helper_src = helper.DataServiceHelper(context, self.db, share)
+        # The shares may still be mounted by the previous run.
+        for instance_id, connection_info in (
+                (job['share_instance_id'], job['connection_info_src']),
+                (job['dest_share_instance_id'],
+                 job['connection_info_dest'])):
+            helper_src.cleanup_unmount_temp_folder(
+                connection_info['unmount'], CONF.mount_tmp_location,
+                instance_id)
+        try:
+            self.migration_start(
+                context, job['ignore_list'], job['share_id'],
+                job['share_instance_id'], job['dest_share_instance_id'],
+                job['connection_info_src'], job['connection_info_dest'],
+                precopy_passes=job.get('precopy_passes', 0))
+        except exception.ShareDataCopyFailed:
+            # Already logged and reported to the share service.
+            pass
+
     def migration_start(self, context, ignore_list, share_id,
                         share_instance_id, dest_share_instance_id,
-                        connection_info_src, connection_info_dest):
+                        connection_info_src, connection_info_dest,
+                        precopy_passes=0):
 
         LOG.debug(
             "Received request to migrate share content from share instance "
@@ -89,20 +228,32 @@ class DataManager(manager.Manager):
         mount_path = CONF.mount_tmp_location
 
         try:
-            copy = data_utils.Copy(
+            checkpoint = self._prepare_copy_job(
+                share_id, ignore_list, share_instance_id,
+                dest_share_instance_id, connection_info_src,
+                connection_info_dest, precopy_passes)
+            copy = self._get_copy(
                 os.path.join(mount_path, share_instance_id),
                 os.path.join(mount_path, dest_share_instance_id),
-                ignore_list, CONF.check_hash)
-
-            self._copy_share_data(
-                context, copy, share_ref, share_instance_id,
-                dest_share_instance_id, connection_info_src,
-                connection_info_dest)
+                ignore_list, checkpoint=checkpoint,
+                delta=precopy_passes > 0)
+
+            self._wait_for_copy_job(share_id, copy)
+            try:
+                self._copy_share_data(
+                    context, copy, share_ref, share_instance_id,
+                    dest_share_instance_id, connection_info_src,
+                    connection_info_dest, precopy_passes=precopy_passes)
+            finally:
+                if self.copy_jobs is not None:
+                    self.copy_jobs.release()
         except exception.ShareDataCopyCancelled:
+            self._remove_copy_job(share_id)
             share_rpcapi.migration_complete(
                 context, share_instance_ref, dest_share_instance_id)
             return
         except Exception:
+            self._remove_copy_job(share_id)
             self.db.share_update(
                 context, share_id,
                 {'task_state': constants.TASK_STATE_DATA_COPYING_ERROR})
@@ -116,12 +267,97 @@ class DataManager(manager.Manager):
         finally:
             self.busy_tasks_shares.pop(share_id, None)
 
+        # NOTE: the job is kept if the service is stopped during the copy,
+        # so that it is resumed when the service starts again.
+        self._remove_copy_job(share_id)
+
         LOG.info(
             "Completed copy operation of migrating share content from share "
             "instance %(instance_id)s to instance %(dest_instance_id)s.",
             {'instance_id': share_instance_id,
              'dest_instance_id': dest_share_instance_id})
 
+    def _prepare_copy_job(self, share_id, ignore_list, share_instance_id,
+                          dest_share_instance_id, connection_info_src,
+                          connection_info_dest, precopy_passes=0):
+        """Saves a resumable copy job and returns its checkpoint file."""
+        if (not CONF.data_copy_checkpoint_dir or
+                CONF.data_copy_engine != 'parallel'):
+            return None
+        job = {
+            'share_id': share_id,
+            'ignore_list': ignore_list,
+            'share_instance_id': share_instance_id,
+            'dest_share_instance_id': dest_share_instance_id,
+            'connection_info_src': connection_info_src,
+            'connection_info_dest': connection_info_dest,
+            'precopy_passes': precopy_passes,
+        }
+        previous_job = self._load_copy_job(share_id)
+        if previous_job is None or any(
+                previous_job.get(key) != job[key]
+                for key in ('share_instance_id', 'dest_share_instance_id')):
+            # The files recorded were copied to another destination.
+            self._remove_copy_job(share_id)
+        self._save_copy_job(job)
+        return self._get_copy_job_path(share_id, 'checkpoint')
+
+    def _wait_for_copy_job(self, share_id, copy):
+        """Waits until fewer than data_copy_max_jobs shares are copied."""
+        if self.copy_jobs is None:
+            return
+        # The copy can be cancelled while it waits.
+        self.busy_tasks_shares[share_id] = copy
+        if self.copy_jobs.locked():
+            LOG.info("Data copy of share %s is waiting for other copies "
+                     "to end.", share_id)
+        self.copy_jobs.acquire()
+
+    def _get_copy(self, src, dest, ignore_list, checkpoint=None,
+                  delta=False):
+        if CONF.data_copy_engine == 'parallel':
+            throttle = self.throttle
+            if CONF.data_copy_job_max_bandwidth:
+                throttle = data_utils.Throttle(
+                    CONF.data_copy_job_max_bandwidth * units.Mi,
+                    parent=self.throttle)
+            return data_utils.ParallelCopy(
+                src, dest, ignore_list, CONF.check_hash,
+                workers=CONF.data_copy_workers,
+                hash_algorithm=CONF.data_copy_hash_algorithm,
+                checkpoint=checkpoint, delta=delta, throttle=throttle)
+        return data_utils.Copy(src, dest, ignore_list, CONF.check_hash)
+
+    def _precopy_share_data(self, share_id, copy, passes):
+        """Copies a share while it is writable, before its final copy.
+
+        Each pass only copies the files that changed since the previous
+        one, and the passes stop as soon as one of them has nothing to
+        copy, so that little is left to the final copy.
+        """
+        if not isinstance(copy, data_utils.ParallelCopy):
+            LOG.warning("Pre-copy passes are only supported by the "
+                        "'parallel' data copy engine, share %s is copied "
+                        "once it is read-only.", share_id)
+            return
+        for pass_number in range(1, passes + 1):
+            pass_copy = self._get_copy(copy.src, copy.dest, copy.ignore_list,
+                                       delta=True)
+            self.busy_tasks_shares[share_id] = pass_copy
+            try:
+                pass_copy.run()
+            finally:
+                self.busy_tasks_shares[share_id] = copy
+            if pass_copy.cancelled:
+                copy.cancel()
+                return
+            LOG.info("Pre-copy pass %(pass)d of share %(share)s copied "
+                     "%(files)d files.",
+                     {'pass': pass_number, 'share': share_id,
+                      'files': pass_copy.files_copied})
+            if not pass_copy.files_copied:
+                return
+
     def data_copy_cancel(self, context, share_id):
         LOG.debug("Received request to cancel data copy "
                   "of share %s.", share_id)
@@ -153,7 +389,8 @@ class DataManager(manager.Manager):
 
     def _copy_share_data(
             self, context, copy, src_share, share_instance_id,
-            dest_share_instance_id, connection_info_src, connection_info_dest):
+            dest_share_instance_id, connection_info_src, connection_info_dest,
+            precopy_passes=0):
 
         copied = False
         mount_path = CONF.mount_tmp_location
@@ -221,6 +458,12 @@ class DataManager(manager.Manager):
             {'task_state': constants.TASK_STATE_DATA_COPYING_IN_PROGRESS})
 
         try:
+            if precopy_passes:
+                self._precopy_share_data(src_share['id'], copy,
+                                         precopy_passes)
+                if not copy.cancelled:
+                    helper_src.cast_access_rules_to_readonly(share_instance)
+
             copy.run()
 
             self.db.share_update(
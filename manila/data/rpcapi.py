@@ -33,6 +33,7 @@ class DataAPI(object):
               Add migration_start(),
               data_copy_cancel(),
               data_copy_get_progress()
+        1.1 - Add precopy_passes parameter to migration_start()
     """
 
     BASE_RPC_API_VERSION = '1.0'
@@ -41,12 +42,13 @@ class DataAPI(object):
         super(DataAPI, self).__init__()
         target = messaging.Target(topic=CONF.data_topic,
                                   version=self.BASE_RPC_API_VERSION)
-        self.client = rpc.get_client(target, version_cap='1.0')
+        self.client = rpc.get_client(target, version_cap='1.1')
 
     def migration_start(self, context, share_id, ignore_list,
                         share_instance_id, dest_share_instance_id,
-                        connection_info_src, connection_info_dest):
-        call_context = self.client.prepare(version='1.0')
+                        connection_info_src, connection_info_dest,
+                        precopy_passes=0):
+        call_context = self.client.prepare(version='1.1')
         call_context.cast(
             context,
             'migration_start',
@@ -55,7 +57,8 @@ class DataAPI(object):
             share_instance_id=share_instance_id,
             dest_share_instance_id=dest_share_instance_id,
             connection_info_src=connection_info_src,
-            connection_info_dest=connection_info_dest)
+            connection_info_dest=connection_info_dest,
+            precopy_passes=precopy_passes)
 
     def data_copy_cancel(self, context, share_id):
         call_context = self.client.prepare(version='1.0')
@@ -12,14 +12,32 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import errno
+import functools
+import hashlib
+import json
 import os
+import shutil
+import stat
 
+from eventlet import greenpool
+from eventlet import patcher
+from eventlet import tpool
 from oslo_log import log
+from oslo_utils import importutils
+from oslo_utils import timeutils
 
 from manila import exception
 from manila.i18n import _
 from manila import utils
 
+xxhash = importutils.try_import('xxhash')
+
+# Files are copied in native threads, which must neither wait on green
+# locks nor yield to the hub.
+_threading = patcher.original('threading')
+_time = patcher.original('time')
+
 LOG = log.getLogger(__name__)
 
 
@@ -38,6 +56,7 @@ class Copy(object):
         self.initialized = False
         self.completed = False
         self.check_hash = check_hash
+        self.watch = timeutils.StopWatch()
 
     def get_progress(self):
 
@@ -80,15 +99,27 @@ class Copy(object):
 
         self.cancelled = True
 
+    def get_stats(self):
+        """Returns the amount of data copied so far and the throughput."""
+        elapsed = self.watch.elapsed() if self.initialized else 0.0
+        return {
+            'bytes_copied': self.current_size,
+            'elapsed': elapsed,
+            'throughput': self.current_size / elapsed if elapsed else 0.0,
+        }
+
     def run(self):
 
+        self.watch.start()
         self.get_total_size(self.src)
         self.initialized = True
         self.copy_data(self.src)
         self.copy_stats(self.src)
         self.completed = True
+        self.watch.stop()
 
         LOG.info(self.get_progress())
+        LOG.info("Data copy statistics: %s", self.get_stats())
 
     def get_total_size(self, path):
         if self.cancelled:
@@ -187,3 +218,529 @@ def _validate_item(src_item, dest_item):
     if src_sum.split()[0] != dest_sum.split()[0]:
         msg = _("Data corrupted while copying. Aborting data copy.")
         raise exception.ShareDataCopyFailed(reason=msg)
+
+
+# Bytes transferred per copy_file_range()/sendfile() call, and buffer size
+# of the read()/write() copy and of the hash computation.
+COPY_CHUNK_SIZE = 64 * 1024 * 1024
+READ_CHUNK_SIZE = 1024 * 1024
+
+# Number of files copied between two flushes of a checkpoint file.
+CHECKPOINT_FLUSH_INTERVAL = 100
+
+# Errors of copy_file_range() and sendfile() telling that they cannot be
+# used for a pair of files, so that the next method is tried instead.
+UNSUPPORTED_COPY_ERRNOS = (errno.EXDEV, errno.ENOSYS, errno.EINVAL,
+                           errno.EOPNOTSUPP, errno.EBADF)
+
+
+class Throttle(object):
+    """Limits the rate at which data is copied by several threads.
+
+    Threads report the amount of data they copied and when they started
+    copying it, and are put to sleep for as long as needed to keep the
+    average rate below ``rate`` bytes per second. A throttle may have a
+    parent, such as a throttle shared by all copies, which is also
+    consumed: a thread sleeps once, until the data fits within the rates
+    of all of them.
+    """
+
+    def __init__(self, rate, parent=None):
+        self.rate = rate
+        self.parent = parent
+        self._lock = _threading.Lock()
+        self._available_at = _time.monotonic()
+
+    @property
+    def chunk_size(self):
+        """Amount of data to copy at once, about 100ms at this rate."""
+        chunk_size = min(COPY_CHUNK_SIZE, max(READ_CHUNK_SIZE,
+                                              self.rate // 10))
+        if self.parent is not None:
+            chunk_size = min(chunk_size, self.parent.chunk_size)
+        return chunk_size
+
+    def _reserve(self, size, started_at):
+        """Reserves budget for data, returns when it will be available."""
+        with self._lock:
+            self._available_at = (max(self._available_at, started_at) +
+                                  size / self.rate)
+            return self._available_at
+
+    def consume(self, size, started_at=None):
+        """Waits until data copied since started_at fits within the rates.
+
+        The time taken to copy the data counts towards its budget, so it
+        is only slept for the remainder, if any.
+        """
+        if started_at is None:
+            started_at = _time.monotonic()
+        available_at = started_at
+        throttle = self
+        while throttle is not None:
+            available_at = max(available_at,
+                               throttle._reserve(size, started_at))
+            throttle = throttle.parent
+        delay = available_at - _time.monotonic()
+        if delay > 0:
+            _time.sleep(delay)
+
+
+class ParallelCopy(Copy):
+    """Copies the contents of a share within the data service process.
+
+    The source tree is walked once with os.scandir(). Up to ``workers``
+    files are then copied concurrently, each in a native thread with
+    copy_file_range() or sendfile() when the file systems allow it, and
+    their ownership, mode, times and extended attributes are preserved
+    without spawning any process. Only special files are still copied with
+    ``cp``. Progress is computed from the bytes copied so far.
+
+    If check_hash is set, the files are copied through a buffer from which
+    the checksum of the source is computed, so only the copies need to be
+    read again to be verified.
+
+    If a checkpoint file is given, every file copied is recorded in it with
+    the size and modification time it had. When a job is run again with
+    the same checkpoint, for instance after a restart of the data service,
+    the files recorded that did not change since are not copied again.
+
+    If delta is set, the destination is expected to hold the result of a
+    previous copy of the same source, like rsync would: files whose copy
+    has the same size and modification time are not copied again, and the
+    files that no longer exist in the source are removed from the
+    destination. This allows copying a share while it is in use, then
+    copying only what changed once it is read-only. As the source may
+    still be written to, files and folders removed from it during a delta
+    copy are skipped, the next copy takes care of them.
+
+    If a throttle is given, it limits the bandwidth used by the copy.
+
+    As the files are accessed by the data service itself, it needs to be
+    able to read and write all files of the shares and to change their
+    ownership.
+    """
+
+    def __init__(self, src, dest, ignore_list, check_hash=False, workers=8,
+                 hash_algorithm='sha256', checkpoint=None, delta=False,
+                 throttle=None):
+        super(ParallelCopy, self).__init__(src, dest, ignore_list,
+                                           check_hash=check_hash)
+        self.workers = workers
+        self.hash_algorithm = hash_algorithm
+        if check_hash:
+            # Fail before copying anything if the algorithm is unavailable.
+            _new_checksum(hash_algorithm)
+        self.files_copied = 0
+        self.bytes_verified = 0
+        self.checkpoint = checkpoint
+        self.checkpointed = {}
+        self.files_skipped = 0
+        self.delta = delta
+        self.throttle = throttle
+        self.files_deleted = 0
+        self._checkpoint_file = None
+        self._checkpoint_pending = 0
+        # Files being copied, their 'copied' counter is updated by the
+        # thread copying them.
+        self.in_progress = []
+        self.error = None
+
+    def get_progress(self):
+
+        # Empty share or empty contents
+        if self.completed and self.total_size == 0:
+            return {'total_progress': 100}
+
+        if not self.initialized or self.current_copy is None:
+            return {'total_progress': 0}
+
+        current_copy = self.current_copy
+        current_file_progress = 100
+        if current_copy['size'] > 0:
+            current_file_progress = min(
+                current_copy['copied'] * 100 / current_copy['size'], 100)
+
+        total_progress = 0
+        if self.total_size > 0:
+            copied = self.current_size + sum(
+                item['copied'] for item in list(self.in_progress))
+            total_progress = min(int(copied * 100 / self.total_size), 100)
+
+        return {
+            'total_progress': total_progress,
+            'current_file_path': current_copy['file_path'],
+            'current_file_progress': current_file_progress,
+        }
+
+    def get_stats(self):
+        stats = super(ParallelCopy, self).get_stats()
+        stats.update({
+            'files_copied': self.files_copied,
+            'bytes_verified': self.bytes_verified,
+            'files_skipped': self.files_skipped,
+            'files_deleted': self.files_deleted,
+        })
+        return stats
+
+    def run(self):
+
+        self.watch.start()
+        if self.checkpoint:
+            self.checkpointed = tpool.execute(self._load_checkpoint)
+            self._checkpoint_file = os.fdopen(os.open(
+                self.checkpoint, os.O_WRONLY | os.O_APPEND | os.O_CREAT,
+                0o600), 'a')
+        try:
+            self._run()
+        finally:
+            if self._checkpoint_file is not None:
+                self._checkpoint_file.close()
+                self._checkpoint_file = None
+
+    def _run(self):
+        files, dirs = tpool.execute(self._walk)
+        self.initialized = True
+
+        pool = greenpool.GreenPool(self.workers)
+        for src_item, dest_item, src_stat in files:
+            if self.cancelled or self.error is not None:
+                break
+            pool.spawn_n(self._copy_item, src_item, dest_item, src_stat)
+        pool.waitall()
+
+        if self.error is not None:
+            self.watch.stop()
+            raise self.error
+
+        if not self.cancelled:
+            # NOTE(ganso): Should re-apply attributes for folders.
+            tpool.execute(self._copy_dir_stats, dirs)
+        self.completed = True
+        self.watch.stop()
+
+        LOG.info(self.get_progress())
+        LOG.info("Data copy statistics: %s", self.get_stats())
+
+    def _walk(self):
+        """Creates the destination folders and lists the files to copy."""
+        files = []
+        dirs = []
+        paths = [self.src]
+        while paths and not self.cancelled:
+            path = paths.pop()
+            try:
+                with os.scandir(path) as entries:
+                    entries = [entry for entry in entries
+                               if entry.name not in self.ignore_list]
+            except FileNotFoundError:
+                if not self._skip_removed(path):
+                    raise
+                continue
+            if self.delta:
+                self._remove_deleted(path, entries)
+            for entry in entries:
+                relative_path = os.path.relpath(entry.path, self.src)
+                dest_item = os.path.join(self.dest, relative_path)
+                try:
+                    src_stat = entry.stat(follow_symlinks=False)
+                except FileNotFoundError:
+                    if not self._skip_removed(entry.path):
+                        raise
+                    continue
+                dest_stat = None
+                if self.delta:
+                    dest_stat = self._lstat_destination(dest_item, src_stat)
+                if entry.is_dir(follow_symlinks=False):
+                    os.makedirs(dest_item, exist_ok=True)
+                    dirs.append((entry.path, dest_item, src_stat))
+                    paths.append(entry.path)
+                    continue
+                self.total_size += src_stat.st_size
+                if _is_unchanged(src_stat, dest_stat):
+                    if _owner_and_mode(dest_stat) != _owner_and_mode(
+                            src_stat):
+                        _copy_metadata(entry.path, dest_item, src_stat,
+                                       missing_ok=self.delta)
+                elif not self._is_checkpointed(relative_path, dest_item,
+                                               src_stat):
+                    files.append((entry.path, dest_item, src_stat))
+                    continue
+                self.current_size += src_stat.st_size
+                self.files_skipped += 1
+        return files, dirs
+
+    def _skip_removed(self, src_item):
+        """Tells whether a source item that no longer exists is skipped."""
+        if not self.delta:
+            return False
+        LOG.debug("%s was removed from the source while being copied, "
+                  "skipping it.", src_item)
+        return True
+
+    def _remove_deleted(self, path, entries):
+        """Removes the copies of the files deleted from a source folder."""
+        dest_path = os.path.join(self.dest, os.path.relpath(path, self.src))
+        names = set(entry.name for entry in entries)
+        with os.scandir(dest_path) as dest_entries:
+            deleted = [dest_entry for dest_entry in dest_entries
+                       if dest_entry.name not in names and
+                       dest_entry.name not in self.ignore_list]
+        for dest_entry in deleted:
+            _remove(dest_entry.path, dest_entry.stat(follow_symlinks=False))
+            self.files_deleted += 1
+
+    def _lstat_destination(self, dest_item, src_stat):
+        """Returns the status of a copy, removed if of another type."""
+        try:
+            dest_stat = os.lstat(dest_item)
+        except FileNotFoundError:
+            return None
+        if stat.S_IFMT(dest_stat.st_mode) != stat.S_IFMT(src_stat.st_mode):
+            _remove(dest_item, dest_stat)
+            self.files_deleted += 1
+            return None
+        return dest_stat
+
+    def _load_checkpoint(self):
+        """Reads the files recorded in the checkpoint of a previous run."""
+        checkpointed = {}
+        if not os.path.exists(self.checkpoint):
+            return checkpointed
+        with open(self.checkpoint) as f:
+            for line in f:
+                try:
+                    relative_path, size, mtime_ns = json.loads(line)
+                except ValueError:
+                    # Last record of a run that was interrupted.
+                    continue
+                checkpointed[relative_path] = (size, mtime_ns)
+        LOG.info("Loaded %(count)d files already copied from checkpoint "
+                 "%(checkpoint)s.", {'count': len(checkpointed),
+                                     'checkpoint': self.checkpoint})
+        return checkpointed
+
+    def _is_checkpointed(self, relative_path, dest_item, src_stat):
+        if (self.checkpointed.get(relative_path) !=
+                (src_stat.st_size, src_stat.st_mtime_ns)):
+            return False
+        try:
+            return os.lstat(dest_item).st_size == src_stat.st_size
+        except FileNotFoundError:
+            return False
+
+    def _record_checkpoint(self, src_item, src_stat):
+        if self._checkpoint_file is None:
+            return
+        self._checkpoint_file.write(json.dumps([
+            os.path.relpath(src_item, self.src), src_stat.st_size,
+            src_stat.st_mtime_ns]) + '\n')
+        self._checkpoint_pending += 1
+        if self._checkpoint_pending >= CHECKPOINT_FLUSH_INTERVAL:
+            self._checkpoint_file.flush()
+            self._checkpoint_pending = 0
+
+    def _copy_item(self, src_item, dest_item, src_stat):
+        current_copy = {'file_path': dest_item,
+                        'size': src_stat.st_size,
+                        'copied': 0}
+        self.current_copy = current_copy
+        self.in_progress.append(current_copy)
+        try:
+            self._copy_and_validate_item(src_item, dest_item, src_stat,
+                                         current_copy)
+        except Exception as e:
+            LOG.exception("Failed to copy %(src)s to %(dest)s.",
+                          {'src': src_item, 'dest': dest_item})
+            if self.error is None:
+                self.error = e
+        else:
+            if current_copy.get('removed'):
+                self.total_size -= src_stat.st_size
+                return
+            # The file may have changed size since the tree was walked.
+            self.total_size += current_copy['copied'] - src_stat.st_size
+            self.current_size += current_copy['copied']
+            self.files_copied += 1
+            self._record_checkpoint(src_item, src_stat)
+        finally:
+            self.in_progress.remove(current_copy)
+
+    @utils.retry(retry_param=exception.ShareDataCopyFailed, retries=2)
+    def _copy_and_validate_item(self, src_item, dest_item, src_stat,
+                                current_copy):
+        current_copy['copied'] = 0
+        if not (stat.S_ISREG(src_stat.st_mode) or
+                stat.S_ISLNK(src_stat.st_mode)):
+            # Sockets, pipes and devices are left to cp.
+            super(ParallelCopy, self)._copy_and_validate(src_item, dest_item)
+            current_copy['copied'] = src_stat.st_size
+            return
+
+        src_sum = tpool.execute(self._copy_file, src_item, dest_item,
+                                src_stat, current_copy)
+
+        if src_sum is not None and not self._stopped():
+            dest_sum = tpool.execute(_hash_file, dest_item,
+                                     self.hash_algorithm)
+            self.bytes_verified += current_copy['copied']
+            if src_sum != dest_sum:
+                msg = _("Data corrupted while copying. Aborting data copy.")
+                raise exception.ShareDataCopyFailed(reason=msg)
+
+    def _stopped(self):
+        return self.cancelled or self.error is not None
+
+    def _copy_file(self, src_item, dest_item, src_stat, current_copy):
+        """Copies a file, returns the checksum of a verified regular file."""
+        src_sum = None
+        try:
+            if stat.S_ISLNK(src_stat.st_mode):
+                if os.path.lexists(dest_item):
+                    os.unlink(dest_item)
+                os.symlink(os.readlink(src_item), dest_item)
+                current_copy['copied'] = src_stat.st_size
+            else:
+                checksum = None
+                if self.check_hash:
+                    checksum = _new_checksum(self.hash_algorithm)
+                with open(src_item, 'rb') as src_file, \
+                        open(dest_item, 'wb') as dest_file:
+                    _copy_file_data(src_file.fileno(), dest_file.fileno(),
+                                    current_copy, self._stopped,
+                                    checksum=checksum,
+                                    throttle=self.throttle)
+                if checksum is not None:
+                    src_sum = checksum.hexdigest()
+        except FileNotFoundError:
+            if not self._skip_removed(src_item):
+                raise
+            current_copy['removed'] = True
+            return None
+        _copy_metadata(src_item, dest_item, src_stat, missing_ok=self.delta)
+        return src_sum
+
+    def _copy_dir_stats(self, dirs):
+        # Deepest folders first, their parents' times change otherwise.
+        for src_item, dest_item, src_stat in reversed(dirs):
+            if self.cancelled:
+                return
+            _copy_metadata(src_item, dest_item, src_stat,
+                           missing_ok=self.delta)
+
+
+def _is_unchanged(src_stat, dest_stat):
+    """Tells whether a copy matches its source, as rsync's quick check."""
+    return (dest_stat is not None and
+            dest_stat.st_size == src_stat.st_size and
+            dest_stat.st_mtime_ns == src_stat.st_mtime_ns)
+
+
+def _owner_and_mode(file_stat):
+    return file_stat.st_uid, file_stat.st_gid, file_stat.st_mode
+
+
+def _remove(path, path_stat):
+    if stat.S_ISDIR(path_stat.st_mode):
+        shutil.rmtree(path)
+    else:
+        os.unlink(path)
+
+
+def _copy_file_data(src_fd, dest_fd, progress, stopped, checksum=None,
+                    throttle=None):
+    """Copies a file with the most efficient method available.
+
+    If a checksum object is given, the data is copied through a buffer
+    and the checksum is updated with it. If a throttle is given, it is
+    consumed after each chunk copied, from the time its copy started.
+    """
+    chunk_size = COPY_CHUNK_SIZE if throttle is None else throttle.chunk_size
+    if checksum is not None:
+        methods = (functools.partial(_read_write, checksum=checksum),)
+    else:
+        methods = (functools.partial(_copy_file_range, size=chunk_size),
+                   functools.partial(_sendfile, size=chunk_size),
+                   _read_write)
+    for copy_chunk in methods:
+        try:
+            while not stopped():
+                started_at = _time.monotonic()
+                copied = copy_chunk(src_fd, dest_fd)
+                if not copied:
+                    return
+                progress['copied'] += copied
+                if throttle is not None:
+                    throttle.consume(copied, started_at)
+            return
+        except OSError as e:
+            if (copy_chunk is methods[-1] or
+                    e.errno not in UNSUPPORTED_COPY_ERRNOS):
+                raise
+
+
+def _copy_file_range(src_fd, dest_fd, size=COPY_CHUNK_SIZE):
+    if not hasattr(os, 'copy_file_range'):
+        raise OSError(errno.ENOSYS, 'copy_file_range is not available')
+    return os.copy_file_range(src_fd, dest_fd, size)
+
+
+def _sendfile(src_fd, dest_fd, size=COPY_CHUNK_SIZE):
+    return os.sendfile(dest_fd, src_fd, None, size)
+
+
+def _read_write(src_fd, dest_fd, checksum=None):
+    data = os.read(src_fd, READ_CHUNK_SIZE)
+    if checksum is not None:
+        checksum.update(data)
+    view = memoryview(data)
+    while view:
+        view = view[os.write(dest_fd, view):]
+    return len(data)
+
+
+def _copy_metadata(src_item, dest_item, src_stat, missing_ok=False):
+    """Applies the ownership, mode, times and xattrs of a file to a copy.
+
+    If missing_ok is set, nothing is done when the source no longer exists.
+    """
+    is_link = stat.S_ISLNK(src_stat.st_mode)
+    follow_symlinks = not is_link
+    try:
+        for name in os.listxattr(src_item, follow_symlinks=follow_symlinks):
+            os.setxattr(dest_item, name,
+                        os.getxattr(src_item, name,
+                                    follow_symlinks=follow_symlinks),
+                        follow_symlinks=follow_symlinks)
+    except OSError as e:
+        if e.errno == errno.ENOENT and missing_ok:
+            LOG.debug("%s was removed from the source while being copied, "
+                      "skipping it.", src_item)
+            return
+        if e.errno not in (errno.ENOTSUP, errno.ENODATA, errno.EPERM):
+            raise
+    os.chown(dest_item, src_stat.st_uid, src_stat.st_gid,
+             follow_symlinks=follow_symlinks)
+    if not is_link:
+        # After chown(), which clears the setuid and setgid bits.
+        os.chmod(dest_item, stat.S_IMODE(src_stat.st_mode))
+    os.utime(dest_item, ns=(src_stat.st_atime_ns, src_stat.st_mtime_ns),
+             follow_symlinks=follow_symlinks)
+
+
+def _new_checksum(algorithm):
+    if algorithm == 'xxh64':
+        if xxhash is None:
+            msg = _("The xxhash module is required to verify copied data "
+                    "with the xxh64 algorithm.")
+            raise exception.ShareDataCopyFailed(reason=msg)
+        return xxhash.xxh64()
+    return hashlib.new(algorithm)
+
+
+def _hash_file(path, algorithm='sha256'):
+    checksum = _new_checksum(algorithm)
+    with open(path, 'rb') as f:
+        for data in iter(lambda: f.read(READ_CHUNK_SIZE), b''):
+            checksum.update(data)
+    return checksum.hexdigest()
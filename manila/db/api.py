@@ -57,6 +57,12 @@ db_opts = [
                default='share-snapshot-%s',
                help='Template string to be used to generate share snapshot '
                     'names.'),
+    cfg.BoolOpt('use_search_index',
+                default=True,
+                help='Whether to use the search index to narrow down '
+                     'inexact (name~ and description~) filters of shares, '
+                     'share snapshots and share networks. The index is '
+                     'maintained regardless of this option.'),
 ]
 
 CONF = cfg.CONF
@@ -386,6 +392,16 @@ def share_instance_sizes_sum_by_host(context, host):
     return IMPL.share_instance_sizes_sum_by_host(context, host)
 
 
+def share_instance_sizes_sum_by_hosts(context, hosts=None):
+    """Returns sum of sizes of share instances grouped by host."""
+    return IMPL.share_instance_sizes_sum_by_hosts(context, hosts=hosts)
+
+
+def share_instance_hosts_get_all_by_share_ids(context, share_ids):
+    """Returns hosts of the instances of the given shares, by share ID."""
+    return IMPL.share_instance_hosts_get_all_by_share_ids(context, share_ids)
+
+
 def share_instance_purge(context, instance_id):
     """Removes share instance from database."""
     return IMPL.share_instance_purge(context, instance_id)
@@ -409,35 +425,39 @@ def share_get(context, share_id):
     return IMPL.share_get(context, share_id)
 
 
-def share_get_all(context, filters=None, sort_key=None, sort_dir=None):
+def share_get_all(context, filters=None, sort_key=None, sort_dir=None,
+                  detailed=True):
     """Get all shares."""
     return IMPL.share_get_all(
         context, filters=filters, sort_key=sort_key, sort_dir=sort_dir,
+        detailed=detailed,
     )
 
 
 def share_get_all_with_count(context, filters=None, sort_key=None,
-                             sort_dir=None):
+                             sort_dir=None, detailed=True):
     """Get all shares."""
     return IMPL.share_get_all_with_count(
-        context, filters=filters, sort_key=sort_key, sort_dir=sort_dir)
+        context, filters=filters, sort_key=sort_key, sort_dir=sort_dir,
+        detailed=detailed)
 
 
 def share_get_all_by_project(context, project_id, filters=None,
-                             is_public=False, sort_key=None, sort_dir=None):
+                             is_public=False, sort_key=None, sort_dir=None,
+                             detailed=True):
     """Returns all shares with given project ID."""
     return IMPL.share_get_all_by_project(
         context, project_id, filters=filters, is_public=is_public,
-        sort_key=sort_key, sort_dir=sort_dir)
+        sort_key=sort_key, sort_dir=sort_dir, detailed=detailed)
 
 
 def share_get_all_by_project_with_count(
         context, project_id, filters=None, is_public=False, sort_key=None,
-        sort_dir=None,):
+        sort_dir=None, detailed=True):
     """Returns all shares with given project ID."""
     return IMPL.share_get_all_by_project_with_count(
         context, project_id, filters=filters, is_public=is_public,
-        sort_key=sort_key, sort_dir=sort_dir)
+        sort_key=sort_key, sort_dir=sort_dir, detailed=detailed)
 
 
 def share_get_all_by_share_group_id(context, share_group_id,
@@ -459,19 +479,21 @@ def share_get_all_by_share_group_id_with_count(context, share_group_id,
 
 
 def share_get_all_by_share_server(context, share_server_id, filters=None,
-                                  sort_key=None, sort_dir=None):
+                                  sort_key=None, sort_dir=None,
+                                  detailed=True):
     """Returns all shares with given share server ID."""
     return IMPL.share_get_all_by_share_server(
         context, share_server_id, filters=filters, sort_key=sort_key,
-        sort_dir=sort_dir)
+        sort_dir=sort_dir, detailed=detailed)
 
 
 def share_get_all_by_share_server_with_count(
-        context, share_server_id, filters=None, sort_key=None, sort_dir=None):
+        context, share_server_id, filters=None, sort_key=None, sort_dir=None,
+        detailed=True):
     """Returns all shares with given share server ID."""
     return IMPL.share_get_all_by_share_server_with_count(
         context, share_server_id, filters=filters, sort_key=sort_key,
-        sort_dir=sort_dir)
+        sort_dir=sort_dir, detailed=detailed)
 
 
 def share_delete(context, share_id):
@@ -622,39 +644,39 @@ def share_snapshot_get(context, snapshot_id):
 
 
 def share_snapshot_get_all(context, filters=None, limit=None, offset=None,
-                           sort_key=None, sort_dir=None):
+                           sort_key=None, sort_dir=None, marker=None):
     """Get all snapshots."""
     return IMPL.share_snapshot_get_all(
         context, filters=filters, limit=limit, offset=offset,
-        sort_key=sort_key, sort_dir=sort_dir)
+        sort_key=sort_key, sort_dir=sort_dir, marker=marker)
 
 
 def share_snapshot_get_all_with_count(context, filters=None, limit=None,
                                       offset=None, sort_key=None,
-                                      sort_dir=None):
+                                      sort_dir=None, marker=None):
     """Get all snapshots."""
     return IMPL.share_snapshot_get_all_with_count(
         context, filters=filters, limit=limit, offset=offset,
-        sort_key=sort_key, sort_dir=sort_dir)
+        sort_key=sort_key, sort_dir=sort_dir, marker=marker)
 
 
 def share_snapshot_get_all_by_project(context, project_id, filters=None,
                                       limit=None, offset=None, sort_key=None,
-                                      sort_dir=None):
+                                      sort_dir=None, marker=None):
     """Get all snapshots belonging to a project."""
     return IMPL.share_snapshot_get_all_by_project(
         context, project_id, filters=filters, limit=limit, offset=offset,
-        sort_key=sort_key, sort_dir=sort_dir)
+        sort_key=sort_key, sort_dir=sort_dir, marker=marker)
 
 
 def share_snapshot_get_all_by_project_with_count(context, project_id,
                                                  filters=None, limit=None,
                                                  offset=None, sort_key=None,
-                                                 sort_dir=None):
+                                                 sort_dir=None, marker=None):
     """Get all snapshots belonging to a project."""
     return IMPL.share_snapshot_get_all_by_project_with_count(
         context, project_id, filters=filters, limit=limit, offset=offset,
-        sort_key=sort_key, sort_dir=sort_dir)
+        sort_key=sort_key, sort_dir=sort_dir, marker=marker)
 
 
 def share_snapshot_get_all_for_share(context, share_id, filters=None,
@@ -837,6 +859,14 @@ def share_export_location_get_by_uuid(context, export_location_uuid,
         ignore_secondary_replicas=ignore_secondary_replicas)
 
 
+def share_get_by_export_location_path(context, export_location_path,
+                                      project_id=None, is_public=False):
+    """Get the ID of the share exported at the given path."""
+    return IMPL.share_get_by_export_location_path(
+        context, export_location_path, project_id=project_id,
+        is_public=is_public)
+
+
 def share_export_locations_get(context, share_id):
     """Get all export locations of a share."""
     return IMPL.share_export_locations_get(context, share_id)
@@ -913,9 +943,16 @@ def share_network_get(context, id):
     return IMPL.share_network_get(context, id)
 
 
-def share_network_get_all_by_filter(context, filters=None):
+def share_network_get_all_by_ids(context, share_network_ids):
+    """Get the share network DB records with the given IDs."""
+    return IMPL.share_network_get_all_by_ids(context, share_network_ids)
+
+
+def share_network_get_all_by_filter(context, filters=None, limit=None,
+                                    offset=None, marker=None):
     """Get all share network DB records for the given filter."""
-    return IMPL.share_network_get_all_by_filter(context, filters=filters)
+    return IMPL.share_network_get_all_by_filter(
+        context, filters=filters, limit=limit, offset=offset, marker=marker)
 
 
 def share_network_get_all(context):
@@ -1418,19 +1455,32 @@ def share_resources_host_update(context, current_host, new_host):
 ####################
 
 def share_replicas_get_all(context, with_share_server=False,
-                           with_share_data=False):
+                           with_share_data=False, limit=None, offset=None,
+                           marker=None):
     """Returns all share replicas regardless of share."""
     return IMPL.share_replicas_get_all(
         context, with_share_server=with_share_server,
+        with_share_data=with_share_data, limit=limit, offset=offset,
+        marker=marker)
+
+
+def share_replicas_get_all_non_active_by_host(context, host,
+                                              with_share_server=False,
+                                              with_share_data=False):
+    """Returns all non-active share replicas placed on a given backend."""
+    return IMPL.share_replicas_get_all_non_active_by_host(
+        context, host, with_share_server=with_share_server,
         with_share_data=with_share_data)
 
 
 def share_replicas_get_all_by_share(context, share_id, with_share_server=False,
-                                    with_share_data=False):
+                                    with_share_data=False, limit=None,
+                                    offset=None, marker=None):
     """Returns all share replicas for a given share."""
     return IMPL.share_replicas_get_all_by_share(
         context, share_id, with_share_server=with_share_server,
-        with_share_data=with_share_data)
+        with_share_data=with_share_data, limit=limit, offset=offset,
+        marker=marker)
 
 
 def share_replicas_get_available_active_replica(context, share_id,
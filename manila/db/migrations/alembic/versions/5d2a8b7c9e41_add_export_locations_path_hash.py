@@ -0,0 +1,61 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""add_export_locations_path_hash
+
+Revision ID: 5d2a8b7c9e41
+Revises: a3c5e7f91b2d
+Create Date: 2026-10-17 16:21:08.734120
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '5d2a8b7c9e41'
+down_revision = 'a3c5e7f91b2d'
+
+import hashlib
+
+from alembic import op
+import sqlalchemy as sa
+
+from manila.db.migrations import utils
+
+
+TABLE_NAME = 'share_instance_export_locations'
+COLUMN_NAME = 'path_hash'
+INDEX_NAME = 'ix_share_instance_export_locations_path_hash'
+
+
+def _get_path_hash(path):
+    # NOTE: must be kept identical to _get_export_location_path_hash() of
+    # manila.db.sqlalchemy.api, which hashes the normalized path.
+    path = (path or '').strip().rstrip('/\\')
+    return hashlib.sha256(path.encode('utf-8')).hexdigest()
+
+
+def upgrade():
+    connection = op.get_bind()
+    op.add_column(TABLE_NAME, sa.Column(COLUMN_NAME, sa.String(64)))
+
+    el_table = utils.load_table(TABLE_NAME, connection)
+    for el in connection.execute(el_table.select()):
+        # pylint: disable=no-value-for-parameter
+        op.execute(
+            el_table.update().where(el_table.c.id == el.id).values(
+                {COLUMN_NAME: _get_path_hash(el.path)}))
+
+    op.create_index(INDEX_NAME, TABLE_NAME, [COLUMN_NAME])
+
+
+def downgrade():
+    op.drop_index(INDEX_NAME, TABLE_NAME)
+    op.drop_column(TABLE_NAME, COLUMN_NAME)
@@ -0,0 +1,37 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""add_share_instances_host_replica_state_index
+
+Revision ID: 88f11b62f4c5
+Revises: 636ecb8f3939
+Create Date: 2026-10-17 08:12:41.215430
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '88f11b62f4c5'
+down_revision = '636ecb8f3939'
+
+from alembic import op
+
+
+INDEX_NAME = 'share_instances_host_replica_state_idx'
+TABLE_NAME = 'share_instances'
+
+
+def upgrade():
+    op.create_index(INDEX_NAME, TABLE_NAME, ['host', 'replica_state'])
+
+
+def downgrade():
+    op.drop_index(INDEX_NAME, TABLE_NAME)
@@ -0,0 +1,102 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""add_search_trigrams_table
+
+Revision ID: a3c5e7f91b2d
+Revises: 88f11b62f4c5
+Create Date: 2026-10-17 14:03:27.581942
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = 'a3c5e7f91b2d'
+down_revision = '88f11b62f4c5'
+
+import unicodedata
+
+from alembic import op
+from oslo_log import log
+from oslo_utils import timeutils
+import sqlalchemy as sa
+
+from manila.db.migrations import utils
+
+
+SEARCH_TRIGRAMS_TABLE = 'search_trigrams'
+# NOTE: SEARCH_INDEX_FIELDS and _get_trigrams() must be kept identical to
+# _SEARCH_INDEX_FIELDS and _get_search_trigrams() of
+# manila.db.sqlalchemy.api, which maintains the index afterwards.
+SEARCH_INDEX_FIELDS = {
+    'shares': ('display_name', 'display_description'),
+    'share_snapshots': ('display_name', 'display_description'),
+    'share_networks': ('name', 'description'),
+}
+LOG = log.getLogger(__name__)
+
+
+def _get_trigrams(value):
+    value = unicodedata.normalize('NFKD', value or '')
+    value = ''.join(
+        c for c in value if not unicodedata.combining(c)).casefold()
+    return {value[i:i + 3] for i in range(len(value) - 2)}
+
+
+def collect_existing_trigrams(connection, search_trigrams_table):
+    now = timeutils.utcnow()
+    for table_name, fields in SEARCH_INDEX_FIELDS.items():
+        table = utils.load_table(table_name, connection)
+        query = table.select().where(table.c.deleted == 'False')
+        for resource in connection.execute(query):
+            trigrams = []
+            for field in fields:
+                trigrams.extend({
+                    'created_at': now,
+                    'deleted': 0,
+                    'resource_id': resource.id,
+                    'field': '%s.%s' % (table_name, field),
+                    'trigram': trigram,
+                } for trigram in _get_trigrams(resource[field]))
+            if trigrams:
+                op.bulk_insert(search_trigrams_table, trigrams)
+
+
+def upgrade():
+    connection = op.get_bind()
+    try:
+        search_trigrams_table = op.create_table(
+            SEARCH_TRIGRAMS_TABLE,
+            sa.Column('created_at', sa.DateTime),
+            sa.Column('updated_at', sa.DateTime),
+            sa.Column('deleted_at', sa.DateTime),
+            sa.Column('deleted', sa.Integer, default=0),
+            sa.Column('id', sa.Integer, primary_key=True, nullable=False),
+            sa.Column('resource_id', sa.String(36), nullable=False),
+            sa.Column('field', sa.String(64), nullable=False),
+            sa.Column('trigram', sa.String(3), nullable=False),
+            sa.Index('search_trigrams_field_trigram_idx',
+                     'field', 'trigram', 'resource_id'),
+            sa.Index('search_trigrams_resource_id_idx', 'resource_id'),
+            mysql_engine='InnoDB',
+            mysql_charset='utf8')
+        collect_existing_trigrams(connection, search_trigrams_table)
+    except Exception:
+        LOG.error('Table %s could not be created!', SEARCH_TRIGRAMS_TABLE)
+        raise
+
+
+def downgrade():
+    try:
+        op.drop_table(SEARCH_TRIGRAMS_TABLE)
+    except Exception:
+        LOG.error('Table %s could not be dropped!', SEARCH_TRIGRAMS_TABLE)
+        raise
@@ -21,9 +21,11 @@
 import copy
 import datetime
 from functools import wraps
+import hashlib
 import ipaddress
 import sys
 import threading
+import unicodedata
 import warnings
 
 # NOTE(uglide): Required to override default oslo_db Query class
@@ -295,11 +297,108 @@ def _process_model_like_filter(model, query, filters):
             value = filters[key]
             if not (isinstance(value, (str, int))):
                 continue
-            query = query.filter(
-                column_attr.op('LIKE')(u'%%%s%%' % value))
+            query = _apply_inexact_filter(query, model, key, value)
     return query
 
 
+# NOTE: the searchable fields of each table, the trigrams of their values are
+# kept in the search_trigrams table to narrow down inexact filters. This map
+# and _get_search_trigrams() are duplicated in the a3c5e7f91b2d migration,
+# which indexes the existing resources, and must be kept identical to it.
+_SEARCH_INDEX_FIELDS = {
+    'shares': ('display_name', 'display_description'),
+    'share_snapshots': ('display_name', 'display_description'),
+    'share_networks': ('name', 'description'),
+}
+
+
+def _fold_search_value(value):
+    """Folds the case and accents of a string.
+
+    Case and accent insensitive collations, such as the default collation of
+    MySQL, match LIKE expressions this way.
+    """
+    value = unicodedata.normalize('NFKD', value or '')
+    return ''.join(
+        c for c in value if not unicodedata.combining(c)).casefold()
+
+
+def _get_search_trigrams(value):
+    """Returns the set of case and accent folded trigrams of a string."""
+    value = _fold_search_value(value)
+    return {value[i:i + 3] for i in range(len(value) - 2)}
+
+
+def _search_index_update(session, resource_ref, values=None):
+    """Indexes the searchable fields of a resource.
+
+    :param session: session to index the resource in
+    :param resource_ref: model object of the resource
+    :param values: values updated on the resource; only the searchable
+                   fields among them are indexed again. All searchable
+                   fields are indexed if None.
+    """
+    table = resource_ref.__tablename__
+    fields = [field for field in _SEARCH_INDEX_FIELDS[table]
+              if values is None or field in values]
+    if not fields:
+        return
+
+    keys = ['%s.%s' % (table, field) for field in fields]
+    session.query(models.SearchTrigram).filter(
+        models.SearchTrigram.resource_id == resource_ref['id'],
+        models.SearchTrigram.field.in_(keys)).delete(
+        synchronize_session=False)
+
+    trigrams = []
+    for key, field in zip(keys, fields):
+        trigrams.extend({
+            'resource_id': resource_ref['id'],
+            'field': key,
+            'trigram': trigram,
+        } for trigram in _get_search_trigrams(resource_ref[field]))
+    if trigrams:
+        session.bulk_insert_mappings(models.SearchTrigram, trigrams)
+
+
+def _search_index_delete(session, resource_id):
+    """Removes a resource from the search index."""
+    session.query(models.SearchTrigram).filter_by(
+        resource_id=resource_id).delete(synchronize_session=False)
+
+
+def _apply_inexact_filter(query, model, key, value):
+    """Filters a query by a substring of the given column.
+
+    When the column is indexed, the query is first restricted to the
+    resources containing all the trigrams of the value, so that the LIKE
+    expression is only evaluated for them.
+    """
+    value = str(value)
+    query = query.filter(getattr(model, key).op('LIKE')(
+        u'%' + value + u'%'))
+
+    # NOTE: values containing LIKE wildcards or escapes, or characters that
+    # are not ASCII once folded, whose matching differs between databases
+    # and collations, are only matched using LIKE.
+    if (not CONF.use_search_index or
+            key not in _SEARCH_INDEX_FIELDS.get(model.__tablename__, ()) or
+            any(c in '%_\\' for c in value) or
+            any(ord(c) > 127 for c in _fold_search_value(value))):
+        return query
+    trigrams = _get_search_trigrams(value)
+    if not trigrams:
+        return query
+
+    trigram_model = models.SearchTrigram
+    resource_ids = sqlalchemy.select([trigram_model.resource_id]).where(
+        and_(trigram_model.field == '%s.%s' % (model.__tablename__, key),
+             trigram_model.trigram.in_(sorted(trigrams)))).group_by(
+        trigram_model.resource_id).having(
+        func.count(trigram_model.trigram.distinct()) == len(trigrams))
+    return query.filter(model.id.in_(resource_ids))
+
+
 def apply_like_filters(process_exact_filters):
     def _decorator(query, model, filters, legal_keys):
         exact_filters = filters.copy()
@@ -1640,8 +1739,7 @@ def share_instances_get_all(context, filters=None, session=None):
             models.ShareInstance.id)
         if export_location_path:
             query = query.filter(
-                models.ShareInstanceExportLocations.path ==
-                export_location_path)
+                _export_location_path_criterion(export_location_path))
         if export_location_id:
             query = query.filter(
                 models.ShareInstanceExportLocations.uuid ==
@@ -1743,6 +1841,7 @@ def share_instance_delete(context, instance_id, session=None,
             session.query(models.ShareMetadata).filter_by(
                 share_id=share['id']).soft_delete()
             share.soft_delete(session=session)
+            _search_index_delete(session, share['id'])
 
         if need_to_update_usages:
             _update_share_instance_usages(context, share, instance_ref,
@@ -1798,7 +1897,8 @@ def share_instances_get_all_by_host(context, host, with_share_data=False,
         instances = instances.filter(models.ShareInstance.status == status)
 
     if with_share_data:
-        instances = instances.options(joinedload('share')).all()
+        instances = instances.options(
+            joinedload('share').joinedload('share_metadata')).all()
         instances = [s for s in instances if s.share]
         for s in instances:
             s.set_share_data(s.share)
@@ -1821,6 +1921,77 @@ def share_instance_sizes_sum_by_host(context, host):
     return int(result[0] or 0)
 
 
+@require_context
+def share_instance_sizes_sum_by_hosts(context, hosts=None):
+    """Returns the sum of share sizes of each host with share instances.
+
+    :param hosts: optional list of backend hosts, in the form
+        'host@backend', to restrict the aggregation to. Pools of these
+        backends are included.
+    :returns: a dict mapping each share instance host, pool included, to
+        the sum of the sizes of the shares it holds.
+    """
+    query = model_query(
+        context, models.Share, models.ShareInstance.host,
+        func.sum(models.Share.size),
+    ).join(
+        models.ShareInstance.share,
+    )
+    if hosts:
+        query = query.filter(or_(*[
+            host_filter
+            for host in hosts
+            for host_filter in (
+                models.ShareInstance.host == host,
+                models.ShareInstance.host.like("{0}#%".format(host)))
+        ]))
+    query = query.group_by(models.ShareInstance.host)
+    return {host: int(size or 0) for host, size in query.all()}
+
+
+@require_context
+def share_instance_hosts_get_all_by_share_ids(context, share_ids):
+    """Returns the hosts of the instances of the given shares.
+
+    The hosts are retrieved with a single query, together with the share
+    attributes needed to check if the shares are visible to the caller.
+
+    :param share_ids: list of share IDs.
+    :returns: a dict mapping the ID of each existing share to a dict with
+        its 'project_id', 'user_id', 'is_public', the 'statuses' and the
+        'hosts' of its non-deleted instances.
+    """
+    if not share_ids:
+        return {}
+    query = model_query(
+        context, models.Share, models.Share.id, models.Share.project_id,
+        models.Share.user_id, models.Share.is_public,
+        models.ShareInstance.id, models.ShareInstance.host,
+        models.ShareInstance.status,
+    ).outerjoin(
+        models.ShareInstance,
+        and_(models.Share.id == models.ShareInstance.share_id,
+             models.ShareInstance.deleted == "False"),
+    ).filter(
+        models.Share.id.in_(share_ids),
+    )
+
+    shares = {}
+    for (share_id, project_id, user_id, is_public,
+         instance_id, host, status) in query:
+        share = shares.setdefault(share_id, {
+            'project_id': project_id,
+            'user_id': user_id,
+            'is_public': is_public,
+            'statuses': set(),
+            'hosts': [],
+        })
+        if instance_id is not None:
+            share['statuses'].add(status)
+            share['hosts'].append(host)
+    return shares
+
+
 @require_context
 def share_instances_get_all_by_share_network(context, share_network_id):
     """Returns list of share instances that belong to given share network."""
@@ -1976,14 +2147,63 @@ def _share_replica_get_with_filters(context, share_id=None, replica_id=None,
     return query
 
 
+def _share_replica_paginate_query(context, query, limit=None, offset=None,
+                                  marker=None, session=None):
+    """Applies sorting and pagination to a share replica query."""
+    if marker:
+        marker = _share_replica_get_with_filters(
+            context, replica_id=marker, with_share_server=False,
+            session=session).first()
+        if marker is None:
+            msg = _("Share replica marker could not be found.")
+            raise exception.InvalidInput(reason=msg)
+
+    return utils.paginate_query(query, models.ShareInstance, limit,
+                                sort_key='created_at', sort_dir='desc',
+                                offset=offset, marker=marker)
+
+
 @require_context
 def share_replicas_get_all(context, with_share_data=False,
-                           with_share_server=True, session=None):
+                           with_share_server=True, session=None, limit=None,
+                           offset=None, marker=None):
     """Returns replica instances for all available replicated shares."""
     session = session or get_session()
 
-    result = _share_replica_get_with_filters(
-        context, with_share_server=with_share_server, session=session).all()
+    query = _share_replica_get_with_filters(
+        context, with_share_server=with_share_server, session=session)
+    if limit is not None or offset or marker:
+        query = _share_replica_paginate_query(
+            context, query, limit=limit, offset=offset, marker=marker,
+            session=session)
+    result = query.all()
+
+    if with_share_data:
+        result = _set_instances_share_data(context, result, session)
+
+    return result
+
+
+@require_context
+def share_replicas_get_all_non_active_by_host(context, host,
+                                              with_share_data=False,
+                                              with_share_server=True,
+                                              session=None):
+    """Returns non-active replica instances that live on a given backend.
+
+    :param host: backend host name, in the form 'host@backend'. Replicas
+        placed on any pool of that backend are returned.
+    """
+    session = session or get_session()
+
+    query = _share_replica_get_with_filters(
+        context, with_share_server=with_share_server, session=session)
+    query = query.filter(
+        or_(models.ShareInstance.host == host,
+            models.ShareInstance.host.like("{0}#%".format(host))),
+        models.ShareInstance.replica_state != constants.REPLICA_STATE_ACTIVE,
+    )
+    result = query.all()
 
     if with_share_data:
         result = _set_instances_share_data(context, result, session)
@@ -1994,13 +2214,19 @@ def share_replicas_get_all(context, with_share_data=False,
 @require_context
 def share_replicas_get_all_by_share(context, share_id,
                                     with_share_data=False,
-                                    with_share_server=False, session=None):
+                                    with_share_server=False, session=None,
+                                    limit=None, offset=None, marker=None):
     """Returns replica instances for a given share."""
     session = session or get_session()
 
-    result = _share_replica_get_with_filters(
+    query = _share_replica_get_with_filters(
         context, with_share_server=with_share_server,
-        share_id=share_id, session=session).all()
+        share_id=share_id, session=session)
+    if limit is not None or offset or marker:
+        query = _share_replica_paginate_query(
+            context, query, limit=limit, offset=offset, marker=marker,
+            session=session)
+    result = query.all()
 
     if with_share_data:
         result = _set_instances_share_data(context, result, session)
@@ -2130,8 +2356,8 @@ def _process_share_filters(query, filters, project_id=None, is_public=False):
     else:
         display_name = filters.get('display_name~')
         if display_name:
-            query = query.filter(models.Share.display_name.op('LIKE')(
-                u'%' + display_name + u'%'))
+            query = _apply_inexact_filter(
+                query, models.Share, 'display_name', display_name)
 
     display_description = filters.get('display_description')
     if display_description:
@@ -2140,8 +2366,9 @@ def _process_share_filters(query, filters, project_id=None, is_public=False):
     else:
         display_description = filters.get('display_description~')
         if display_description:
-            query = query.filter(models.Share.display_description.op('LIKE')(
-                u'%' + display_description + u'%'))
+            query = _apply_inexact_filter(
+                query, models.Share, 'display_description',
+                display_description)
 
     export_location_id = filters.pop('export_location_id', None)
     export_location_path = filters.pop('export_location_path', None)
@@ -2152,8 +2379,7 @@ def _process_share_filters(query, filters, project_id=None, is_public=False):
             models.ShareInstance.id)
         if export_location_path:
             query = query.filter(
-                models.ShareInstanceExportLocations.path ==
-                export_location_path)
+                _export_location_path_criterion(export_location_path))
         if export_location_id:
             query = query.filter(
                 models.ShareInstanceExportLocations.uuid ==
@@ -2219,6 +2445,7 @@ def share_create(context, share_values, create_share_instance=True):
 
     with session.begin():
         share_ref.save(session=session)
+        _search_index_update(session, share_ref)
 
         if create_share_instance:
             instance_id = values.pop('instance_id', None)
@@ -2265,6 +2492,7 @@ def share_update(context, share_id, update_values):
 
         share_ref.update(share_values)
         share_ref.save(session=session)
+        _search_index_update(session, share_ref, share_values)
         return share_ref
 
 
@@ -2281,7 +2509,8 @@ def share_get(context, share_id, session=None):
 def _share_get_all_with_filters(context, project_id=None, share_server_id=None,
                                 share_group_id=None, filters=None,
                                 is_public=False, sort_key=None,
-                                sort_dir=None, show_count=False):
+                                sort_dir=None, show_count=False,
+                                detailed=True):
     """Returns sorted list of shares that satisfies filters.
 
     :param context: context to query under
@@ -2292,8 +2521,14 @@ def _share_get_all_with_filters(context, project_id=None, share_server_id=None,
                       to result if True
     :param sort_key: key of models.Share to be used for sorting
     :param sort_dir: desired direction of sorting, can be 'asc' and 'desc'
+    :param detailed: if False, only the ID and name of the shares are
+                     queried, and returned as dicts
     :returns: list -- models.Share
     :raises: exception.InvalidInput
+
+    Filters may also contain the pagination keys 'limit', 'offset' and
+    'marker' (ID of the last share of the previous page), which are applied
+    by the database, so that only the requested page of shares is loaded.
     """
     if filters is None:
         filters = {}
@@ -2302,11 +2537,10 @@ def _share_get_all_with_filters(context, project_id=None, share_server_id=None,
         sort_key = 'created_at'
     if not sort_dir:
         sort_dir = 'desc'
-    query = (
-        _share_get_query(context).join(
-            models.ShareInstance,
-            models.ShareInstance.share_id == models.Share.id
-        )
+    query = model_query(context, models.Share)
+    query = query.join(
+        models.ShareInstance,
+        models.ShareInstance.share_id == models.Share.id
     )
 
     if share_group_id:
@@ -2317,24 +2551,30 @@ def _share_get_all_with_filters(context, project_id=None, share_server_id=None,
     query = _process_share_filters(
         query, filters, project_id, is_public=is_public)
 
-    try:
-        query = apply_sorting(models.Share, query, sort_key, sort_dir)
-    except AttributeError:
-        try:
-            query = apply_sorting(
-                models.ShareInstance, query, sort_key, sort_dir)
-        except AttributeError:
-            msg = _("Wrong sorting key provided - '%s'.") % sort_key
-            raise exception.InvalidInput(reason=msg)
-
     count = None
     # NOTE(carloss): Count must be calculated before limit and offset are
     # applied into the query.
     if show_count:
         count = query.order_by(models.Share.id).distinct().count()
 
-    # Returns list of shares that satisfy filters.
-    query = query.all()
+    page = _share_get_page(context, query, filters, sort_key, sort_dir)
+
+    if detailed:
+        query = _share_get_query(context)
+    else:
+        query = model_query(context, models.Share, models.Share.id,
+                            models.Share.display_name)
+    query = query.join(page, page.c.id == models.Share.id).order_by(
+        getattr(page.c.sort_value, sort_dir.lower())(),
+        getattr(models.Share.id, sort_dir.lower())())
+
+    if detailed:
+        # Returns list of shares that satisfy filters.
+        query = query.all()
+    else:
+        # NOTE: the rows are not loaded as models.
+        query = [{'id': share_id, 'display_name': share_name}
+                 for share_id, share_name in query.all()]
 
     if show_count:
         return count, query
@@ -2342,44 +2582,122 @@ def _share_get_all_with_filters(context, project_id=None, share_server_id=None,
     return query
 
 
-def share_get_all(context, filters=None, sort_key=None, sort_dir=None):
+def _share_get_page(context, query, filters, sort_key, sort_dir):
+    """Returns a subquery of the IDs of a page of shares.
+
+    The query of the shares is joined to their instances, so a share with
+    several matching instances, such as replicas, appears in several rows.
+    The IDs of the shares are made distinct before the marker, limit and
+    offset of the filters are applied, so that each share takes a single
+    row of a page. A share sorted by a key of its instances is sorted by the
+    first value of its instances in this order.
+
+    :returns: subquery with the columns 'id' and 'sort_value', sorted
+    """
+    if sort_dir.lower() not in ('desc', 'asc'):
+        msg = _("Wrong sorting data provided: sort key is '%(sort_key)s' "
+                "and sort direction is '%(sort_dir)s'.") % {
+                    "sort_key": sort_key, "sort_dir": sort_dir}
+        raise exception.InvalidInput(reason=msg)
+    sort_dir = sort_dir.lower()
+
+    sort_model = None
+    for model in (models.Share, models.ShareInstance):
+        sort_attr = getattr(model, sort_key, None)
+        if hasattr(sort_attr, sort_dir):
+            sort_model = model
+            break
+    if sort_model is None:
+        msg = _("Wrong sorting key provided - '%s'.") % sort_key
+        raise exception.InvalidInput(reason=msg)
+
+    if sort_model is models.Share:
+        page_query = query.with_entities(
+            models.Share.id, sort_attr.label('sort_value')).distinct()
+        criterion_filter = page_query.filter
+    else:
+        aggregate = func.max if sort_dir == 'desc' else func.min
+        sort_attr = aggregate(sort_attr)
+        page_query = query.with_entities(
+            models.Share.id, sort_attr.label('sort_value')).group_by(
+            models.Share.id)
+        criterion_filter = page_query.having
+
+    if filters.get('marker'):
+        marker = page_query.filter(
+            models.Share.id == filters['marker']).first()
+        if marker is not None:
+            marker_value = marker.sort_value
+        else:
+            # The marker no longer matches the filters.
+            try:
+                marker = share_get(context, filters['marker'])
+            except exception.NotFound:
+                msg = _("Share marker '%s' could not be found.") % (
+                    filters['marker'])
+                raise exception.InvalidInput(reason=msg)
+            if sort_model is models.ShareInstance:
+                marker_value = marker.instance[sort_key]
+            else:
+                marker_value = marker[sort_key]
+        page_query = criterion_filter(utils.marker_criterion(
+            sort_attr, models.Share.id, sort_dir, marker_value,
+            filters['marker']))
+
+    page_query = page_query.order_by(
+        getattr(sort_attr, sort_dir)(), getattr(models.Share.id, sort_dir)())
+
+    if filters.get('limit') is not None:
+        page_query = page_query.limit(filters['limit'])
+
+    if filters.get('offset'):
+        page_query = page_query.offset(filters['offset'])
+
+    return page_query.subquery()
+
+
+def share_get_all(context, filters=None, sort_key=None, sort_dir=None,
+                  detailed=True):
     project_id = filters.pop('project_id', None) if filters else None
     query = _share_get_all_with_filters(
         context,
         project_id=project_id,
-        filters=filters, sort_key=sort_key, sort_dir=sort_dir)
+        filters=filters, sort_key=sort_key, sort_dir=sort_dir,
+        detailed=detailed)
 
     return query
 
 
 @require_admin_context
 def share_get_all_with_count(context, filters=None, sort_key=None,
-                             sort_dir=None):
+                             sort_dir=None, detailed=True):
     count, query = _share_get_all_with_filters(
         context,
         filters=filters, sort_key=sort_key, sort_dir=sort_dir,
-        show_count=True)
+        show_count=True, detailed=detailed)
     return count, query
 
 
 @require_context
 def share_get_all_by_project(context, project_id, filters=None,
-                             is_public=False, sort_key=None, sort_dir=None):
+                             is_public=False, sort_key=None, sort_dir=None,
+                             detailed=True):
     """Returns list of shares with given project ID."""
     query = _share_get_all_with_filters(
         context, project_id=project_id, filters=filters, is_public=is_public,
-        sort_key=sort_key, sort_dir=sort_dir)
+        sort_key=sort_key, sort_dir=sort_dir, detailed=detailed)
     return query
 
 
 @require_context
 def share_get_all_by_project_with_count(
         context, project_id, filters=None, is_public=False, sort_key=None,
-        sort_dir=None):
+        sort_dir=None, detailed=True):
     """Returns list of shares with given project ID."""
     count, query = _share_get_all_with_filters(
         context, project_id=project_id, filters=filters, is_public=is_public,
-        sort_key=sort_key, sort_dir=sort_dir, show_count=True)
+        sort_key=sort_key, sort_dir=sort_dir, show_count=True,
+        detailed=detailed)
     return count, query
 
 
@@ -2407,21 +2725,24 @@ def share_get_all_by_share_group_id_with_count(context, share_group_id,
 
 @require_context
 def share_get_all_by_share_server(context, share_server_id, filters=None,
-                                  sort_key=None, sort_dir=None):
+                                  sort_key=None, sort_dir=None,
+                                  detailed=True):
     """Returns list of shares with given share server."""
     query = _share_get_all_with_filters(
         context, share_server_id=share_server_id, filters=filters,
-        sort_key=sort_key, sort_dir=sort_dir)
+        sort_key=sort_key, sort_dir=sort_dir, detailed=detailed)
     return query
 
 
 @require_context
 def share_get_all_by_share_server_with_count(
-        context, share_server_id, filters=None, sort_key=None, sort_dir=None):
+        context, share_server_id, filters=None, sort_key=None, sort_dir=None,
+        detailed=True):
     """Returns list of shares with given share server."""
     count, query = _share_get_all_with_filters(
         context, share_server_id=share_server_id, filters=filters,
-        sort_key=sort_key, sort_dir=sort_dir, show_count=True)
+        sort_key=sort_key, sort_dir=sort_dir, show_count=True,
+        detailed=detailed)
     return count, query
 
 
@@ -2438,6 +2759,7 @@ def share_delete(context, share_id):
             raise exception.InvalidShare(msg)
 
         share_ref.soft_delete(session=session)
+        _search_index_delete(session, share_id)
 
         (session.query(models.ShareMetadata).
             filter_by(share_id=share_id).soft_delete())
@@ -2875,6 +3197,7 @@ def share_snapshot_instance_delete(context, snapshot_instance_id,
             context, snapshot_instance_ref['snapshot_id'], session=session)
         if len(snapshot.instances) == 0:
             snapshot.soft_delete(session=session)
+            _search_index_delete(session, snapshot['id'])
 
 
 @require_context
@@ -2988,6 +3311,7 @@ def share_snapshot_create(context, create_values,
     session = get_session()
     with session.begin():
         snapshot_ref.save(session=session)
+        _search_index_update(session, snapshot_ref)
 
         if create_snapshot_instance:
             share_snapshot_instance_create(
@@ -3040,7 +3364,7 @@ def _share_snapshot_get_all_with_filters(context, project_id=None,
                                          share_id=None, filters=None,
                                          limit=None, offset=None,
                                          sort_key=None, sort_dir=None,
-                                         show_count=False):
+                                         show_count=False, marker=None):
     """Retrieves all snapshots.
 
     If no sorting parameters are specified then returned snapshots are sorted
@@ -3049,9 +3373,12 @@ def _share_snapshot_get_all_with_filters(context, project_id=None,
     :param context: context to query under
     :param filters: dictionary of filters
     :param limit: maximum number of items to return
+    :param offset: the number of items to skip from the marker or from the
+                   first element
     :param sort_key: attribute by which results should be sorted,default is
                      created_at
     :param sort_dir: direction in which results should be sorted
+    :param marker: ID of the last snapshot of the previous page
     :returns: list of matching snapshots
     """
     # Init data
@@ -3114,6 +3441,16 @@ def _share_snapshot_get_all_with_filters(context, project_id=None,
     if show_count:
         count = query.order_by(models.ShareSnapshot.id).distinct().count()
 
+    if marker:
+        try:
+            marker = share_snapshot_get(context, marker)
+        except exception.ShareSnapshotNotFound:
+            msg = _("Snapshot marker '%s' could not be found.") % marker
+            raise exception.InvalidInput(reason=msg)
+        query = query.filter(utils.marker_criterion(
+            getattr(models.ShareSnapshot, sort_key), models.ShareSnapshot.id,
+            sort_dir.lower(), marker[sort_key], marker['id']))
+
     if limit is not None:
         query = query.limit(limit)
 
@@ -3131,43 +3468,44 @@ def _share_snapshot_get_all_with_filters(context, project_id=None,
 
 @require_admin_context
 def share_snapshot_get_all(context, filters=None, limit=None, offset=None,
-                           sort_key=None, sort_dir=None):
+                           sort_key=None, sort_dir=None, marker=None):
     return _share_snapshot_get_all_with_filters(
         context, filters=filters, limit=limit,
-        offset=offset, sort_key=sort_key, sort_dir=sort_dir)
+        offset=offset, sort_key=sort_key, sort_dir=sort_dir, marker=marker)
 
 
 @require_admin_context
 def share_snapshot_get_all_with_count(context, filters=None, limit=None,
                                       offset=None, sort_key=None,
-                                      sort_dir=None):
+                                      sort_dir=None, marker=None):
     count, query = _share_snapshot_get_all_with_filters(
         context, filters=filters, limit=limit,
         offset=offset, sort_key=sort_key, sort_dir=sort_dir,
-        show_count=True)
+        show_count=True, marker=marker)
     return count, query
 
 
 @require_context
 def share_snapshot_get_all_by_project(context, project_id, filters=None,
                                       limit=None, offset=None,
-                                      sort_key=None, sort_dir=None):
+                                      sort_key=None, sort_dir=None,
+                                      marker=None):
     authorize_project_context(context, project_id)
     return _share_snapshot_get_all_with_filters(
         context, project_id=project_id, filters=filters, limit=limit,
-        offset=offset, sort_key=sort_key, sort_dir=sort_dir)
+        offset=offset, sort_key=sort_key, sort_dir=sort_dir, marker=marker)
 
 
 @require_context
 def share_snapshot_get_all_by_project_with_count(context, project_id,
                                                  filters=None, limit=None,
                                                  offset=None, sort_key=None,
-                                                 sort_dir=None):
+                                                 sort_dir=None, marker=None):
     authorize_project_context(context, project_id)
     count, query = _share_snapshot_get_all_with_filters(
         context, project_id=project_id, filters=filters, limit=limit,
         offset=offset, sort_key=sort_key, sort_dir=sort_dir,
-        show_count=True)
+        show_count=True, marker=marker)
     return count, query
 
 
@@ -3203,6 +3541,7 @@ def share_snapshot_update(context, snapshot_id, values):
         if snapshot_values:
             snapshot_ref.update(snapshot_values)
             snapshot_ref.save(session=session)
+            _search_index_update(session, snapshot_ref, snapshot_values)
 
         if instance_values:
             snapshot_ref.instance.update(instance_values)
@@ -3708,6 +4047,30 @@ def _share_metadata_get_item(context, share_id, key, session=None):
 # Export locations functions
 ############################
 
+def _normalize_export_location_path(path):
+    """Strips surrounding whitespace and trailing separators of a path."""
+    return (path or '').strip().rstrip('/\\')
+
+
+def _get_export_location_path_hash(path):
+    """Returns the hash export locations are indexed by.
+
+    The hash is computed from the normalized path, so that equivalent paths
+    share the same hash and share_get_by_export_location_path() finds them.
+    The 5d2a8b7c9e41 migration hashes existing paths the same way.
+    """
+    path = _normalize_export_location_path(path)
+    return hashlib.sha256(path.encode('utf-8')).hexdigest()
+
+
+def _export_location_path_criterion(path):
+    """Returns a criterion matching the export locations with this path."""
+    return and_(
+        models.ShareInstanceExportLocations.path_hash ==
+        _get_export_location_path_hash(path),
+        models.ShareInstanceExportLocations.path == path)
+
+
 def _share_export_locations_get(context, share_instance_ids,
                                 include_admin_only=True,
                                 ignore_secondary_replicas=False, session=None):
@@ -3812,6 +4175,64 @@ def share_export_location_get_by_uuid(context, export_location_uuid,
     return result
 
 
+@require_context
+def share_get_by_export_location_path(context, export_location_path,
+                                      project_id=None, is_public=False,
+                                      session=None):
+    """Returns the ID of the share exported at the given path.
+
+    The export locations are looked up by the hash of the path, so the
+    path may differ from the stored one by surrounding whitespace and
+    trailing separators. Admin only export locations are only looked up
+    for administrators.
+
+    :param project_id: if given, only the shares of this project are
+                       looked up
+    :param is_public: public shares of other projects are looked up as
+                      well if True
+    :returns: ID of the share; the shares of the project come first if
+              several match, then the oldest ones
+    :raises: exception.ExportLocationPathNotFound
+    """
+    session = session or get_session()
+    path = _normalize_export_location_path(export_location_path)
+    el_model = models.ShareInstanceExportLocations
+
+    query = model_query(
+        context, el_model, models.Share.id, el_model.path,
+        session=session, read_deleted="no",
+    ).join(
+        models.ShareInstance,
+        models.ShareInstance.id == el_model.share_instance_id,
+    ).join(
+        models.Share,
+        models.Share.id == models.ShareInstance.share_id,
+    ).filter(
+        el_model.path_hash == _get_export_location_path_hash(path),
+        models.ShareInstance.deleted == 'False',
+        models.Share.deleted == 'False',
+    )
+
+    if not context.is_admin:
+        query = query.filter(sqlalchemy.not_(el_model.is_admin_only))
+
+    if project_id:
+        own_share = models.Share.project_id == project_id
+        if is_public:
+            query = query.filter(or_(own_share, models.Share.is_public))
+            query = query.order_by(own_share.desc())
+        else:
+            query = query.filter(own_share)
+
+    query = query.order_by(models.Share.created_at, models.Share.id)
+
+    for share_id, el_path in query:
+        # NOTE: guard against hash collisions
+        if _normalize_export_location_path(el_path) == path:
+            return share_id
+    raise exception.ExportLocationPathNotFound(path=export_location_path)
+
+
 @require_context
 @oslo_db_api.wrap_db_retry(max_retries=5, retry_on_deadlock=True)
 def share_export_locations_update(context, share_instance_id, export_locations,
@@ -3900,6 +4321,7 @@ def share_export_locations_update(context, share_instance_id, export_locations,
         location_ref.update({
             'uuid': uuidutils.generate_uuid(),
             'path': el['path'],
+            'path_hash': _get_export_location_path_hash(el['path']),
             'share_instance_id': share_instance_id,
             'updated_at': indexed_update_time[el['path']],
             'deleted': 0,
@@ -4094,6 +4516,7 @@ def share_network_create(context, values):
     session = get_session()
     with session.begin():
         network_ref.save(session=session)
+        _search_index_update(session, network_ref)
     return share_network_get(context, values['id'], session)
 
 
@@ -4103,6 +4526,7 @@ def share_network_delete(context, id):
     with session.begin():
         network_ref = share_network_get(context, id, session=session)
         network_ref.soft_delete(session)
+        _search_index_delete(session, id)
 
 
 @require_context
@@ -4113,6 +4537,7 @@ def share_network_update(context, id, values):
         network_ref = share_network_get(context, id, session=session)
         network_ref.update(values)
         network_ref.save(session=session)
+        _search_index_update(session, network_ref, values)
         return network_ref
 
 
@@ -4125,14 +4550,24 @@ def share_network_get(context, id, session=None):
 
 
 @require_context
-def share_network_get_all_by_filter(context, filters=None):
+def share_network_get_all_by_ids(context, share_network_ids):
+    if not share_network_ids:
+        return []
+    return _network_get_query(context).filter(
+        models.ShareNetwork.id.in_(share_network_ids)).all()
+
+
+@require_context
+def share_network_get_all_by_filter(context, filters=None, limit=None,
+                                    offset=None, marker=None):
     model_sn = models.ShareNetwork
     session = get_session()
     with session.begin():
         query = _network_get_query(context,
                                    session=session)
 
-        legal_filter_keys = ('project_id', 'created_since', 'created_before')
+        legal_filter_keys = ('project_id', 'created_since', 'created_before',
+                             'name~', 'description~')
 
         if not filters:
             filters = {}
@@ -4148,6 +4583,18 @@ def share_network_get_all_by_filter(context, filters=None):
                 share_network_id).filter_by(
                 security_service_id=security_service_id, deleted=0)
 
+        if limit is not None or offset or marker:
+            if marker:
+                marker = _network_get_query(
+                    context, session=session).filter_by(id=marker).first()
+                if marker is None:
+                    msg = _("Share network marker could not be found.")
+                    raise exception.InvalidInput(reason=msg)
+            query = utils.paginate_query(query, model_sn, limit,
+                                         sort_key='created_at',
+                                         sort_dir='desc', offset=offset,
+                                         marker=marker)
+
         return query.all()
 
 
@@ -261,12 +261,28 @@ class Share(BASE, ManilaBase):
 
     @property
     def instance(self):
+        # The selected instance is proxied for several attributes, so it is
+        # cached and only selected again when the instances, or their status
+        # or replica state, change.
+        instances = tuple(self.instances)
+        states = [(x.status, x.replica_state) for x in instances]
+        cache = self.__dict__.get('_instance_cache')
+        if (cache is not None and cache[1] == states and
+                all(x is y for x, y in zip(cache[0], instances))):
+            return cache[2]
+
+        result = self._select_instance(instances)
+        self.__dict__['_instance_cache'] = (instances, states, result)
+        return result
+
+    @staticmethod
+    def _select_instance(instances):
         # NOTE(gouthamr): The order of preference: status 'replication_change',
         # followed  by 'available' and 'error'. If replicated share and
         # not undergoing a 'replication_change', only 'active' instances are
         # preferred.
         result = None
-        if len(self.instances) > 0:
+        if len(instances) > 0:
             order = (constants.STATUS_REVERTING,
                      constants.STATUS_REPLICATION_CHANGE,
                      constants.STATUS_MIGRATING,
@@ -274,14 +290,14 @@ class Share(BASE, ManilaBase):
                      constants.STATUS_AVAILABLE,
                      constants.STATUS_ERROR, )
             other_statuses = (
-                [x['status'] for x in self.instances if
+                [x['status'] for x in instances if
                  x['status'] not in order and
                  x['status'] not in constants.TRANSITIONAL_STATUSES]
             )
             order = (order + tuple(other_statuses) +
                      constants.TRANSITIONAL_STATUSES)
             sorted_instances = sorted(
-                self.instances, key=lambda x: order.index(x['status']))
+                instances, key=lambda x: order.index(x['status']))
 
             select_instances = sorted_instances
             if (select_instances[0]['status'] !=
@@ -465,6 +481,9 @@ class ShareInstanceExportLocations(BASE, ManilaBase):
     share_instance_id = Column(
         String(36), ForeignKey('share_instances.id'), nullable=False)
     path = Column(String(2000))
+    # NOTE: hash of the normalized path, the path itself is too long to be
+    # indexed.
+    path_hash = Column(String(64), index=True)
     is_admin_only = Column(Boolean, default=False, nullable=False)
 
 
@@ -1368,6 +1387,25 @@ class AsynchronousOperationData(BASE, ManilaBase):
     value = Column(String(1023), nullable=False)
 
 
+class SearchTrigram(BASE, ManilaBase):
+    """Represents a trigram of a searchable field of a resource.
+
+    Used to narrow down inexact (name~ and description~) filters without
+    scanning the whole table of the resource.
+    """
+    __tablename__ = 'search_trigrams'
+    __table_args__ = (
+        schema.Index('search_trigrams_field_trigram_idx',
+                     'field', 'trigram', 'resource_id'),
+        schema.Index('search_trigrams_resource_id_idx', 'resource_id'),
+    )
+    id = Column(Integer, primary_key=True)
+    resource_id = Column(String(36), nullable=False)
+    # NOTE: in the form of '<table name>.<column name>'
+    field = Column(String(64), nullable=False)
+    trigram = Column(String(3), nullable=False)
+
+
 def register_models():
     """Register Models and create metadata.
 
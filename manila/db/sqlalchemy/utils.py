@@ -16,8 +16,47 @@ from manila import exception
 import sqlalchemy
 
 
+def marker_criterion(sort_attr, id_attr, sort_dir, marker_value, marker_id):
+    """Returns a criterion matching the rows that follow the marker row.
+
+    This is the keyset counterpart of an offset: for a query sorted by
+    ``sort_attr`` and then by ``id_attr``, both in ``sort_dir`` direction,
+    the database can seek directly to the rows after the marker instead of
+    reading and discarding all the rows before it. NULL values are treated
+    as smaller than any other value, the way MySQL and SQLite sort them.
+
+    :param sort_attr: model attribute the query is primarily sorted by
+    :param id_attr: model attribute used to break ties, usually the id
+    :param sort_dir: direction of sorting (asc, desc)
+    :param marker_value: value of ``sort_attr`` of the marker row
+    :param marker_id: value of ``id_attr`` of the marker row
+
+    :return: The criterion to be passed to query.filter().
+    """
+    if sort_dir == 'desc':
+        after = sqlalchemy.sql.operators.lt
+    else:
+        after = sqlalchemy.sql.operators.gt
+
+    if sort_attr is id_attr:
+        return after(id_attr, marker_id)
+
+    if marker_value is None:
+        ties = sqlalchemy.and_(sort_attr.is_(None), after(id_attr, marker_id))
+        if sort_dir == 'desc':
+            return ties
+        return sqlalchemy.or_(sort_attr.isnot(None), ties)
+
+    criteria = [after(sort_attr, marker_value),
+                sqlalchemy.and_(sort_attr == marker_value,
+                                after(id_attr, marker_id))]
+    if sort_dir == 'desc':
+        criteria.append(sort_attr.is_(None))
+    return sqlalchemy.or_(*criteria)
+
+
 def paginate_query(query, model, limit, sort_key='created_at',
-                   sort_dir='desc', offset=None):
+                   sort_dir='desc', offset=None, marker=None):
     """Returns a query with sorting / pagination criteria added.
 
     :param query: the query object to which we should add paging/sorting
@@ -28,6 +67,8 @@ def paginate_query(query, model, limit, sort_key='created_at',
     :param sort_dir: direction in which results should be sorted (asc, desc)
     :param offset: the number of items to skip from the marker or from the
                     first element.
+    :param marker: the last item of the previous page; only the items
+                   following it are returned.
 
     :rtype: sqlalchemy.orm.query.Query
     :return: The query with sorting/pagination added.
@@ -42,6 +83,19 @@ def paginate_query(query, model, limit, sort_key='created_at',
     else:
         query = query.order_by(sqlalchemy.asc(sort_key_attr))
 
+    # NOTE: order by id as well, so that pages are deterministic and the
+    # marker row can be located even if sort key values are not unique.
+    if sort_key != 'id':
+        if sort_dir == 'desc':
+            query = query.order_by(sqlalchemy.desc(model.id))
+        else:
+            query = query.order_by(sqlalchemy.asc(model.id))
+
+    if marker is not None:
+        query = query.filter(marker_criterion(
+            sort_key_attr, model.id, sort_dir,
+            getattr(marker, sort_key), marker.id))
+
     if limit is not None:
         query = query.limit(limit)
 
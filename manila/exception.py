@@ -550,6 +550,10 @@ class ExportLocationNotFound(NotFound):
     message = _("Export location %(uuid)s could not be found.")
 
 
+class ExportLocationPathNotFound(NotFound):
+    message = _("Export location with path %(path)s could not be found.")
+
+
 class ShareNotFound(NotFound):
     message = _("Share %(share_id)s could not be found.")
 
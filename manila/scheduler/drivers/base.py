@@ -25,6 +25,7 @@ from oslo_utils import timeutils
 
 from manila import db
 from manila.i18n import _
+from manila.scheduler.drivers import external
 from manila.share import rpcapi as share_rpcapi
 from manila import utils
 
@@ -87,6 +88,20 @@ class Scheduler(object):
         """Get the normalized set of capabilities for the services."""
         return self.host_manager.get_service_capabilities()
 
+    def get_scheduler_stats(self):
+        """Get the cache and filter statistics of the HostManager.
+
+        When the external scheduler API is enabled, the outcome counters
+        and latency of its calls are included as well.
+        """
+        stats = {
+            'caches': self.host_manager.get_cache_stats(),
+            'filters': self.host_manager.get_filter_stats(),
+        }
+        if CONF.external_scheduler_api_url:
+            stats['external_scheduler'] = external.get_stats()
+        return stats
+
     def update_service_capabilities(self, service_name, host,
                                     capabilities, timestamp):
         """Process a capability update from a service node."""
@@ -20,10 +20,14 @@ The external scheduler API is expected to take a list of weighed hosts and
 their weights, along with the request specification, and return a reordered
 and filtered list of host names.
 """
+import collections
+
 import jsonschema
 from oslo_config import cfg
 from oslo_log import log as logging
+from oslo_utils import timeutils
 import requests
+from requests import adapters
 
 LOG = logging.getLogger(__name__)
 
@@ -52,7 +56,37 @@ If external_scheduler_api_url is configured, Manila will call and wait for the
 external scheduler to respond for this long. If the external scheduler does not
 respond within this time, the request will be aborted. In this case, the
 scheduler will continue with the original host selection and weights.
-""")
+"""),
+    cfg.IntOpt(
+        "external_scheduler_pool_size",
+        default=10,
+        min=1,
+        help="""
+The maximum number of persistent connections kept open to the external
+scheduler.
+"""),
+    cfg.IntOpt(
+        "external_scheduler_failure_threshold",
+        default=3,
+        min=0,
+        help="""
+The number of consecutive failed calls to the external scheduler after which
+it is no longer called for external_scheduler_cooldown seconds.
+
+Failures include connection errors, timeouts, error replies and invalid
+responses. While the external scheduler is skipped, the scheduler continues
+with the original host selection and weights. Set to 0 to always call the
+external scheduler.
+"""),
+    cfg.IntOpt(
+        "external_scheduler_cooldown",
+        default=30,
+        min=1,
+        help="""
+The number of seconds the external scheduler is skipped for once
+external_scheduler_failure_threshold consecutive calls have failed. After this
+time, a single call is attempted again.
+"""),
 ])
 
 # The expected response schema from the external scheduler api.
@@ -72,6 +106,80 @@ RESPONSE_SCHEMA = {
 }
 
 
+class CircuitBreaker(object):
+    """Skips the external scheduler after repeated failures.
+
+    Once the failure threshold is reached, the breaker is open and calls
+    are skipped until the cool-down period has elapsed. A single call is
+    then let through: its success closes the breaker, its failure opens it
+    for another cool-down period.
+    """
+
+    def __init__(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def allow_request(self):
+        if self.opened_at is None:
+            return True
+        if timeutils.is_older_than(self.opened_at,
+                                   CONF.external_scheduler_cooldown):
+            # Let a single call through, until it has completed
+            self.opened_at = timeutils.utcnow()
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        threshold = CONF.external_scheduler_failure_threshold
+        if threshold and self.failures >= threshold:
+            if self.opened_at is None:
+                LOG.warning("External scheduler API failed %(failures)d "
+                            "times in a row, skipping it for %(cooldown)d "
+                            "seconds.",
+                            {'failures': self.failures,
+                             'cooldown': CONF.external_scheduler_cooldown})
+            self.opened_at = timeutils.utcnow()
+
+
+_session = None
+_circuit_breaker = CircuitBreaker()
+# Outcome counters and cumulated latency of the external scheduler calls
+_stats = collections.Counter()
+
+
+def _get_session():
+    """Returns the HTTP session shared by all external scheduler calls."""
+    global _session
+    if _session is None:
+        adapter = adapters.HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=CONF.external_scheduler_pool_size)
+        _session = requests.Session()
+        _session.mount('http://', adapter)
+        _session.mount('https://', adapter)
+    return _session
+
+
+def get_stats():
+    """Returns the outcome counters and latency of external calls."""
+    stats = dict(_stats)
+    calls = stats.get('successes', 0) + stats.get('failures', 0)
+    stats['average_latency'] = (
+        stats.get('latency', 0.0) / calls if calls else 0.0)
+    return stats
+
+
+def _record_failure(watch):
+    _stats['failures'] += 1
+    _stats['latency'] += watch.elapsed()
+    _circuit_breaker.record_failure()
+
+
 def call_external_scheduler_api(context, weighed_hosts, spec_dict):
     """Reorder and filter hosts using an external scheduler service.
 
@@ -108,14 +216,22 @@ def call_external_scheduler_api(context, weighed_hosts, spec_dict):
         # into account if provided.
         "weights": {h.obj.host: h.weight for h in weighed_hosts},
     }
+    if not _circuit_breaker.allow_request():
+        LOG.debug("Skipping the external scheduler API after %d failed "
+                  "calls.", _circuit_breaker.failures)
+        _stats['skipped'] += 1
+        return weighed_hosts
     LOG.debug("Calling external scheduler API with %s", json_data)
+    watch = timeutils.StopWatch()
+    watch.start()
     try:
-        response = requests.post(url, json=json_data, timeout=timeout)
+        response = _get_session().post(url, json=json_data, timeout=timeout)
         response.raise_for_status()
         # If the JSON parsing fails, this will also raise a RequestException.
         response_json = response.json()
     except requests.RequestException as e:
         LOG.error("Failed to call external scheduler API: %s", e)
+        _record_failure(watch)
         return weighed_hosts
 
     # The external scheduler api is expected to return a json with
@@ -124,8 +240,15 @@ def call_external_scheduler_api(context, weighed_hosts, spec_dict):
         jsonschema.validate(response_json, RESPONSE_SCHEMA)
     except jsonschema.ValidationError as e:
         LOG.error("External scheduler response is invalid: %s", e)
+        _record_failure(watch)
         return weighed_hosts
 
+    _stats['successes'] += 1
+    _stats['latency'] += watch.elapsed()
+    _circuit_breaker.record_success()
+    LOG.debug("External scheduler API replied in %.3f seconds.",
+              watch.elapsed())
+
     # The list of host names can also be empty. In this case, we trust
     # the external scheduler decision and return an empty list.
     if not (host_names := response_json["hosts"]):
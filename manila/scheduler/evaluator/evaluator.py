@@ -13,6 +13,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import functools
 import operator
 import re
 
@@ -36,21 +37,33 @@ def _operatorOperands(tokenList):
 class EvalConstant(object):
     def __init__(self, toks):
         self.value = toks[0]
+        # Parsed expressions are cached and evaluated many times, so work
+        # out once whether this is a variable or a literal value.
+        self.variable = None
+        if (isinstance(self.value, str) and
+                re.match(r"^[a-zA-Z_]+\.[a-zA-Z_]+$", self.value)):
+            self.variable = tuple(self.value.split('.'))
+        else:
+            self.literal = self._convert(self.value)
 
     def eval(self):
-        result = self.value
-        if (isinstance(result, str) and
-                re.match(r"^[a-zA-Z_]+\.[a-zA-Z_]+$", result)):
-            (which_dict, entry) = result.split('.')
-            try:
-                result = _vars[which_dict][entry]
-            except KeyError as e:
-                msg = _("KeyError: %s") % e
-                raise exception.EvaluatorParseException(reason=msg)
-            except TypeError as e:
-                msg = _("TypeError: %s") % e
-                raise exception.EvaluatorParseException(reason=msg)
+        if self.variable is None:
+            return self.literal
 
+        (which_dict, entry) = self.variable
+        try:
+            result = _vars[which_dict][entry]
+        except KeyError as e:
+            msg = _("KeyError: %s") % e
+            raise exception.EvaluatorParseException(reason=msg)
+        except TypeError as e:
+            msg = _("TypeError: %s") % e
+            raise exception.EvaluatorParseException(reason=msg)
+
+        return self._convert(result)
+
+    @staticmethod
+    def _convert(result):
         try:
             result = int(result)
         except ValueError:
@@ -221,6 +234,10 @@ class EvalBoolOrOp(object):
         return left or right
 
 
+# Maximum number of parsed expressions kept in memory. Backends usually
+# share a handful of filter and goodness functions.
+PARSE_CACHE_SIZE = 256
+
 _parser = None
 _vars = {}
 
@@ -273,6 +290,25 @@ def _def_parser():
     return expr
 
 
+@functools.lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse(expression):
+    """Parses an expression into a tree of Eval* objects.
+
+    Variables are only looked up when the tree is evaluated, so the
+    parsed trees are cached and shared by every evaluation of the same
+    expression.
+    """
+    global _parser
+    if _parser is None:
+        _parser = _def_parser()
+
+    try:
+        return _parser.parseString(expression, parseAll=True)[0]
+    except pyparsing.ParseException as e:
+        msg = _("ParseException: %s") % e
+        raise exception.EvaluatorParseException(reason=msg)
+
+
 def evaluate(expression, **kwargs):
     """Evaluates an expression.
 
@@ -282,17 +318,9 @@ def evaluate(expression, **kwargs):
     Supports both integer and floating point values, and automatic
     promotion where necessary.
     """
-    global _parser
-    if _parser is None:
-        _parser = _def_parser()
+    result = _parse(expression)
 
     global _vars
     _vars = kwargs
 
-    try:
-        result = _parser.parseString(expression, parseAll=True)[0]
-    except pyparsing.ParseException as e:
-        msg = _("ParseException: %s") % e
-        raise exception.EvaluatorParseException(reason=msg)
-
     return result.eval()
@@ -15,21 +15,26 @@
 
 from oslo_log import log
 
+from manila.common import constants
+from manila import db
 from manila import exception
+from manila import policy
 from manila.scheduler.filters import base_host
 from manila.share import api
 from manila.share import utils as share_utils
 
 LOG = log.getLogger(__name__)
 
+DEFERRED_DELETION_STATUSES = (
+    constants.STATUS_DEFERRED_DELETING,
+    constants.STATUS_ERROR_DEFERRED_DELETING,
+)
+
 
 class AffinityBaseFilter(base_host.BaseHostFilter):
     """Base class of affinity filters"""
     _filter_type = None
 
-    def __init__(self):
-        self.share_api = api.API()
-
     def filter_all(self, filter_obj_list, filter_properties):
         # _filter_type should be defined in subclass
         if self._filter_type is None:
@@ -51,10 +56,25 @@ class AffinityBaseFilter(base_host.BaseHostFilter):
                 'error': e})
             return None
         else:
-            # Return list of hosts which pass the function host_passes()
-            # overriden in AffinityFilter and AntiAffinityFilter.
+            # The host names of the hinted shares are computed once per
+            # request, every host is then checked with a set lookup in
+            # _host_name_passes() overriden in AffinityFilter and
+            # AntiAffinityFilter.
+            host_names = self._get_host_names(filter_properties)
             return [obj for obj in filter_obj_list
-                    if self._filter_one(obj, filter_properties)]
+                    if self._host_name_passes(obj, host_names)]
+
+    def host_passes(self, host_state, filter_properties):
+        host_names = self._get_host_names(filter_properties)
+        return self._host_name_passes(host_state, host_names)
+
+    def _host_name_passes(self, host_state, host_names):
+        raise NotImplementedError()
+
+    def _get_host_names(self, filter_properties):
+        hosts = filter_properties['scheduler_hints'][self._filter_type]
+        return {share_utils.extract_host(host, level='host')
+                for host in hosts}
 
     def _validate(self, filter_properties):
         context = filter_properties['context']
@@ -71,45 +91,55 @@ class AffinityBaseFilter(base_host.BaseHostFilter):
             share_uuids = share_uuids.split(",")
             # raise InvalidUUIDListError(share_uuids)
 
+        # All hinted shares are looked up with a single query instead of
+        # one share_api.get() per share.
+        shares = db.share_instance_hosts_get_all_by_share_ids(
+            context, list(set(share_uuids)))
+
         filter_properties['scheduler_hints'][self._filter_type] = []
 
         for uuid in share_uuids:
-            try:
-                # NOTE(ccloud):
-                # if we want to allow to specify uuid from another project,
-                # we need to change the policy as context.elevated() right now
-                # still hard tied to the current project:
-                share = self.share_api.get(context, uuid)
-            except exception.NotFound:
+            # NOTE(ccloud):
+            # if we want to allow to specify uuid from another project,
+            # we need to change the policy as context.elevated() right now
+            # still hard tied to the current project:
+            share = shares.get(uuid)
+            if share is None or not self._is_visible(context, share):
                 raise exception.ShareNotFound(uuid)
-            instances = share.get('instances')
-            if len(instances) == 0:
+            if len(share['hosts']) == 0:
                 raise exception.ShareInstanceNotFound(share_instance_id=uuid)
             filter_properties['scheduler_hints'][self._filter_type].extend(
-                [instance.get('host') for instance in instances])
+                share['hosts'])
 
         return filter_properties
 
+    @staticmethod
+    def _is_visible(context, share):
+        """Applies the access checks of share_api.get() to a hinted share."""
+        if not share['is_public']:
+            authorized = policy.check_policy(
+                context, 'share', 'get', share, do_raise=False)
+            if not authorized:
+                return False
+        if share['statuses'] & set(DEFERRED_DELETION_STATUSES):
+            policy_str = "list_shares_in_deferred_deletion_states"
+            authorized = policy.check_policy(
+                context, 'share', policy_str, share, do_raise=False)
+            if not authorized:
+                return False
+        return True
+
 
 class AffinityFilter(AffinityBaseFilter):
     _filter_type = api.AFFINITY_HINT
 
-    def host_passes(self, host_state, filter_properties):
-        allowed_hosts = \
-            filter_properties['scheduler_hints'][self._filter_type]
-        host_name = share_utils.extract_host(host_state.host, level='host')
-
-        allowed_host_names = set()
-        for allowed_host in allowed_hosts:
-            allowed_host_name = share_utils.extract_host(allowed_host,
-                                                         level='host')
-            allowed_host_names.add(allowed_host_name)
-
+    def _host_name_passes(self, host_state, allowed_host_names):
         if len(allowed_host_names) > 1:
             # The given share uuids are located on different filers.
             # Affinity with both at the same time is not possible.
             return None
 
+        host_name = share_utils.extract_host(host_state.host, level='host')
         if host_name in allowed_host_names:
             # Valid, pass the host:
             return host_state.host
@@ -118,17 +148,12 @@ class AffinityFilter(AffinityBaseFilter):
 class AntiAffinityFilter(AffinityBaseFilter):
     _filter_type = api.ANTI_AFFINITY_HINT
 
-    def host_passes(self, host_state, filter_properties):
-        forbidden_hosts = \
-            filter_properties['scheduler_hints'][self._filter_type]
+    def _host_name_passes(self, host_state, forbidden_host_names):
         host_name = share_utils.extract_host(host_state.host, level='host')
 
         # Do not pass the host if there is a host_name match
-        for forbidden_host in forbidden_hosts:
-            forbidden_host_name = \
-                share_utils.extract_host(forbidden_host, level='host')
-            if host_name == forbidden_host_name:
-                return None
+        if host_name in forbidden_host_names:
+            return None
 
         return host_state.host
 
@@ -17,6 +17,7 @@
 Filter support
 """
 from oslo_log import log
+from oslo_utils import timeutils
 
 from manila.scheduler import base_handler
 
@@ -65,7 +66,7 @@ class BaseFilterHandler(base_handler.BaseHandler):
     """
 
     def get_filtered_objects(self, filter_classes, objs,
-                             filter_properties, index=0):
+                             filter_properties, index=0, timings=None):
         """Get objects after filter
 
         :param filter_classes: filters that will be used to filter the
@@ -75,6 +76,9 @@ class BaseFilterHandler(base_handler.BaseHandler):
         :param index: This value needs to be increased in the caller
                       function of get_filtered_objects when handling
                       each resource.
+        :param timings: optional list to which a dict with the 'name',
+                        'duration', 'objects_in' and 'objects_out' of
+                        each filter run is appended.
         """
         list_objs = list(objs)
         LOG.debug("Starting with %d host(s)", len(list_objs))
@@ -83,12 +87,22 @@ class BaseFilterHandler(base_handler.BaseHandler):
             filter_class = filter_cls()
 
             if filter_class.run_filter_for_index(index):
+                watch = timeutils.StopWatch().start()
                 objs = filter_class.filter_all(list_objs, filter_properties)
+                if objs is not None:
+                    objs = list(objs)
+                if timings is not None:
+                    timings.append({
+                        'name': cls_name,
+                        'duration': watch.elapsed(),
+                        'objects_in': len(list_objs),
+                        'objects_out': 0 if objs is None else len(objs),
+                    })
                 if objs is None:
                     LOG.debug("Filter %(cls_name)s says to stop filtering",
                               {'cls_name': cls_name})
                     return (None, cls_name)
-                list_objs = list(objs)
+                list_objs = objs
                 msg = ("Filter %(cls_name)s returned %(obj_len)d host(s)"
                        % {'cls_name': cls_name, 'obj_len': len(list_objs)})
                 if not list_objs:
@@ -19,17 +19,62 @@
 
 import math
 
+from oslo_config import cfg
 from oslo_log import log
 
 from manila.scheduler.filters import base_host
 from manila.scheduler import utils
 
+CONF = cfg.CONF
+CONF.import_opt('scheduler_vectorized_capacity',
+                'manila.scheduler.host_manager')
+
 LOG = log.getLogger(__name__)
 
 
 class CapacityFilter(base_host.BaseHostFilter):
     """CapacityFilter filters based on share host's capacity utilization."""
 
+    def filter_all(self, filter_obj_list, filter_properties):
+        if not CONF.scheduler_vectorized_capacity or utils.numpy is None:
+            return super(CapacityFilter, self).filter_all(
+                filter_obj_list, filter_properties)
+
+        host_states = list(filter_obj_list)
+        passes = self._hosts_pass(host_states, filter_properties)
+        return [host_state for host_state, host_passes
+                in zip(host_states, passes) if host_passes]
+
+    def _hosts_pass(self, host_states, filter_properties):
+        """Same as host_passes, for all the given host states at once."""
+        numpy = utils.numpy
+        share_size = filter_properties.get('size', 0)
+        capacities = utils.PoolCapacities(host_states, filter_properties)
+
+        passes = [None] * len(host_states)
+        for index in capacities.unpacked:
+            passes[index] = self.host_passes(host_states[index],
+                                             filter_properties)
+
+        total = capacities.total
+        free = numpy.floor(capacities.free - total * capacities.reserved)
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            provisioned_ratio = (capacities.provisioned + share_size) / total
+        thin_passes = ((provisioned_ratio <= capacities.ratio) &
+                       (free * capacities.ratio >= share_size))
+        packed_passes = (total > 0) & numpy.where(
+            capacities.thin,
+            (capacities.ratio >= 1) & thin_passes,
+            free >= share_size)
+
+        for index, host_passes in zip(capacities.indexes,
+                                      packed_passes.tolist()):
+            passes[index] = host_passes
+            if not host_passes:
+                LOG.debug("Insufficient capacity for share creation "
+                          "on host %s.", host_states[index].host)
+        return passes
+
     def host_passes(self, host_state, filter_properties):
         """Return True if host has sufficient capacity."""
         share_size = filter_properties.get('size', 0)
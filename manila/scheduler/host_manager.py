@@ -20,6 +20,7 @@
 Manage hosts in the current zone.
 """
 
+import collections
 import re
 try:
     from UserDict import IterableUserDict  # noqa
@@ -28,6 +29,7 @@ except ImportError:
 
 from oslo_config import cfg
 from oslo_log import log
+from oslo_serialization import jsonutils
 from oslo_utils import timeutils
 
 from manila import db
@@ -61,6 +63,29 @@ host_manager_opts = [
                     'HostAffinityWeigher',
                 ],
                 help='Which weigher class names to use for weighing hosts.'),
+    cfg.IntOpt('scheduler_service_cache_ttl',
+               default=5,
+               min=0,
+               help='Number of seconds the scheduler reuses the list of '
+                    'share services read from the database when refreshing '
+                    'its host states. Service liveness and the disabled '
+                    'flag are therefore observed with up to this delay. '
+                    'Set to 0 to read the services on every request.'),
+    cfg.BoolOpt('scheduler_vectorized_capacity',
+                default=False,
+                help='If True and NumPy is installed, the CapacityFilter '
+                     'and CapacityWeigher evaluate the capacity of all the '
+                     'pools of a request at once instead of one pool at a '
+                     'time. Pools not reporting numeric capacities are '
+                     'still evaluated one by one. Capacity warnings are '
+                     'not logged for each rejected pool in this mode.'),
+    cfg.BoolOpt('scheduler_profile_filters',
+                default=False,
+                help='If True, the time spent in each filter and weigher '
+                     'and the number of hosts it receives and returns are '
+                     'recorded for each scheduling request. They are '
+                     'logged in a structured line per request and '
+                     'aggregated in the memory of the scheduler service.'),
     cfg.ListOpt(
         'scheduler_default_share_group_filters',
         default=[
@@ -111,6 +136,26 @@ class ReadOnlyDict(IterableUserDict):
             raise TypeError
 
 
+class HostShareSizes(object):
+    """Sums of share sizes of a set of backends, keyed by pool host.
+
+    The sums of all backends are aggregated by a single query, run the
+    first time a pool asks for its own sum, so that refreshing many thin
+    provisioned pools costs one database round-trip.
+    """
+
+    def __init__(self, context, hosts):
+        self.context = context
+        self.hosts = list(hosts)
+        self._sizes = None
+
+    def get(self, host):
+        if self._sizes is None:
+            self._sizes = db.share_instance_sizes_sum_by_hosts(
+                self.context, hosts=self.hosts)
+        return self._sizes.get(host, 0)
+
+
 class HostState(object):
     """Mutable and immutable information tracked for a host."""
 
@@ -171,8 +216,16 @@ class HostState(object):
             service = {}
         self.service = ReadOnlyDict(service)
 
+    def update_service(self, service=None):
+        """Refresh the service record of the host and of its pools."""
+        if service is None:
+            service = {}
+        self.service = ReadOnlyDict(service)
+        for pool in (self.pools or {}).values():
+            pool.service = ReadOnlyDict(service)
+
     def update_from_share_capability(
-            self, capability, service=None, context=None):
+            self, capability, service=None, context=None, share_sizes=None):
         """Update information about a host from its share_node info.
 
         'capability' is the status info reported by share backend, a typical
@@ -232,9 +285,11 @@ class HostState(object):
             self.update_backend(capability)
 
             # Update pool level info
-            self.update_pools(capability, service, context=context)
+            self.update_pools(capability, service, context=context,
+                              share_sizes=share_sizes)
 
-    def update_pools(self, capability, service, context=None):
+    def update_pools(self, capability, service, context=None,
+                     share_sizes=None):
         """Update storage pools information from backend reported info."""
         if not capability:
             return
@@ -253,7 +308,8 @@ class HostState(object):
                     cur_pool = PoolState(self.host, pool_cap, pool_name)
                     self.pools[pool_name] = cur_pool
                 cur_pool.update_from_share_capability(
-                    pool_cap, service, context=context)
+                    pool_cap, service, context=context,
+                    share_sizes=share_sizes)
 
                 active_pools.add(pool_name)
         elif pools is None:
@@ -281,7 +337,8 @@ class HostState(object):
                     self.pools[pool_name] = single_pool
 
             single_pool.update_from_share_capability(
-                capability, service, context=context)
+                capability, service, context=context,
+                share_sizes=share_sizes)
             active_pools.add(pool_name)
 
         # Remove non-active pools from self.pools
@@ -421,12 +478,15 @@ class PoolState(HostState):
         # No pools in pool
         self.pools = None
 
-    def _estimate_provisioned_capacity(self, host_name, context=None):
+    def _estimate_provisioned_capacity(self, host_name, context=None,
+                                       share_sizes=None):
         """Estimate provisioned capacity from share sizes on backend."""
+        if share_sizes is not None:
+            return share_sizes.get(host_name)
         return db.share_instance_sizes_sum_by_host(context, host_name)
 
     def update_from_share_capability(
-            self, capability, service=None, context=None):
+            self, capability, service=None, context=None, share_sizes=None):
         """Update information about a pool from its share_node info."""
         self.update_capabilities(capability, service)
         if capability:
@@ -461,8 +521,8 @@ class PoolState(HostState):
 
             if self.thin_provisioning and provisioned_capacity_gb is None:
                 self.provisioned_capacity_gb = (
-                    self._estimate_provisioned_capacity(self.host,
-                                                        context=context))
+                    self._estimate_provisioned_capacity(
+                        self.host, context=context, share_sizes=share_sizes))
             else:
                 self.provisioned_capacity_gb = provisioned_capacity_gb
 
@@ -495,6 +555,15 @@ class HostManager(object):
     def __init__(self):
         self.service_states = {}  # { <host>: {<service>: {cap k : v}}}
         self.host_state_map = {}
+        # Capability reports last applied to each entry of host_state_map.
+        # A host state is only rebuilt when a new report has been received.
+        self._applied_service_states = {}
+        self._share_services = None
+        self._share_services_updated_at = None
+        self.cache_stats = collections.Counter()
+        # Aggregated timings of the filters and weighers, see
+        # scheduler_profile_filters.
+        self.filter_stats = {}
         self.filter_handler = base_host_filter.HostFilterHandler(
             'manila.scheduler.filters')
         self.filter_classes = self.filter_handler.get_all_classes()
@@ -563,9 +632,14 @@ class HostManager(object):
                            filter_class_names=None):
         """Filter hosts and return only ones passing all filters."""
         filter_classes = self._choose_host_filters(filter_class_names)
-        return self.filter_handler.get_filtered_objects(filter_classes,
-                                                        hosts,
-                                                        filter_properties)
+        timings = [] if CONF.scheduler_profile_filters else None
+        result = self.filter_handler.get_filtered_objects(filter_classes,
+                                                          hosts,
+                                                          filter_properties,
+                                                          timings=timings)
+        if timings is not None:
+            self._record_timings('filter', timings)
+        return result
 
     def get_weighed_hosts(self, hosts, weight_properties,
                           weigher_class_names=None):
@@ -575,9 +649,44 @@ class HostManager(object):
         for backend, info in self.service_states.items():
             weight_properties['server_pools_mapping'].update(
                 info.get('server_pools_mapping', {}))
-        return self.weight_handler.get_weighed_objects(weigher_classes,
-                                                       hosts,
-                                                       weight_properties)
+        timings = [] if CONF.scheduler_profile_filters else None
+        result = self.weight_handler.get_weighed_objects(weigher_classes,
+                                                         hosts,
+                                                         weight_properties,
+                                                         timings=timings)
+        if timings is not None:
+            self._record_timings('weigher', timings)
+        return result
+
+    def _record_timings(self, stage, timings):
+        """Log the timings of a request and add them to filter_stats."""
+        LOG.info("Scheduler %(stage)s timings: %(timings)s",
+                 {'stage': stage, 'timings': jsonutils.dumps([
+                     dict(timing, duration=round(timing['duration'], 6))
+                     for timing in timings])})
+        for timing in timings:
+            stats = self.filter_stats.setdefault(timing['name'], {
+                'type': stage,
+                'calls': 0,
+                'total_duration': 0.0,
+                'max_duration': 0.0,
+                'objects_in': 0,
+                'objects_out': 0,
+            })
+            stats['calls'] += 1
+            stats['total_duration'] += timing['duration']
+            stats['max_duration'] = max(stats['max_duration'],
+                                        timing['duration'])
+            stats['objects_in'] += timing['objects_in']
+            stats['objects_out'] += timing['objects_out']
+
+    def get_filter_stats(self):
+        """Returns the aggregated timings of the filters and weighers."""
+        return {
+            name: dict(stats, average_duration=(
+                stats['total_duration'] / stats['calls']))
+            for name, stats in self.filter_stats.items()
+        }
 
     def update_service_capabilities(self, service_name, host,
                                     capabilities, timestamp):
@@ -606,13 +715,33 @@ class HostManager(object):
                   {'service_name': service_name, 'host': host,
                    'cap': capabilities})
 
+    def _get_share_services(self, context):
+        """Returns the share services, cached for a short period of time."""
+        ttl = CONF.scheduler_service_cache_ttl
+        now = timeutils.utcnow()
+        if (ttl and self._share_services is not None and
+                timeutils.delta_seconds(
+                    self._share_services_updated_at, now) < ttl):
+            self.cache_stats['service_cache_hits'] += 1
+            return self._share_services
+
+        self._share_services = db.service_get_all_by_topic(
+            context, CONF.share_topic)
+        self._share_services_updated_at = now
+        self.cache_stats['service_cache_refreshes'] += 1
+        return self._share_services
+
+    def get_cache_stats(self):
+        """Returns the hit and refresh counters of the scheduler caches."""
+        return dict(self.cache_stats)
+
     def _update_host_state_map(self, context):
 
         # Get resource usage across the available share nodes:
-        topic = CONF.share_topic
-        share_services = db.service_get_all_by_topic(context, topic)
+        share_services = self._get_share_services(context)
 
         active_hosts = set()
+        outdated_host_states = []
         for service in share_services:
             host = service['host']
 
@@ -630,11 +759,29 @@ class HostManager(object):
                     capabilities=capabilities,
                     service=dict(service.items()))
                 self.host_state_map[host] = host_state
+            elif (host in self._applied_service_states and
+                    self._applied_service_states[host] is capabilities):
+                # No new capability report since the host state was last
+                # updated, so only the service record needs refreshing.
+                host_state.update_service(dict(service.items()))
+                self.cache_stats['host_state_hits'] += 1
+                active_hosts.add(host)
+                continue
 
+            outdated_host_states.append((host_state, capabilities, service))
+            active_hosts.add(host)
+
+        # Share sizes of all the backends refreshed below are aggregated
+        # by a single query, if any of their pools needs them.
+        share_sizes = HostShareSizes(
+            context, [outdated[0].host for outdated in outdated_host_states])
+        for host_state, capabilities, service in outdated_host_states:
             # Update capabilities and attributes in host_state
             host_state.update_from_share_capability(
-                capabilities, service=dict(service.items()), context=context)
-            active_hosts.add(host)
+                capabilities, service=dict(service.items()), context=context,
+                share_sizes=share_sizes)
+            self._applied_service_states[host_state.host] = capabilities
+            self.cache_stats['host_state_refreshes'] += 1
 
         # remove non-active hosts from host_state_map
         nonactive_hosts = set(self.host_state_map.keys()) - active_hosts
@@ -642,6 +789,7 @@ class HostManager(object):
             LOG.info("Removing non-active host: %(host)s from "
                      "scheduler cache.", {'host': host})
             self.host_state_map.pop(host, None)
+            self._applied_service_states.pop(host, None)
 
     def get_all_host_states_share(self, context):
         """Returns a dict of all the hosts the HostManager knows about.
@@ -74,7 +74,7 @@ MAPPING = {
 class SchedulerManager(manager.Manager):
     """Chooses a host to create shares."""
 
-    RPC_API_VERSION = '1.11'
+    RPC_API_VERSION = '1.12'
 
     def __init__(self, scheduler_driver=None, service_name=None,
                  *args, **kwargs):
@@ -152,6 +152,10 @@ class SchedulerManager(manager.Manager):
         """Get active pools from the scheduler's cache."""
         return self.driver.get_pools(context, filters, cached)
 
+    def get_scheduler_stats(self, context):
+        """Get the cache and filter statistics of this scheduler."""
+        return self.driver.get_scheduler_stats()
+
     def manage_share(self, context, share_id, driver_options, request_spec,
                      filter_properties=None):
         """Ensure that the host exists and can accept the share."""
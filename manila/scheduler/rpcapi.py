@@ -44,9 +44,10 @@ class SchedulerAPI(object):
         1.9  - Add cached parameter to get_pools method
         1.10 - Add timestamp to update_service_capabilities
         1.11 - Add extend_share
+        1.12 - Add get_scheduler_stats
     """
 
-    RPC_API_VERSION = '1.11'
+    RPC_API_VERSION = '1.12'
 
     def __init__(self):
         super(SchedulerAPI, self).__init__()
@@ -80,6 +81,10 @@ class SchedulerAPI(object):
         return call_context.call(context, 'get_pools', filters=filters,
                                  cached=cached)
 
+    def get_scheduler_stats(self, context):
+        call_context = self.client.prepare(version='1.12')
+        return call_context.call(context, 'get_scheduler_stats')
+
     def create_share_group(self, context, share_group_id, request_spec=None,
                            filter_properties=None):
         """Casts an rpc to the scheduler to create a share group.
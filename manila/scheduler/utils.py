@@ -15,10 +15,13 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 from oslo_log import log
+from oslo_utils import importutils
 from oslo_utils import strutils
 
 from manila.scheduler.filters import extra_specs_ops
 
+numpy = importutils.try_import('numpy')
+
 LOG = log.getLogger(__name__)
 
 
@@ -182,3 +185,56 @@ def capabilities_satisfied(capabilities, extra_specs):
                       {'key': key, 'req': req, 'cap': cap})
             return False
     return True
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class PoolCapacities(object):
+    """Capacity attributes of a list of host states, packed in arrays.
+
+    Lets the capacity filter and weigher evaluate all the pools of a
+    request at once with NumPy. Only host states reporting numeric
+    capacities are packed, in the order given by ``indexes``; the
+    positions of the others are listed in ``unpacked`` so that callers
+    evaluate them one by one.
+    """
+
+    def __init__(self, host_states, properties):
+        if properties.get('snapshot_id'):
+            reserved_attr = 'reserved_snapshot_percentage'
+        elif properties.get('is_share_extend'):
+            reserved_attr = 'reserved_share_extend_percentage'
+        else:
+            reserved_attr = 'reserved_percentage'
+        thin_logic = use_thin_logic(properties.get('share_type', {}))
+
+        self.indexes = []
+        self.unpacked = []
+        rows = []
+        for index, host_state in enumerate(host_states):
+            thin = thin_logic and thin_provisioning(
+                host_state.thin_provisioning)
+            if not (_is_number(host_state.free_capacity_gb) and
+                    _is_number(host_state.total_capacity_gb) and
+                    (not thin or (
+                        _is_number(host_state.provisioned_capacity_gb) and
+                        _is_number(
+                            host_state.max_over_subscription_ratio)))):
+                self.unpacked.append(index)
+                continue
+            self.indexes.append(index)
+            rows.append((
+                host_state.free_capacity_gb,
+                host_state.total_capacity_gb,
+                float(getattr(host_state, reserved_attr)) / 100,
+                thin,
+                host_state.max_over_subscription_ratio if thin else 1,
+                host_state.provisioned_capacity_gb if thin else 0,
+            ))
+
+        columns = numpy.array(rows, dtype=float).reshape(-1, 6).T
+        (self.free, self.total, self.reserved, thin, self.ratio,
+         self.provisioned) = columns
+        self.thin = thin.astype(bool)
@@ -19,6 +19,8 @@ Pluggable Weighing support
 
 import abc
 
+from oslo_utils import timeutils
+
 from manila.scheduler import base_handler
 
 
@@ -119,8 +121,12 @@ class BaseWeightHandler(base_handler.BaseHandler):
     object_class = WeighedObject
 
     def get_weighed_objects(self, weigher_classes, obj_list,
-                            weighing_properties):
-        """Return a sorted (descending), normalized list of WeighedObjects."""
+                            weighing_properties, timings=None):
+        """Return a sorted (descending), normalized list of WeighedObjects.
+
+        If a list is given as timings, a dict with the 'name', 'duration',
+        'objects_in' and 'objects_out' of each weigher run is appended to it.
+        """
 
         if not obj_list:
             return []
@@ -128,7 +134,15 @@ class BaseWeightHandler(base_handler.BaseHandler):
         weighed_objs = [self.object_class(obj, 0.0) for obj in obj_list]
         for weigher_cls in weigher_classes:
             weigher = weigher_cls()
+            watch = timeutils.StopWatch().start()
             weights = weigher.weigh_objects(weighed_objs, weighing_properties)
+            if timings is not None:
+                timings.append({
+                    'name': weigher_cls.__name__,
+                    'duration': watch.elapsed(),
+                    'objects_in': len(weighed_objs),
+                    'objects_out': len(weighed_objs),
+                })
 
             # Normalize the weighers
             weights = normalize(weights,
@@ -43,6 +43,8 @@ capacity_weight_opts = [
 
 CONF = cfg.CONF
 CONF.register_opts(capacity_weight_opts)
+CONF.import_opt('scheduler_vectorized_capacity',
+                'manila.scheduler.host_manager')
 
 
 class CapacityWeigher(base_host.BaseHostWeigher):
@@ -88,9 +90,39 @@ class CapacityWeigher(base_host.BaseHostWeigher):
                 free = math.floor(free_space - total * reserved)
         return free
 
+    def _weigh_objects_vectorized(self, weighed_obj_list, weight_properties):
+        """Same as _weigh_object, for all the given objects at once."""
+        numpy = utils.numpy
+        host_states = [obj.obj for obj in weighed_obj_list]
+        capacities = utils.PoolCapacities(host_states, weight_properties)
+
+        weights = [None] * len(host_states)
+        for index in capacities.unpacked:
+            weights[index] = self._weigh_object(host_states[index],
+                                                weight_properties)
+
+        total = capacities.total
+        reserved_space = total * capacities.reserved
+        free = numpy.floor(numpy.where(
+            capacities.thin,
+            total * capacities.ratio - capacities.provisioned -
+            reserved_space,
+            capacities.free - reserved_space))
+        for index, weight in zip(capacities.indexes, free.tolist()):
+            weights[index] = int(weight)
+
+        if weights:
+            self.minval = min(weights)
+            self.maxval = max(weights)
+        return weights
+
     def weigh_objects(self, weighed_obj_list, weight_properties):
-        weights = super(CapacityWeigher, self).weigh_objects(weighed_obj_list,
-                                                             weight_properties)
+        if CONF.scheduler_vectorized_capacity and utils.numpy is not None:
+            weights = self._weigh_objects_vectorized(weighed_obj_list,
+                                                     weight_properties)
+        else:
+            weights = super(CapacityWeigher, self).weigh_objects(
+                weighed_obj_list, weight_properties)
         # NOTE(u_glide): Replace -inf with (minimum - 1) and
         # inf with (maximum + 1) to avoid errors in
         # manila.scheduler.weighers.base.normalize() method
@@ -1884,19 +1884,35 @@ class API(base.Base):
                 raise exception.NotFound()
         return share
 
+    def get_by_export_location_path(self, context, export_location_path):
+        """Returns the share exported at the given path.
+
+        Unlike filtering the list of shares by export location path, this
+        looks the share up directly by the indexed hash of the path.
+        Administrators look it up in all projects, other users among the
+        shares of their project and public shares.
+        """
+        project_id = None if context.is_admin else context.project_id
+        share_id = self.db.share_get_by_export_location_path(
+            context, export_location_path, project_id=project_id,
+            is_public=True)
+        return self.get(context, share_id)
+
     def get_all(self, context, search_opts=None, sort_key='created_at',
-                sort_dir='desc'):
+                sort_dir='desc', detailed=True):
         return self._get_all(context, search_opts=search_opts,
-                             sort_key=sort_key, sort_dir=sort_dir)
+                             sort_key=sort_key, sort_dir=sort_dir,
+                             detailed=detailed)
 
     def get_all_with_count(self, context, search_opts=None,
-                           sort_key='created_at', sort_dir='desc'):
+                           sort_key='created_at', sort_dir='desc',
+                           detailed=True):
         return self._get_all(context, search_opts=search_opts,
                              sort_key=sort_key, sort_dir=sort_dir,
-                             show_count=True)
+                             show_count=True, detailed=detailed)
 
     def _get_all(self, context, search_opts=None, sort_key='created_at',
-                 sort_dir='desc', show_count=False):
+                 sort_dir='desc', show_count=False, detailed=True):
         policy.check_policy(context, 'share', 'get_all')
 
         if search_opts is None:
@@ -1911,7 +1927,7 @@ class API(base.Base):
             'display_name', 'share_group_id', 'display_name~',
             'display_description', 'display_description~', 'snapshot_id',
             'status', 'share_type_id', 'project_id', 'export_location_id',
-            'export_location_path', 'limit', 'offset', 'host',
+            'export_location_path', 'limit', 'offset', 'marker', 'host',
             'share_network_id']
 
         for key in filter_keys:
@@ -1973,14 +1989,16 @@ class API(base.Base):
             policy.check_policy(context, 'share', 'list_by_share_server_id')
             result = get_methods['get_by_share_server'](
                 context, search_opts.pop('share_server_id'), filters=filters,
-                sort_key=sort_key, sort_dir=sort_dir)
+                sort_key=sort_key, sort_dir=sort_dir, detailed=detailed)
         elif context.is_admin and utils.is_all_tenants(search_opts):
             result = get_methods['get_all'](
-                context, filters=filters, sort_key=sort_key, sort_dir=sort_dir)
+                context, filters=filters, sort_key=sort_key, sort_dir=sort_dir,
+                detailed=detailed)
         else:
             result = get_methods['get_all_by_project'](
                 context, project_id=context.project_id, filters=filters,
-                is_public=is_public, sort_key=sort_key, sort_dir=sort_dir)
+                is_public=is_public, sort_key=sort_key, sort_dir=sort_dir,
+                detailed=detailed)
 
         if show_count:
             count = result[0]
@@ -2007,22 +2025,25 @@ class API(base.Base):
         return snapshot
 
     def get_all_snapshots(self, context, search_opts=None, limit=None,
-                          offset=None, sort_key='share_id', sort_dir='desc'):
+                          offset=None, sort_key='share_id', sort_dir='desc',
+                          marker=None):
         return self._get_all_snapshots(context, search_opts=search_opts,
                                        limit=limit, offset=offset,
-                                       sort_key=sort_key, sort_dir=sort_dir)
+                                       sort_key=sort_key, sort_dir=sort_dir,
+                                       marker=marker)
 
     def get_all_snapshots_with_count(self, context, search_opts=None,
                                      limit=None, offset=None,
-                                     sort_key='share_id', sort_dir='desc'):
+                                     sort_key='share_id', sort_dir='desc',
+                                     marker=None):
         return self._get_all_snapshots(context, search_opts=search_opts,
                                        limit=limit, offset=offset,
                                        sort_key=sort_key, sort_dir=sort_dir,
-                                       show_count=True)
+                                       show_count=True, marker=marker)
 
     def _get_all_snapshots(self, context, search_opts=None, limit=None,
                            offset=None, sort_key='share_id', sort_dir='desc',
-                           show_count=False):
+                           show_count=False, marker=None):
         policy.check_policy(context, 'share_snapshot', 'get_all_snapshots')
 
         search_opts = search_opts or {}
@@ -2060,12 +2081,12 @@ class API(base.Base):
         if context.is_admin and all_tenants:
             result = get_methods['get_all'](
                 context, filters=search_opts, limit=limit, offset=offset,
-                sort_key=sort_key, sort_dir=sort_dir)
+                sort_key=sort_key, sort_dir=sort_dir, marker=marker)
         else:
             result = get_methods['get_all_by_project'](
                 context, context.project_id, filters=search_opts,
                 limit=limit, offset=offset, sort_key=sort_key,
-                sort_dir=sort_dir)
+                sort_dir=sort_dir, marker=marker)
 
         if show_count:
             count = result[0]
@@ -94,6 +94,19 @@ share_opts = [
         default=['lost+found'],
         help="List of files and folders to be ignored when migrating shares. "
              "Items should be names (not including any path)."),
+    cfg.IntOpt(
+        'migration_precopy_passes',
+        default=0,
+        min=0,
+        help="Maximum number of passes in which the data service copies "
+             "the contents of shares migrated with the host-assisted "
+             "approach while they are still writable. Each pass only "
+             "copies the files that changed since the previous one, based "
+             "on their size and modification time. The access rules of the "
+             "shares are only cast to read-only before the last pass, "
+             "which shortens the time during which they cannot be written "
+             "to. Requires the 'parallel' data copy engine. If 0, shares "
+             "are read-only during the whole copy."),
     cfg.StrOpt(
         'share_mount_template',
         default='mount -vt %(proto)s %(options)s %(export)s %(path)s',
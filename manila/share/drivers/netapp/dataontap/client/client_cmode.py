@@ -224,8 +224,7 @@ class NetAppCmodeClient(client_base.NetAppBaseClient):
 
         # Get remaining pages, saving data into first page
         while next_tag is not None:
-            next_api_args = copy.deepcopy(api_args)
-            next_api_args['tag'] = next_tag
+            next_api_args = dict(api_args, tag=next_tag)
             next_result = self.send_request(api_name, next_api_args,
                                             enable_tunneling=enable_tunneling)
 
@@ -243,6 +242,39 @@ class NetAppCmodeClient(client_base.NetAppBaseClient):
         result.get_child_by_name('next-tag').set_content('')
         return result
 
+    def send_iter_request_records(self, api_name, api_args=None,
+                                  max_page_length=DEFAULT_MAX_PAGE_LENGTH,
+                                  enable_tunneling=True):
+        """Invoke an iterator-style getter API, yielding its records.
+
+        Unlike send_iter_request, the pages are not merged into a single
+        result. Records are yielded as soon as their page arrives, and a page
+        can be released once its records have been processed.
+        """
+
+        api_args = dict(api_args or {})
+        api_args['max-records'] = max_page_length
+
+        next_api_args = api_args
+        while True:
+            result = self.send_request(api_name, next_api_args,
+                                       enable_tunneling=enable_tunneling)
+
+            num_records = self._get_record_count(result)
+            attributes_list = result.get_child_by_name('attributes-list')
+            if num_records and not attributes_list:
+                msg = _('Missing attributes list for API %s.') % api_name
+                raise exception.NetAppException(msg)
+
+            if attributes_list:
+                for record in attributes_list.get_children():
+                    yield record
+
+            next_tag = result.get_child_content('next-tag')
+            if not next_tag:
+                return
+            next_api_args = dict(api_args, tag=next_tag)
+
     @na_utils.trace
     def create_vserver(self, vserver_name, root_volume_aggregate_name,
                        root_volume_name, aggregate_names, ipspace_name,
@@ -1667,11 +1699,7 @@ class NetAppCmodeClient(client_base.NetAppBaseClient):
         if desired_attributes:
             api_args['desired-attributes'] = desired_attributes
 
-        result = self.send_iter_request('aggr-get-iter', api_args)
-        if not self._has_records(result):
-            return []
-        else:
-            return result.get_child_by_name('attributes-list').get_children()
+        return list(self.send_iter_request_records('aggr-get-iter', api_args))
 
     def get_performance_instance_uuids(self, object_name, node_name):
         """Get UUIDs of performance instances for a cluster node."""
@@ -3718,6 +3746,111 @@ class NetAppCmodeClient(client_base.NetAppBaseClient):
         })
         return volume
 
+    @na_utils.trace
+    def get_volumes_ensure_info(self):
+        """Returns the state needed to ensure shares for all volumes.
+
+        A single iterator query is used for all volumes of the Vserver, so
+        callers don't have to query each volume separately.
+        """
+
+        api_args = {
+            'desired-attributes': {
+                'volume-attributes': {
+                    'volume-id-attributes': {
+                        'junction-path': None,
+                        'name': None,
+                    },
+                    'volume-export-attributes': {
+                        'policy': None,
+                    },
+                    'volume-snapshot-attributes': {
+                        'snapshot-policy': None,
+                        'snapdir-access-enabled': None,
+                    },
+                    'volume-space-attributes': {
+                        'is-space-reporting-logical': None,
+                    },
+                },
+            },
+        }
+        volumes = {}
+        for volume_attributes in self.send_iter_request_records(
+                'volume-get-iter', api_args):
+
+            volume_id_attributes = volume_attributes.get_child_by_name(
+                'volume-id-attributes') or netapp_api.NaElement('none')
+            volume_export_attributes = volume_attributes.get_child_by_name(
+                'volume-export-attributes') or netapp_api.NaElement('none')
+            volume_snapshot_attributes = volume_attributes.get_child_by_name(
+                'volume-snapshot-attributes') or netapp_api.NaElement('none')
+            volume_space_attributes = volume_attributes.get_child_by_name(
+                'volume-space-attributes') or netapp_api.NaElement('none')
+
+            name = volume_id_attributes.get_child_content('name')
+            volumes[name] = {
+                'name': name,
+                'junction-path': volume_id_attributes.get_child_content(
+                    'junction-path'),
+                'export-policy': volume_export_attributes.get_child_content(
+                    'policy'),
+                'snapshot-policy':
+                    volume_snapshot_attributes.get_child_content(
+                        'snapshot-policy'),
+                'snapdir-access-enabled':
+                    volume_snapshot_attributes.get_child_content(
+                        'snapdir-access-enabled'),
+                'is-space-reporting-logical':
+                    volume_space_attributes.get_child_content(
+                        'is-space-reporting-logical'),
+            }
+
+        return volumes
+
+    @na_utils.trace
+    def get_volumes_used_size(self, volume_name_pattern):
+        """Returns the used size in bytes of all volumes matching a pattern.
+
+        A single iterator query is used, so the number of API calls depends
+        on the number of result pages rather than on the number of volumes.
+        """
+
+        api_args = {
+            'query': {
+                'volume-attributes': {
+                    'volume-id-attributes': {
+                        'name': volume_name_pattern,
+                    },
+                },
+            },
+            'desired-attributes': {
+                'volume-attributes': {
+                    'volume-id-attributes': {
+                        'name': None,
+                    },
+                    'volume-space-attributes': {
+                        'size-used': None,
+                    },
+                },
+            },
+        }
+        used_sizes = {}
+        for volume_attributes in self.send_iter_request_records(
+                'volume-get-iter', api_args):
+
+            volume_id_attributes = volume_attributes.get_child_by_name(
+                'volume-id-attributes') or netapp_api.NaElement('none')
+            volume_space_attributes = volume_attributes.get_child_by_name(
+                'volume-space-attributes') or netapp_api.NaElement('none')
+
+            size_used = volume_space_attributes.get_child_content('size-used')
+            if size_used is None:
+                continue
+            used_sizes[volume_id_attributes.get_child_content('name')] = int(
+                size_used)
+
+        return used_sizes
+
     @na_utils.trace
     def get_volume_at_junction_path(self, junction_path):
         """Returns the volume with the specified junction path, if present."""
@@ -5892,7 +6025,10 @@ class NetAppCmodeClient(client_base.NetAppBaseClient):
                          source_vserver=None, source_volume=None,
                          dest_vserver=None, dest_volume=None,
                          desired_attributes=None):
-        """Gets one or more SnapMirror relationships."""
+        """Gets one or more SnapMirror relationships.
+
+        Returns an iterator over the snapmirror-info records.
+        """
 
         snapmirror_info = self._build_snapmirror_request(
             source_path, dest_path, source_vserver,
@@ -5905,11 +6041,7 @@ class NetAppCmodeClient(client_base.NetAppBaseClient):
         if desired_attributes:
             api_args['desired-attributes'] = desired_attributes
 
-        result = self.send_iter_request('snapmirror-get-iter', api_args)
-        if not self._has_records(result):
-            return []
-        else:
-            return result.get_child_by_name('attributes-list').get_children()
+        return self.send_iter_request_records('snapmirror-get-iter', api_args)
 
     @na_utils.trace
     def get_snapmirrors_svm(self, source_vserver=None, dest_vserver=None,
@@ -284,6 +284,9 @@ class NetAppCmodeMultiSvmShareDriver(driver.ShareDriver):
     def ensure_shares(self, context, shares):
         return self.library.ensure_shares(context, shares)
 
+    def update_share_usage_size(self, context, shares):
+        return self.library.update_share_usage_size(context, shares)
+
     def ensure_share_server(self, context, share_server, network_info):
         return self.library.ensure_share_server(
             context, share_server, network_info)
@@ -19,6 +19,7 @@ This library is the abstract base for subclasses that complete the
 single-SVM or multi-SVM functionality needed by the cDOT Manila drivers.
 """
 
+import collections
 import copy
 import datetime
 import json
@@ -26,6 +27,7 @@ import math
 import re
 import socket
 
+from eventlet import greenpool
 from oslo_config import cfg
 from oslo_log import log
 from oslo_service import loopingcall
@@ -1841,8 +1843,14 @@ class NetAppCmodeFileStorageLibrary(object):
                        cluster_client=None,
                        clear_current_export_policy=True,
                        ensure_share_already_exists=False, replica=False,
-                       share_host=None):
-        """Creates NAS storage."""
+                       share_host=None, volume=None, cache=None):
+        """Creates NAS storage.
+
+        :param volume: the volume state returned by get_volumes_ensure_info,
+            used to avoid querying the volume again.
+        :param cache: a dict shared by calls for shares of the same Vserver,
+            used to avoid querying its LIFs and aggregate home nodes again.
+        """
         share_name = self._get_backend_share_name(share['id'])
 
         if self._is_multi_protocol_share(share):
@@ -1851,8 +1859,9 @@ class NetAppCmodeFileStorageLibrary(object):
         else:
             protocols = [share['share_proto']]
 
-        interfaces = vserver_client.get_network_interfaces(
-            protocols=protocols)
+        interfaces = self._cached_call(
+            cache, ('interfaces',) + tuple(protocols),
+            vserver_client.get_network_interfaces, protocols=protocols)
 
         if not interfaces:
             msg = _('Cannot find network interfaces for Vserver %(vserver)s '
@@ -1864,7 +1873,8 @@ class NetAppCmodeFileStorageLibrary(object):
 
         # Get LIF addresses with metadata
         export_addresses = self._get_export_addresses_with_metadata(
-            share, share_server, interfaces, host, cluster_client)
+            share, share_server, interfaces, host, cluster_client,
+            cache=cache)
 
         # Create the share and get a callback for generating export locations
         pool = share_utils.extract_host(share['host'], level='pool')
@@ -1878,7 +1888,8 @@ class NetAppCmodeFileStorageLibrary(object):
                 clear_current_export_policy=clear_current_export_policy,
                 ensure_share_already_exists=ensure_share_already_exists,
                 replica=replica,
-                is_flexgroup=self._is_flexgroup_pool(pool))
+                is_flexgroup=self._is_flexgroup_pool(pool),
+                volume=volume)
 
             # Generate export locations using addresses, metadata and callback
             export_locations.extend([
@@ -1900,7 +1911,7 @@ class NetAppCmodeFileStorageLibrary(object):
     @na_utils.trace
     def _get_export_addresses_with_metadata(self, share, share_server,
                                             interfaces, share_host,
-                                            cluster_client=None):
+                                            cluster_client=None, cache=None):
         """Return interface addresses with locality and other metadata."""
 
         # Get home nodes so we can identify preferred paths
@@ -1908,12 +1919,15 @@ class NetAppCmodeFileStorageLibrary(object):
         home_node_set = set()
         if self._is_flexgroup_pool(pool):
             for aggregate_name in self._get_flexgroup_aggregate_list(pool):
-                home_node = self._get_aggregate_node(
-                    aggregate_name, cluster_client)
+                home_node = self._cached_call(
+                    cache, ('home-node', aggregate_name),
+                    self._get_aggregate_node, aggregate_name, cluster_client)
                 if home_node:
                     home_node_set.add(home_node)
         else:
-            home_node = self._get_aggregate_node(pool, cluster_client)
+            home_node = self._cached_call(
+                cache, ('home-node', pool),
+                self._get_aggregate_node, pool, cluster_client)
             if home_node:
                 home_node_set.add(home_node)
 
@@ -1936,6 +1950,15 @@ class NetAppCmodeFileStorageLibrary(object):
 
         return addresses
 
+    @staticmethod
+    def _cached_call(cache, key, func, *args, **kwargs):
+        """Return func(*args, **kwargs), memoized in cache if one is given."""
+        if cache is None:
+            return func(*args, **kwargs)
+        if key not in cache:
+            cache[key] = func(*args, **kwargs)
+        return cache[key]
+
     @na_utils.trace
     def _get_admin_addresses_for_share_server(self, share_server):
 
@@ -2659,10 +2682,15 @@ class NetAppCmodeFileStorageLibrary(object):
             raise exception.ShareResourceNotFound(share_id=share['id'])
 
     @na_utils.trace
-    def update_share(self, share, share_comment=None, share_server=None):
+    def update_share(self, share, share_comment=None, share_server=None,
+                     volume=None, cache=None):
         """Update a share: comment, qos settings, dedup and compression.
 
         Returns updated export locations info.
+
+        :param volume: the volume state returned by get_volumes_ensure_info,
+            used to avoid querying the volume again.
+        :param cache: a dict shared by calls for shares of the same Vserver.
         """
         vserver, vserver_client = self._get_vserver(share_server=share_server)
         share_name = self._get_backend_share_name(share['id'])
@@ -2676,8 +2704,12 @@ class NetAppCmodeFileStorageLibrary(object):
 
         # SAPCC Keep logical space reporting attributes while update share
         # SAPCC Keep efficiency attributes while update share
-        provisioning_options.update(
-            self._get_logical_space_options(vserver_client, share_name))
+        if volume is None:
+            provisioning_options.update(
+                self._get_logical_space_options(vserver_client, share_name))
+        else:
+            provisioning_options['logical_space_reporting'] = volume[
+                'is-space-reporting-logical']
         provisioning_options.update(
             self._get_efficiency_options(vserver_client, share_name))
 
@@ -2686,8 +2718,11 @@ class NetAppCmodeFileStorageLibrary(object):
         if qos_policy_group_name:
             provisioning_options['qos_policy_group'] = qos_policy_group_name
 
-        snapshot_attributes = vserver_client.get_volume_snapshot_attributes(
-            share_name)
+        if volume is None:
+            snapshot_attributes = (
+                vserver_client.get_volume_snapshot_attributes(share_name))
+        else:
+            snapshot_attributes = volume
         if (
             snapshot_attributes['snapshot-policy'].lower()
             in self.configuration.netapp_snapmirror_policy_exceptions
@@ -2736,17 +2771,23 @@ class NetAppCmodeFileStorageLibrary(object):
             # readable replicas (here and for _create_export() below),
             # because we trust that we only operate on share instances local
             # to the current host
-            existing_mount = vserver_client.get_volume_junction_path(
-                share_name, raise_on_not_found=False)
+            if volume is None:
+                existing_mount = vserver_client.get_volume_junction_path(
+                    share_name, raise_on_not_found=False)
+            else:
+                existing_mount = volume['junction-path']
 
             if not existing_mount:
                 vserver_client.mount_volume(share_name)
+                # The junction path has to be read again after mounting.
+                volume = None
 
         return self._create_export(share, share_server, vserver,
                                    vserver_client,
                                    clear_current_export_policy=False,
                                    ensure_share_already_exists=True,
-                                   replica=is_readable_replica)
+                                   replica=is_readable_replica,
+                                   volume=volume, cache=cache)
 
     def setup_server(self, network_info, metadata=None):
         raise NotImplementedError()
@@ -4254,16 +4295,84 @@ class NetAppCmodeFileStorageLibrary(object):
             'snapdir_visibility': snapdir_visibility,
         }
 
+    @na_utils.trace
+    def update_share_usage_size(self, context, shares):
+        """Gathers the used size of shares with a single volume query."""
+        if self._have_cluster_creds:
+            client = self._client
+        else:
+            client = self._get_vserver()[1]
+
+        used_sizes = client.get_volumes_used_size(
+            self._get_backend_share_name('*'))
+        gathered_at = timeutils.utcnow()
+
+        updates = []
+        for share in shares:
+            used_size = used_sizes.get(
+                self._get_backend_share_name(share['id']))
+            if used_size is None:
+                continue
+            updates.append({
+                'id': share['id'],
+                'used_size': float(used_size) / units.Gi,
+                'gathered_at': gathered_at,
+            })
+
+        return updates
+
     def ensure_shares(self, context, shares):
+        shares_by_server = collections.OrderedDict()
+        for share in shares:
+            share_server = share.get('share_server')
+            server_id = share_server['id'] if share_server else None
+            shares_by_server.setdefault(server_id, []).append(share)
+
+        # Shares are ensured per Vserver, so that the state of all their
+        # volumes can be read with a few bulk queries.
+        pool = greenpool.GreenPool(
+            self.configuration.netapp_ensure_shares_concurrency)
         updates = {}
+        for vserver_updates in pool.imap(self._ensure_vserver_shares,
+                                         shares_by_server.values()):
+            updates.update(vserver_updates)
 
+        return updates
+
+    def _ensure_vserver_shares(self, shares):
+        """Ensures shares that belong to the same share server."""
+        share_server = shares[0].get('share_server')
+        volumes = None
+        try:
+            vserver_client = self._get_vserver(share_server=share_server)[1]
+            volumes = vserver_client.get_volumes_ensure_info()
+        except (exception.NetAppException,
+                netapp_api.NaApiError) as e:
+            LOG.warning('Failed to read the state of volumes of share server '
+                        '%(server)s, ensuring its shares one by one: '
+                        '%(exception)s',
+                        {'server': share_server and share_server['id'],
+                         'exception': e.message})
+
+        cache = {}
+        updates = {}
         for share in shares:
-            share_server = share.get('share_server')
+            volume = None
+            if volumes is not None:
+                share_name = self._get_backend_share_name(share['id'])
+                volume = volumes.get(share_name)
+                if volume is None:
+                    LOG.debug('Failed to ensure share %(share)s: Could not '
+                              'find volume %(volume)s.',
+                              {'share': share['id'], 'volume': share_name})
+                    continue
             try:
                 updates[share['id']] = {
                     'export_locations': self.update_share(
                         share,
-                        share_server=share_server
+                        share_server=share_server,
+                        volume=volume,
+                        cache=cache
                     ),
                     'status': constants.STATUS_AVAILABLE
                 }
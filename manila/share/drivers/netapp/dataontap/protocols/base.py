@@ -72,7 +72,7 @@ class NetAppBaseHelper(object):
     def create_share(self, share, share_name,
                      clear_current_export_policy=True,
                      ensure_share_already_exists=False, replica=False,
-                     is_flexgroup=False):
+                     is_flexgroup=False, volume=None):
         """Creates NAS share."""
 
     @abc.abstractmethod
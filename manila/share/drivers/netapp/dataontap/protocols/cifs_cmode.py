@@ -31,7 +31,7 @@ class NetAppCmodeCIFSHelper(base.NetAppBaseHelper):
     def create_share(self, share, share_name,
                      clear_current_export_policy=True,
                      ensure_share_already_exists=False, replica=False,
-                     is_flexgroup=False):
+                     is_flexgroup=False, volume=None):
         """Creates CIFS share if does not exist on Data ONTAP Vserver.
 
         The new CIFS share has Everyone access, so it removes all access after
@@ -43,6 +43,7 @@ class NetAppCmodeCIFSHelper(base.NetAppBaseHelper):
         :param ensure_share_already_exists: ensures that CIFS share exists.
         :param replica: it is a replica volume (DP type).
         :param is_flexgroup: whether the share is a FlexGroup or not.
+        :param volume: ignored, NFS only.
         """
 
         cifs_exist = self._client.cifs_share_exists(share_name)
@@ -45,7 +45,7 @@ class NetAppCmodeNFSHelper(base.NetAppBaseHelper):
     def create_share(self, share, share_name,
                      clear_current_export_policy=True,
                      ensure_share_already_exists=False, replica=False,
-                     is_flexgroup=False):
+                     is_flexgroup=False, volume=None):
         """Ensures the share export policy is set correctly.
 
         The export policy must have the same name as the share. If it matches,
@@ -61,6 +61,8 @@ class NetAppCmodeNFSHelper(base.NetAppBaseHelper):
         :param ensure_share_already_exists: ignored, CIFS only.
         :param replica: it is a replica volume (DP type).
         :param is_flexgroup: whether the share is a FlexGroup or not.
+        :param volume: the already known volume state, with its export
+        policy and junction path, to avoid querying them again.
         """
         @utils.retry(retry_param=netapp_api.NaApiError, retries=5)
         def _get_volume_junction_path(share_name):
@@ -68,9 +70,14 @@ class NetAppCmodeNFSHelper(base.NetAppBaseHelper):
 
         if clear_current_export_policy:
             self._client.clear_nfs_export_policy_for_volume(share_name)
-        self._ensure_export_policy(share, share_name)
-
-        if is_flexgroup:
+            volume = None
+        if (volume is None or volume['export-policy'] !=
+                self._get_export_policy_name(share)):
+            self._ensure_export_policy(share, share_name)
+
+        if volume is not None and volume['junction-path']:
+            export_path = volume['junction-path']
+        elif is_flexgroup:
             volume_info = self._client.get_volume(share_name)
             export_path = volume_info['junction-path']
         else:
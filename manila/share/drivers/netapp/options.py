@@ -217,6 +217,13 @@ netapp_provisioning_opts = [
                default=2190,
                help='Create security certificate while creating vserver with '
                     'specified expire days.'),
+    cfg.IntOpt('netapp_ensure_shares_concurrency',
+               min=1,
+               default=1,
+               help='The number of Vservers whose shares are ensured '
+                    'concurrently when the share service starts. The state '
+                    'of all volumes of a Vserver is read with bulk queries '
+                    'before its shares are ensured.'),
 
 ]
 
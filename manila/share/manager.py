@@ -28,6 +28,7 @@ from operator import xor
 
 import os
 
+from eventlet import greenpool
 from oslo_config import cfg
 from oslo_log import log
 from oslo_serialization import jsonutils
@@ -66,6 +67,9 @@ profiler = importutils.try_import('osprofiler.profiler')
 
 LOG = log.getLogger(__name__)
 
+# Number of share servers ensured between two progress messages.
+ENSURE_PROGRESS_INTERVAL = 100
+
 share_manager_opts = [
     cfg.StrOpt('share_driver',
                default='manila.share.drivers.generic.GenericShareDriver',
@@ -140,10 +144,26 @@ share_manager_opts = [
                      'configured, this option must be set to False. '
                      'If set to False - gathering share usage size will be'
                      ' disabled.'),
+    cfg.IntOpt('share_usage_size_notification_batch_size',
+               default=0,
+               min=0,
+               help='The maximum number of shares whose usage size is sent '
+                    'in a single "share.consumed.size.batch" notification. '
+                    'If set to 0, a "share.consumed.size" notification is '
+                    'sent for each share.'),
     cfg.BoolOpt('share_service_inithost_offload',
                 default=False,
                 help='Offload pending share ensure during '
                      'share service startup'),
+    cfg.IntOpt('share_service_ensure_concurrency',
+               default=1,
+               min=1,
+               help='Maximum number of share servers, and of share '
+                    'instances if the driver cannot ensure them all at '
+                    'once, that the driver ensures at the same time when '
+                    'the share service ensures its resources. Values '
+                    'greater than 1 require the driver to support '
+                    'concurrent calls.'),
     cfg.IntOpt('force_delete_time',
                default=2,
                min=0,
@@ -475,8 +495,13 @@ class ShareManager(manager.SchedulerDependentManager):
                 {'host': self.host})
             return
 
+        watch = timeutils.StopWatch()
+        watch.start()
+        pool = greenpool.GreenPool(CONF.share_service_ensure_concurrency)
+
         share_servers = self.db.share_server_get_all_by_host(ctxt, self.host)
         LOG.debug("Re-exporting %s share servers", len(share_servers))
+        share_servers_to_ensure = []
         for share_server in share_servers:
             if share_server['status'] != constants.STATUS_ACTIVE:
                 LOG.info(
@@ -498,47 +523,41 @@ class ShareManager(manager.SchedulerDependentManager):
                          'reason': server_details.get('skip_ensure_comment')},
                     )
                     continue
-
-            share_network_subnet = self.db.share_network_subnet_get(
-                ctxt, share_server['share_network_subnet_id'])
-            share_network = self.db.share_network_get(
-                ctxt, share_network_subnet['share_network_id'])
-            network_allocations = (
-                self.db.network_allocations_get_for_share_server(
-                    ctxt, share_server['id'], label='user'))
-            # add missing gateways to net_allocation
-            for net_allocation in network_allocations:
-                if not net_allocation['gateway']:
-                    LOG.debug(
-                        ("Adding gateway %(gateway)s to net allocation "
-                         "%(net_allocation)s"),
-                        {'gateway': share_network_subnet['gateway'],
-                         'net_allocation': net_allocation['id']})
-                    self.db.network_allocation_update(
-                        ctxt, net_allocation['id'],
-                        {'gateway': share_network_subnet['gateway']})
-            network_info = self._form_server_setup_info(
-                ctxt, share_server, share_network, share_network_subnet)
-            server_info = self.driver.ensure_share_server(
-                ctxt, share_server, network_info)
-            if server_info:
-                LOG.debug(
-                    ("Adding server_info %(server_info)s to share server "
-                     "%(share_server)s"),
-                    {'server_info': server_info,
-                     'share_server': share_server['id']})
-                self.db.share_server_backend_details_set(
-                    ctxt, share_server['id'], server_info)
+            share_servers_to_ensure.append(share_server)
+
+        # The subnets and network allocations of the share servers are
+        # loaded with them, only their share networks remain to be fetched.
+        share_networks = {
+            share_network['id']: share_network
+            for share_network in self.db.share_network_get_all_by_ids(
+                ctxt, list(set(
+                    share_server['share_network_subnet']['share_network_id']
+                    for share_server in share_servers_to_ensure
+                    if share_server['share_network_subnet'])))
+        }
+        ensured_share_servers = [
+            pool.spawn(self._ensure_share_server, ctxt, share_server,
+                       share_networks)
+            for share_server in share_servers_to_ensure]
+        for count, ensured_share_server in enumerate(ensured_share_servers,
+                                                     1):
+            ensured_share_server.wait()
+            if (count % ENSURE_PROGRESS_INTERVAL == 0 or
+                    count == len(ensured_share_servers)):
+                LOG.info("Ensured %(count)d of %(total)d share servers of "
+                         "host %(host)s.",
+                         {'count': count,
+                          'total': len(ensured_share_servers),
+                          'host': self.host})
 
         share_instances = self.db.share_instances_get_all_by_host(
-            ctxt, self.host)
+            ctxt, self.host, with_share_data=True)
         LOG.debug("Re-exporting %s shares", len(share_instances))
+        share_servers_by_id = {share_server['id']: share_server
+                               for share_server in share_servers}
 
         for share_instance in share_instances:
-            try:
-                share_ref = self.db.share_get(ctxt, share_instance['share_id'])
-            except exception.NotFound:
-                continue
+            share_ref = share_instance['share']
 
             if share_ref.is_busy:
                 LOG.info(
@@ -567,15 +586,13 @@ class ShareManager(manager.SchedulerDependentManager):
                     )
                     continue
 
-            try:
-                share_instance = self.db.share_instance_get(
-                    ctxt, share_instance['id'], with_share_data=True)
-            except exception.NotFound:
-                continue
             share_instance_dict = self._get_share_instance_dict(
-                ctxt, share_instance)
+                ctxt, share_instance,
+                share_server=share_servers_by_id.get(
+                    share_instance['share_server_id']))
             update_share_instances.append(share_instance_dict)
 
+        ensured_share_instances = len(update_share_instances)
         if update_share_instances:
             try:
                 update_share_instances = self.driver.ensure_shares(
@@ -590,7 +607,9 @@ class ShareManager(manager.SchedulerDependentManager):
                             self._add_to_threadpool(self._ensure_share,
                                                     ctxt, share_instance)
                         else:
-                            self._ensure_share(ctxt, share_instance)
+                            pool.spawn_n(self._ensure_share, ctxt,
+                                         share_instance)
+                    pool.waitall()
 
         if new_backend_info:
             self.db.backend_info_update(
@@ -689,6 +708,50 @@ class ShareManager(manager.SchedulerDependentManager):
                             "access rules for snapshot instance %s.",
                             snap_instance['id'])
 
+        LOG.info("Ensured %(servers)d share servers and %(instances)d share "
+                 "instances of host %(host)s in %(elapsed).2f seconds.",
+                 {'servers': len(ensured_share_servers),
+                  'instances': ensured_share_instances,
+                  'host': self.host, 'elapsed': watch.elapsed()})
+
+    def _ensure_share_server(self, ctxt, share_server, share_networks):
+        share_network_subnet = share_server['share_network_subnet']
+        if share_network_subnet is None:
+            share_network_subnet = self.db.share_network_subnet_get(
+                ctxt, share_server['share_network_subnet_id'])
+        share_network = share_networks.get(
+            share_network_subnet['share_network_id'])
+        if share_network is None:
+            share_network = self.db.share_network_get(
+                ctxt, share_network_subnet['share_network_id'])
+        network_allocations = share_server['network_allocations']
+        # add missing gateways to net_allocation
+        for net_allocation in network_allocations:
+            if (net_allocation['label'] in (None, 'user') and
+                    not net_allocation['gateway']):
+                LOG.debug(
+                    ("Adding gateway %(gateway)s to net allocation "
+                     "%(net_allocation)s"),
+                    {'gateway': share_network_subnet['gateway'],
+                     'net_allocation': net_allocation['id']})
+                self.db.network_allocation_update(
+                    ctxt, net_allocation['id'],
+                    {'gateway': share_network_subnet['gateway']})
+                net_allocation['gateway'] = share_network_subnet['gateway']
+        network_info = self._form_server_setup_info(
+            ctxt, share_server, share_network, share_network_subnet,
+            network_allocations=network_allocations)
+        server_info = self.driver.ensure_share_server(
+            ctxt, share_server, network_info)
+        if server_info:
+            LOG.debug(
+                ("Adding server_info %(server_info)s to share server "
+                 "%(share_server)s"),
+                {'server_info': server_info,
+                 'share_server': share_server['id']})
+            self.db.share_server_backend_details_set(
+                ctxt, share_server['id'], server_info)
+
     def _ensure_share(self, ctxt, share_instance):
         export_locations = None
         try:
@@ -1710,8 +1773,14 @@ class ShareManager(manager.SchedulerDependentManager):
         share_server = self._get_share_server(context.elevated(),
                                               src_share_instance)
 
-        self._cast_access_rules_to_readonly(
-            context, src_share_instance, share_server)
+        precopy_passes = self.driver.configuration.safe_get(
+            'migration_precopy_passes') or 0
+
+        # NOTE: with pre-copy passes, the data service casts the access
+        # rules to read-only itself before copying the data a last time.
+        if not precopy_passes:
+            self._cast_access_rules_to_readonly(
+                context, src_share_instance, share_server)
 
         try:
             dest_share_instance = helper.create_instance_and_wait(
@@ -1746,7 +1815,7 @@ class ShareManager(manager.SchedulerDependentManager):
             data_rpc.migration_start(
                 context, share['id'], ignore_list, src_share_instance['id'],
                 dest_share_instance['id'], src_connection_info,
-                dest_connection_info)
+                dest_connection_info, precopy_passes=precopy_passes)
 
         except Exception:
             msg = _("Failed to obtain migration info from backends or"
@@ -2856,18 +2925,11 @@ class ShareManager(manager.SchedulerDependentManager):
     @utils.require_driver_initialized
     def periodic_share_replica_update(self, context):
         LOG.debug("Updating status of share replica instances.")
-        # we will need: id, host, replica_state, share_id
-        replicas = self.db.share_replicas_get_all(context,
-                                                  with_share_data=False,
-                                                  with_share_server=False)
-
-        # Filter only non-active replicas belonging to this backend
-        def qualified_replica(r):
-            return (share_utils.extract_host(r['host']) ==
-                    share_utils.extract_host(self.host) and
-                    r['replica_state'] != constants.REPLICA_STATE_ACTIVE)
-
-        replicas = list(filter(lambda x: qualified_replica(x), replicas))
+        # we will need: id, share_id
+        replicas = self.db.share_replicas_get_all_non_active_by_host(
+            context, share_utils.extract_host(self.host),
+            with_share_data=False, with_share_server=False)
+
         for replica in replicas:
             self._share_replica_update(
                 context, replica['id'], share_id=replica['share_id'])
@@ -4345,19 +4407,10 @@ class ShareManager(manager.SchedulerDependentManager):
         LOG.debug("Updating status of share replica snapshots.")
         transitional_statuses = (constants.STATUS_CREATING,
                                  constants.STATUS_DELETING)
-        # we will need: id, host, replica_state
-        replicas = self.db.share_replicas_get_all(context,
-                                                  with_share_data=False,
-                                                  with_share_server=False)
-
-        def qualified_replica(r):
-            # Filter non-active replicas belonging to this backend
-            return (share_utils.extract_host(r['host']) ==
-                    share_utils.extract_host(self.host) and
-                    r['replica_state'] != constants.REPLICA_STATE_ACTIVE)
-
-        host_replicas = list(filter(
-            lambda x: qualified_replica(x), replicas))
+        # we will need: id
+        host_replicas = self.db.share_replicas_get_all_non_active_by_host(
+            context, share_utils.extract_host(self.host),
+            with_share_data=False, with_share_server=False)
         transitional_replica_snapshots = []
 
         # Get snapshot instances for each replica that are in 'creating' or
@@ -4543,15 +4596,26 @@ class ShareManager(manager.SchedulerDependentManager):
         self._publish_service_capabilities(context)
 
     def _form_server_setup_info(self, context, share_server, share_network,
-                                share_network_subnet):
+                                share_network_subnet,
+                                network_allocations=None):
         share_server_id = share_server['id']
         # Network info is used by driver for setting up share server
         # and getting server info on share creation.
-        network_allocations = self.db.network_allocations_get_for_share_server(
-            context, share_server_id, label='user')
-        admin_network_allocations = (
-            self.db.network_allocations_get_for_share_server(
-                context, share_server_id, label='admin'))
+        if network_allocations is None:
+            network_allocations = (
+                self.db.network_allocations_get_for_share_server(
+                    context, share_server_id, label='user'))
+            admin_network_allocations = (
+                self.db.network_allocations_get_for_share_server(
+                    context, share_server_id, label='admin'))
+        else:
+            # All allocations of the share server were already loaded.
+            admin_network_allocations = [
+                allocation for allocation in network_allocations
+                if allocation['label'] == 'admin']
+            network_allocations = [
+                allocation for allocation in network_allocations
+                if allocation['label'] in (None, 'user')]
         # NOTE(vponomaryov): following network_info fields are deprecated:
         # 'segmentation_id', 'cidr' and 'network_type'.
         # And they should be used from network allocations directly.
@@ -5312,8 +5376,11 @@ class ShareManager(manager.SchedulerDependentManager):
         }
         return export_location_ref
 
-    def _get_share_instance_dict(self, context, share_instance):
+    def _get_share_instance_dict(self, context, share_instance,
+                                 share_server=None):
         # TODO(gouthamr): remove method when the db layer returns primitives
+        if share_server is None:
+            share_server = self._get_share_server(context, share_instance)
         share_instance_ref = {
             'id': share_instance.get('id'),
             'name': share_instance.get('name'),
@@ -5331,7 +5398,7 @@ class ShareManager(manager.SchedulerDependentManager):
             'updated_at': share_instance.get('updated_at'),
             'deleted_at': share_instance.get('deleted_at'),
             'created_at': share_instance.get('created_at'),
-            'share_server': self._get_share_server(context, share_instance),
+            'share_server': share_server,
             'access_rules_status': share_instance.get('access_rules_status'),
             # Share details
             'user_id': share_instance.get('user_id'),
@@ -5411,6 +5478,11 @@ class ShareManager(manager.SchedulerDependentManager):
             context, share, share_instance, event_suffix,
             extra_usage_info=extra_usage_info, host=self.host)
 
+    def _notify_about_shares_usage(self, context, shares_usage,
+                                   event_suffix):
+        share_utils.notify_about_shares_usage(
+            context, shares_usage, event_suffix, host=self.host)
+
     @periodic_task.periodic_task(
         spacing=CONF.share_usage_size_update_interval,
         enabled=CONF.enable_gathering_share_usage_size)
@@ -5428,13 +5500,31 @@ class ShareManager(manager.SchedulerDependentManager):
             except Exception:
                 LOG.exception("Gather share usage size failure.")
 
+        # The instances were loaded with their share data already.
+        share_instances_by_id = {si['id']: si for si in share_instances}
+        batch_size = CONF.share_usage_size_notification_batch_size
+        shares_usage = []
         for si in updated_share_instances:
-            share_instance = self._get_share_instance(context, si['id'])
-            share = self.db.share_get(context, share_instance['share_id'])
-            self._notify_about_share_usage(
-                context, share, share_instance, "consumed.size",
-                extra_usage_info={'used_size': si['used_size'],
-                                  'gathered_at': si['gathered_at']})
+            share_instance = share_instances_by_id.get(si['id'])
+            if share_instance is None:
+                share_instance = self._get_share_instance(context, si['id'])
+            share = share_instance['share']
+            extra_usage_info = {'used_size': si['used_size'],
+                                'gathered_at': si['gathered_at']}
+            if not batch_size:
+                self._notify_about_share_usage(
+                    context, share, share_instance, "consumed.size",
+                    extra_usage_info=extra_usage_info)
+                continue
+            shares_usage.append((share, share_instance, extra_usage_info))
+            if len(shares_usage) >= batch_size:
+                self._notify_about_shares_usage(
+                    context, shares_usage, "consumed.size.batch")
+                shares_usage = []
+
+        if shares_usage:
+            self._notify_about_shares_usage(
+                context, shares_usage, "consumed.size.batch")
 
     @periodic_task.periodic_task(spacing=CONF.periodic_interval)
     @utils.require_driver_initialized
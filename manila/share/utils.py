@@ -127,6 +127,28 @@ def notify_about_share_usage(context, share, share_instance,
                                          usage_info)
 
 
+@utils.if_notifications_enabled
+def notify_about_shares_usage(context, shares_usage, event_suffix, host=None):
+    """Sends a single notification with the usage of several shares.
+
+    :param shares_usage: a list of (share, share_instance, extra_usage_info)
+        tuples.
+    """
+    if not host:
+        host = CONF.host
+
+    usage_info = {
+        'shares': [
+            _usage_from_share(share, share_instance,
+                              **(extra_usage_info or {}))
+            for share, share_instance, extra_usage_info in shares_usage
+        ],
+    }
+
+    rpc.get_notifier("share", host).info(context, 'share.%s' % event_suffix,
+                                         usage_info)
+
+
 def _usage_from_share(share_ref, share_instance_ref, **extra_usage_info):
 
     usage_info = {
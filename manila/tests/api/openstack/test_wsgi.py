@@ -14,6 +14,7 @@ import inspect
 from unittest import mock
 
 import ddt
+from oslo_serialization import jsonutils
 import webob
 
 from manila.api.openstack import api_version_request as api_version
@@ -264,6 +265,37 @@ class JSONDictSerializerTest(test.TestCase):
             ' '.encode("utf-8"), ''.encode("utf-8"))
         self.assertEqual(expected_json, result)
 
+    def test_json_streamed(self):
+        input_dict = {'servers': (dict(id=i) for i in range(3)),
+                      'servers_links': [{'rel': 'next'}]}
+        expected_json = ('{"servers":[{"id":0},{"id":1},{"id":2}],'
+                         '"servers_links":[{"rel":"next"}]}').encode("utf-8")
+        serializer = wsgi.JSONDictSerializer()
+        result = serializer.serialize(input_dict)
+        result = result.replace(' '.encode("utf-8"), ''.encode("utf-8"))
+        self.assertEqual(expected_json, result)
+
+    def test_serialize_iter(self):
+        items = [{'id': 'fake_id_%s' % i, 'name': 'x' * 50}
+                 for i in range(100)]
+        input_dict = {'servers': (item for item in items), 'count': 100}
+        serializer = wsgi.JSONDictSerializer()
+        serializer.chunk_size = 512
+
+        chunks = list(serializer.serialize_iter(input_dict))
+
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual({'servers': items, 'count': 100},
+                         jsonutils.loads(b''.join(chunks)))
+
+    def test_serialize_iter_empty(self):
+        serializer = wsgi.JSONDictSerializer()
+
+        chunks = list(serializer.serialize_iter(
+            {'servers': (i for i in [])}))
+
+        self.assertEqual([b'{"servers": []}'], chunks)
+
 
 class TextDeserializerTest(test.TestCase):
     def test_dispatch_default(self):
@@ -950,6 +982,18 @@ class ResponseObjectTest(test.TestCase):
             self.assertEqual(202, response.status_int)
             self.assertEqual(mtype.encode("utf-8"), response.body)
 
+    def test_serialize_streamed(self):
+        robj = wsgi.ResponseObject(
+            {'servers': (dict(id=i) for i in range(2))})
+        request = wsgi.Request.blank('/tests/123')
+
+        response = robj.serialize(request, 'application/json',
+                                  {'json': wsgi.JSONDictSerializer})
+
+        self.assertIsNone(response.content_length)
+        self.assertEqual({'servers': [{'id': 0}, {'id': 1}]},
+                         jsonutils.loads(response.body))
+
 
 class ValidBodyTest(test.TestCase):
 
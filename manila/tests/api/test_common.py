@@ -20,6 +20,7 @@ Test suites for 'common' code used throughout the OpenStack HTTP API.
 from unittest import mock
 
 import ddt
+from six.moves.urllib import parse
 import webob
 import webob.exc
 
@@ -193,6 +194,24 @@ class PaginationParamsTest(test.TestCase):
         self.assertEqual({'marker': marker, 'limit': 20},
                          common.get_pagination_params(req))
 
+    def test_get_limit_offset_marker_defaults(self):
+        """Test limit defaults to max limit and others to None."""
+        req = webob.Request.blank('/')
+        self.assertEqual((1000, None, None),
+                         common.get_limit_offset_marker(req))
+
+    def test_get_limit_offset_marker_zero_limit(self):
+        """Test zero limit is replaced with the max limit."""
+        req = webob.Request.blank('/?limit=0&offset=3&marker=fake')
+        self.assertEqual((10, 3, 'fake'),
+                         common.get_limit_offset_marker(req, max_limit=10))
+
+    def test_get_limit_offset_marker_invalid_offset(self):
+        """Test invalid offset param."""
+        req = webob.Request.blank('/?offset=-1')
+        self.assertRaises(
+            webob.exc.HTTPBadRequest, common.get_limit_offset_marker, req)
+
 
 @ddt.ddt
 class MiscFunctionsTest(test.TestCase):
@@ -361,6 +380,18 @@ class ViewBuilderTest(test.TestCase):
         self.fake_resource = db_fakes.FakeModel(self.expected_resource_dict)
         self.view_builder = fakes.FakeResourceViewBuilder()
 
+    def test_get_collection_links_drops_offset(self):
+        req = fakes.HTTPRequest.blank('/fake?limit=2&offset=10&name=foo')
+        items = [{'id': 'fake_id_1'}, {'id': 'fake_id_2'}]
+
+        links = self.view_builder._get_collection_links(req, items)
+
+        self.assertEqual(1, len(links))
+        self.assertEqual('next', links[0]['rel'])
+        params = parse.parse_qs(parse.urlsplit(links[0]['href']).query)
+        self.assertEqual({'limit': ['2'], 'name': ['foo'],
+                          'marker': ['fake_id_2']}, params)
+
     @ddt.data('1.0', '1.40')
     def test_versioned_method_no_updates(self, version):
         req = fakes.HTTPRequest.blank('/my_resource', version=version)
@@ -693,7 +693,7 @@ class ShareAPITest(test.TestCase):
             {'id': 'id3', 'display_name': 'n3'},
         ]
         self.mock_object(share_api.API, 'get_all',
-                         mock.Mock(return_value=shares))
+                         mock.Mock(return_value=shares[1:2]))
 
         result = self.controller.index(req)
 
@@ -707,6 +707,8 @@ class ShareAPITest(test.TestCase):
             'metadata': {'k1': 'v1'},
             'extra_specs': {'k2': 'v2'},
             'is_public': 'False',
+            'limit': 1,
+            'offset': 1,
         }
         if use_admin_context:
             search_opts_expected.update({'fake_key': 'fake_value'})
@@ -716,6 +718,7 @@ class ShareAPITest(test.TestCase):
             sort_key=search_opts['sort_key'],
             sort_dir=search_opts['sort_dir'],
             search_opts=search_opts_expected,
+            detailed=False,
         )
         self.assertEqual(1, len(result['shares']))
         self.assertEqual(shares[1]['id'], result['shares'][0]['id'])
@@ -791,7 +794,7 @@ class ShareAPITest(test.TestCase):
             {'id': 'id3', 'display_name': 'n3'},
         ]
         self.mock_object(share_api.API, 'get_all',
-                         mock.Mock(return_value=shares))
+                         mock.Mock(return_value=shares[1:2]))
 
         result = self.controller.detail(req)
 
@@ -805,6 +808,8 @@ class ShareAPITest(test.TestCase):
             'metadata': {'k1': 'v1'},
             'extra_specs': {'k2': 'v2'},
             'is_public': 'False',
+            'limit': 1,
+            'offset': 1,
         }
         if use_admin_context:
             search_opts_expected.update({'fake_key': 'fake_value'})
@@ -814,6 +819,7 @@ class ShareAPITest(test.TestCase):
             sort_key=search_opts['sort_key'],
             sort_dir=search_opts['sort_dir'],
             search_opts=search_opts_expected,
+            detailed=True,
         )
         self.assertEqual(1, len(result['shares']))
         self.assertEqual(shares[1]['id'], result['shares'][0]['id'])
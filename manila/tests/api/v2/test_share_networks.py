@@ -564,7 +564,8 @@ class ShareNetworkAPITest(test.TestCase):
             result = self.controller.index(self.req)
 
             db_api.share_network_get_all_by_filter.assert_called_once_with(
-                self.context, filters={})
+                self.context, filters={}, limit=1000, offset=None,
+                marker=None)
 
             self.assertEqual(1, len(result[share_networks.RESOURCES_NAME]))
             self._check_share_network_view_shortened(
@@ -580,7 +581,8 @@ class ShareNetworkAPITest(test.TestCase):
             result = self.controller.detail(self.req)
 
             db_api.share_network_get_all_by_filter.assert_called_once_with(
-                self.context, filters={})
+                self.context, filters={}, limit=1000, offset=None,
+                marker=None)
 
             self.assertEqual(1, len(result[share_networks.RESOURCES_NAME]))
             self._check_share_network_view(
@@ -598,7 +600,8 @@ class ShareNetworkAPITest(test.TestCase):
         filters = {'security_service_id': 'fake-ss-id'}
         (db_api.share_network_get_all_by_filter.
             assert_called_once_with(req.environ['manila.context'],
-                                    filters=filters))
+                                    filters=filters, limit=1000,
+                                    offset=None, marker=None))
         self.assertEqual(1, len(result[share_networks.RESOURCES_NAME]))
         self._check_share_network_view_shortened(
             result[share_networks.RESOURCES_NAME][0],
@@ -612,7 +615,7 @@ class ShareNetworkAPITest(test.TestCase):
         db_api.share_network_get_all_by_filter.return_value = []
         self.controller.index(req)
         db_api.share_network_get_all_by_filter.assert_called_with(
-            fake_context, filters={})
+            fake_context, filters={}, limit=1000, offset=None, marker=None)
 
     @mock.patch.object(db_api, 'share_network_get_all_by_filter', mock.Mock())
     def test_index_all_tenants_admin_context(self):
@@ -623,7 +626,8 @@ class ShareNetworkAPITest(test.TestCase):
             use_admin_context=True)
         result = self.controller.index(req)
         db_api.share_network_get_all_by_filter.assert_called_once_with(
-            req.environ['manila.context'], filters={})
+            req.environ['manila.context'], filters={}, limit=1000,
+            offset=None, marker=None)
         self.assertEqual(1, len(result[share_networks.RESOURCES_NAME]))
         self._check_share_network_view_shortened(
             result[share_networks.RESOURCES_NAME][0],
@@ -653,7 +657,8 @@ class ShareNetworkAPITest(test.TestCase):
             fake_share_network_shortened)
         filters = {'project_id': 'fake'}
         db_api.share_network_get_all_by_filter.assert_called_once_with(
-            req.environ['manila.context'], filters=filters)
+            req.environ['manila.context'], filters=filters, limit=1000,
+            offset=None, marker=None)
 
     @mock.patch.object(db_api, 'share_network_get_all_by_filter', mock.Mock())
     def test_index_filter_by_project_id_non_admin_context(self):
@@ -663,7 +668,7 @@ class ShareNetworkAPITest(test.TestCase):
         db_api.share_network_get_all_by_filter.return_value = []
         self.controller.index(req)
         db_api.share_network_get_all_by_filter.assert_called_with(
-            fake_context, filters={})
+            fake_context, filters={}, limit=1000, offset=None, marker=None)
 
     @mock.patch.object(db_api, 'share_network_get_all_by_filter', mock.Mock())
     def test_index_filter_by_project_id_admin_context(self):
@@ -676,7 +681,8 @@ class ShareNetworkAPITest(test.TestCase):
         result = self.controller.index(req)
         filters = {'project_id': 'fake'}
         db_api.share_network_get_all_by_filter.assert_called_once_with(
-            req.environ['manila.context'], filters=filters)
+            req.environ['manila.context'], filters=filters, limit=1000,
+            offset=None, marker=None)
         self.assertEqual(1, len(result[share_networks.RESOURCES_NAME]))
         self._check_share_network_view_shortened(
             result[share_networks.RESOURCES_NAME][0],
@@ -695,7 +701,8 @@ class ShareNetworkAPITest(test.TestCase):
         filters = {'project_id': 'fake',
                    'security_service_id': 'fake-ss-id'}
         db_api.share_network_get_all_by_filter.assert_called_once_with(
-            req.environ['manila.context'], filters=filters)
+            req.environ['manila.context'], filters=filters, limit=1000,
+            offset=None, marker=None)
         self.assertEqual(1, len(result[share_networks.RESOURCES_NAME]))
         self._check_share_network_view_shortened(
             result[share_networks.RESOURCES_NAME][0],
@@ -721,6 +728,8 @@ class ShareNetworkAPITest(test.TestCase):
             use_admin_context=True, version='2.36')
         result = self.controller.index(req)
         filters = {'project_id': self.context.project_id}
+        filters.update((k, v) for k, v in parse.parse_qsl(filter)
+                       if k.endswith('~'))
         db_api.share_network_get_all_by_filter.assert_called_with(
             req.environ['manila.context'], filters=filters)
         self.assertEqual(share_network_number,
@@ -186,7 +186,7 @@ class ShareReplicasApiTest(test.TestCase):
             id="fake_id2")
         self.mock_object(
             share_replicas.db, 'share_replicas_get_all',
-            mock.Mock(return_value=[fake_replica_1, fake_replica_2]))
+            mock.Mock(return_value=[fake_replica_1]))
         req = fakes.HTTPRequest.blank('/share-replicas?limit=1',
                                       version=self.api_version,
                                       experimental=True)
@@ -196,6 +196,8 @@ class ShareReplicasApiTest(test.TestCase):
 
         self.assertEqual(1, len(res_dict['share_replicas']))
         self.assertEqual([expected_replica_1], res_dict['share_replicas'])
+        share_replicas.db.share_replicas_get_all.assert_called_once_with(
+            req_context, limit=1, offset=None, marker=None)
         self.mock_policy_check.assert_called_once_with(
             req_context, self.resource_name, 'get_all')
 
@@ -205,7 +207,7 @@ class ShareReplicasApiTest(test.TestCase):
             id="fake_id2")
         self.mock_object(
             share_replicas.db, 'share_replicas_get_all',
-            mock.Mock(return_value=[fake_replica_1, fake_replica_2]))
+            mock.Mock(return_value=[fake_replica_2]))
         req = fakes.HTTPRequest.blank(
             '/share-replicas/detail?limit=1&offset=1',
             version=self.api_version, experimental=True)
@@ -215,6 +217,8 @@ class ShareReplicasApiTest(test.TestCase):
 
         self.assertEqual(1, len(res_dict['share_replicas']))
         self.assertEqual([expected_replica_2], res_dict['share_replicas'])
+        share_replicas.db.share_replicas_get_all.assert_called_once_with(
+            req_context, limit=1, offset=1, marker=None)
         self.mock_policy_check.assert_called_once_with(
             req_context, self.resource_name, 'get_all')
 
@@ -257,7 +261,7 @@ class ShareReplicasApiTest(test.TestCase):
             id="fake_id2")
         self.mock_object(
             share_replicas.db, 'share_replicas_get_all_by_share',
-            mock.Mock(return_value=[fake_replica_1, fake_replica_2]))
+            mock.Mock(return_value=[fake_replica_1]))
         req = fakes.HTTPRequest.blank(
             '/share-replicas?share_id=FAKE_SHARE_ID&limit=1',
             version=self.api_version, experimental=True)
@@ -267,6 +271,9 @@ class ShareReplicasApiTest(test.TestCase):
 
         self.assertEqual(1, len(res_dict['share_replicas']))
         self.assertEqual([expected_replica_1], res_dict['share_replicas'])
+        mock_get_all = share_replicas.db.share_replicas_get_all_by_share
+        mock_get_all.assert_called_once_with(
+            req_context, 'FAKE_SHARE_ID', limit=1, offset=None, marker=None)
         self.mock_policy_check.assert_called_once_with(
             req_context, self.resource_name, 'get_all')
 
@@ -276,7 +283,7 @@ class ShareReplicasApiTest(test.TestCase):
             id="fake_id2")
         self.mock_object(
             share_replicas.db, 'share_replicas_get_all_by_share',
-            mock.Mock(return_value=[fake_replica_1, fake_replica_2]))
+            mock.Mock(return_value=[fake_replica_2]))
         req = fakes.HTTPRequest.blank(
             '/share-replicas?share_id=FAKE_SHARE_ID&limit=1&offset=1',
             version=self.api_version, experimental=True)
@@ -286,6 +293,9 @@ class ShareReplicasApiTest(test.TestCase):
 
         self.assertEqual(1, len(res_dict['share_replicas']))
         self.assertEqual([expected_replica_2], res_dict['share_replicas'])
+        mock_get_all = share_replicas.db.share_replicas_get_all_by_share
+        mock_get_all.assert_called_once_with(
+            req_context, 'FAKE_SHARE_ID', limit=1, offset=1, marker=None)
         self.mock_policy_check.assert_called_once_with(
             req_context, self.resource_name, 'get_all')
 
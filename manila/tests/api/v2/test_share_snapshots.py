@@ -237,6 +237,7 @@ class ShareSnapshotAPITest(test.TestCase):
             sort_key=search_opts['sort_key'],
             sort_dir=search_opts['sort_dir'],
             search_opts=search_opts_expected,
+            marker=None,
         )
         self.assertEqual(1, len(result['snapshots']))
         self.assertEqual(db_snapshots[1]['id'], result['snapshots'][0]['id'])
@@ -308,6 +309,7 @@ class ShareSnapshotAPITest(test.TestCase):
             sort_key=search_opts['sort_key'],
             sort_dir=search_opts['sort_dir'],
             search_opts=search_opts_expected,
+            marker=None,
         )
         self.assertEqual(1, len(result['snapshots']))
         self.assertEqual(db_snapshots[1]['id'], result['snapshots'][0]['id'])
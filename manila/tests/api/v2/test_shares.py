@@ -1646,12 +1646,12 @@ class ShareAPITest(test.TestCase):
             {'id': 'id3', 'display_name': 'n3'},
         ]
 
-        mock_action = {'return_value': shares}
+        mock_action = {'return_value': shares[1:2]}
         if (api_version.APIVersionRequest(version) >=
                 api_version.APIVersionRequest('2.42')):
             search_opts.update({'with_count': 'true'})
             method = 'get_all_with_count'
-            mock_action = {'side_effect': [(1, shares)]}
+            mock_action = {'side_effect': [(1, shares[1:2])]}
         if use_admin_context:
             search_opts['host'] = 'fake_host'
         # fake_key should be filtered for non-admin
@@ -1676,6 +1676,8 @@ class ShareAPITest(test.TestCase):
             'metadata': {'k1': 'v1'},
             'extra_specs': {'k2': 'v2'},
             'is_public': 'False',
+            'limit': 1,
+            'offset': 1,
         }
         if (api_version.APIVersionRequest(version) >=
                 api_version.APIVersionRequest('2.35')):
@@ -1697,6 +1699,7 @@ class ShareAPITest(test.TestCase):
             sort_key=search_opts['sort_key'],
             sort_dir=search_opts['sort_dir'],
             search_opts=search_opts_expected,
+            detailed=False,
         )
         self.assertEqual(1, len(result['shares']))
         self.assertEqual(shares[1]['id'], result['shares'][0]['id'])
@@ -1731,7 +1734,7 @@ class ShareAPITest(test.TestCase):
 
         result = self.controller.index(req)
 
-        search_opts_expected = {}
+        search_opts_expected = {'limit': 1000}
 
         if use_admin_context:
             search_opts_expected.update({'fake_key': 'fake_value'})
@@ -1741,6 +1744,7 @@ class ShareAPITest(test.TestCase):
             sort_key=search_opts['sort_key'],
             sort_dir=search_opts['sort_dir'],
             search_opts=search_opts_expected,
+            detailed=False,
         )
         self.assertEqual(0, len(result['shares']))
         self.assertEqual(0, result['count'])
@@ -1814,12 +1818,12 @@ class ShareAPITest(test.TestCase):
         ]
 
         method = 'get_all'
-        mock_action = {'return_value': shares}
+        mock_action = {'return_value': shares[1:2]}
         if (api_version.APIVersionRequest(version) >=
                 api_version.APIVersionRequest('2.42')):
             search_opts.update({'with_count': 'true'})
             method = 'get_all_with_count'
-            mock_action = {'side_effect': [(1, shares)]}
+            mock_action = {'side_effect': [(1, shares[1:2])]}
         if use_admin_context:
             search_opts['host'] = 'fake_host'
         # fake_key should be filtered for non-admin
@@ -1844,6 +1848,8 @@ class ShareAPITest(test.TestCase):
             'metadata': {'k1': 'v1'},
             'extra_specs': {'k2': 'v2'},
             'is_public': 'False',
+            'limit': 1,
+            'offset': 1,
         }
         if (api_version.APIVersionRequest(version) >=
                 api_version.APIVersionRequest('2.35')):
@@ -1860,6 +1866,7 @@ class ShareAPITest(test.TestCase):
             sort_key=search_opts['sort_key'],
             sort_dir=search_opts['sort_dir'],
             search_opts=search_opts_expected,
+            detailed=True,
         )
         self.assertEqual(1, len(result['shares']))
         self.assertEqual(shares[1]['id'], result['shares'][0]['id'])
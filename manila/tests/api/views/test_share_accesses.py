@@ -13,6 +13,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import types
 from unittest import mock
 
 import ddt
@@ -83,6 +84,19 @@ class ViewBuilderTestCase(test.TestCase):
 
         self.assertEqual({'access_list': accesses}, result)
 
+    def test_list_view_streamed(self):
+        self.flags(osapi_stream_list_responses=True)
+        req = fakes.HTTPRequest.blank('/shares', version="2.45")
+        self.mock_object(api.API, 'get',
+                         mock.Mock(return_value=self.fake_share))
+        accesses = [self.fake_access, ]
+
+        result = self.builder.list_view(req, accesses)
+        self._delete_unsupport_key("2.45")
+
+        self.assertIsInstance(result['access_list'], types.GeneratorType)
+        self.assertEqual(accesses, list(result['access_list']))
+
     def _delete_unsupport_key(self, version, support_share_id=False):
         if (api_version.APIVersionRequest(version) <
                 api_version.APIVersionRequest("2.21")):
@@ -14,6 +14,8 @@
 #    under the License.
 
 import copy
+import types
+
 import ddt
 
 from manila.api.views import shares
@@ -112,3 +114,18 @@ class ViewBuilderTestCase(test.TestCase):
             expected['status'] = new_share_status
 
         self.assertSubDictMatch(expected, result['share'])
+
+    @ddt.data(True, False)
+    def test_detail_list(self, stream):
+        self.flags(osapi_stream_list_responses=stream)
+        req = fakes.HTTPRequest.blank('/shares?limit=1', version='2.54')
+
+        result = self.builder.detail_list(req, [self.fake_share], count=1)
+
+        self.assertEqual(1, result['count'])
+        self.assertEqual('next', result['shares_links'][0]['rel'])
+        self.assertEqual(stream, isinstance(result['shares'],
+                                            types.GeneratorType))
+        shares_list = list(result['shares'])
+        self.assertEqual(1, len(shares_list))
+        self.assertEqual(self.fake_share['id'], shares_list[0]['id'])
@@ -179,6 +179,33 @@ class DataServiceHelperTestCase(test.TestCase):
         self.helper._change_data_access_to_instance.assert_called_once_with(
             self.share_instance['id'], [self.access], deny=True)
 
+    def test_cast_access_rules_to_readonly(self):
+
+        # mocks
+        self.mock_object(db, 'share_instance_update')
+        self.mock_object(self.helper.access_helper,
+                         'get_and_update_share_instance_access_rules')
+        self.mock_object(self.helper, '_change_data_access_to_instance')
+
+        # run
+        self.helper.cast_access_rules_to_readonly(self.share_instance)
+
+        # asserts
+        db.share_instance_update.assert_called_once_with(
+            self.context, self.share_instance['id'],
+            {'cast_rules_to_readonly': True})
+        (self.helper.access_helper.get_and_update_share_instance_access_rules.
+            assert_called_once_with(
+                self.context, share_instance_id=self.share_instance['id'],
+                conditionally_change={
+                    constants.ACCESS_STATE_APPLYING:
+                        constants.ACCESS_STATE_QUEUED_TO_APPLY,
+                    constants.ACCESS_STATE_ACTIVE:
+                        constants.ACCESS_STATE_QUEUED_TO_APPLY,
+                }))
+        self.helper._change_data_access_to_instance.assert_called_once_with(
+            self.share_instance)
+
     @ddt.data(None, Exception('fake'))
     def test_cleanup_data_access(self, exc):
 
@@ -16,9 +16,14 @@
 Tests For Data Manager
 """
 
+import json
+import os
+import shutil
+import tempfile
 from unittest import mock
 
 import ddt
+from oslo_utils import units
 
 from manila.common import constants
 from manila import context
@@ -49,6 +54,17 @@ class DataManagerTestCase(test.TestCase):
         manager = self.manager
         self.assertIsNotNone(manager)
 
+    def test_init_limits(self):
+        self.flags(data_copy_engine='parallel', data_copy_workers=4,
+                   data_copy_max_jobs=3, data_copy_max_bandwidth=10)
+        self.mock_object(manager.tpool, 'set_num_threads')
+
+        data_manager = manager.DataManager()
+
+        manager.tpool.set_num_threads.assert_called_once_with(12)
+        self.assertEqual(3, data_manager.copy_jobs.balance)
+        self.assertEqual(10 * units.Mi, data_manager.throttle.rate)
+
     @ddt.data(constants.TASK_STATE_DATA_COPYING_COMPLETING,
               constants.TASK_STATE_DATA_COPYING_STARTING,
               constants.TASK_STATE_DATA_COPYING_IN_PROGRESS)
@@ -73,6 +89,108 @@ class DataManagerTestCase(test.TestCase):
             utils.IsAMatcher(context.RequestContext), share['id'],
             {'task_state': constants.TASK_STATE_DATA_COPYING_ERROR})
 
+    def _set_checkpoint_dir(self):
+        checkpoint_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, checkpoint_dir)
+        self.flags(data_copy_engine='parallel',
+                   data_copy_checkpoint_dir=checkpoint_dir)
+        return checkpoint_dir
+
+    def _fake_job(self, **kwargs):
+        job = {
+            'share_id': self.share['id'],
+            'ignore_list': ['lost+found'],
+            'share_instance_id': 'ins1_id',
+            'dest_share_instance_id': 'ins2_id',
+            'connection_info_src': {'unmount': 'unmount_src'},
+            'connection_info_dest': {'unmount': 'unmount_dest'},
+            'precopy_passes': 0,
+        }
+        job.update(kwargs)
+        return job
+
+    def test_init_host_resume(self):
+        checkpoint_dir = self._set_checkpoint_dir()
+        share = db_utils.create_share(
+            task_state=constants.TASK_STATE_DATA_COPYING_IN_PROGRESS)
+        job = self._fake_job(share_id=share['id'])
+        with open(os.path.join(checkpoint_dir, share['id'] + '.json'),
+                  'w') as f:
+            json.dump(job, f)
+        self.mock_object(db, 'share_get_all', mock.Mock(
+            return_value=[share]))
+        self.mock_object(db, 'share_update')
+        self.mock_object(manager.greenthread, 'spawn_n')
+
+        self.manager.init_host()
+
+        manager.greenthread.spawn_n.assert_called_once_with(
+            self.manager._resume_copy_job,
+            utils.IsAMatcher(context.RequestContext), job)
+        db.share_update.assert_not_called()
+
+    def test__resume_copy_job(self):
+        job = self._fake_job()
+        self.mock_object(db, 'share_get', mock.Mock(return_value=self.share))
+        self.mock_object(helper.DataServiceHelper,
+                         'cleanup_unmount_temp_folder')
+        self.mock_object(self.manager, 'migration_start', mock.Mock(
+            side_effect=exception.ShareDataCopyFailed(reason='fake')))
+
+        self.manager._resume_copy_job(self.context, job)
+
+        helper.DataServiceHelper.cleanup_unmount_temp_folder.assert_has_calls(
+            [mock.call('unmount_src', '/tmp/', 'ins1_id'),
+             mock.call('unmount_dest', '/tmp/', 'ins2_id')])
+        self.manager.migration_start.assert_called_once_with(
+            self.context, ['lost+found'], self.share['id'], 'ins1_id',
+            'ins2_id', {'unmount': 'unmount_src'},
+            {'unmount': 'unmount_dest'}, precopy_passes=0)
+
+    @ddt.data(True, False)
+    def test__prepare_copy_job(self, same_destination):
+        checkpoint_dir = self._set_checkpoint_dir()
+        job = self._fake_job()
+        checkpoint = os.path.join(checkpoint_dir,
+                                  self.share['id'] + '.checkpoint')
+        self.manager._save_copy_job(self._fake_job(
+            dest_share_instance_id=(
+                'ins2_id' if same_destination else 'other_id')))
+        with open(checkpoint, 'w') as f:
+            f.write('["file1", 1, 1]\n')
+
+        result = self.manager._prepare_copy_job(
+            job['share_id'], job['ignore_list'], job['share_instance_id'],
+            job['dest_share_instance_id'], job['connection_info_src'],
+            job['connection_info_dest'], job['precopy_passes'])
+
+        self.assertEqual(checkpoint, result)
+        self.assertEqual(job, self.manager._load_copy_job(self.share['id']))
+        self.assertEqual(same_destination, os.path.exists(checkpoint))
+
+    def test__prepare_copy_job_disabled(self):
+        self.flags(data_copy_engine='parallel')
+
+        self.assertIsNone(self.manager._prepare_copy_job(
+            self.share['id'], [], 'ins1_id', 'ins2_id', {}, {}))
+
+    def test_migration_start_removes_copy_job(self):
+        checkpoint_dir = self._set_checkpoint_dir()
+        self.mock_object(db, 'share_get', mock.Mock(return_value=self.share))
+        self.mock_object(db, 'share_instance_get', mock.Mock(
+            return_value=self.share.instance))
+        self.mock_object(self.manager, '_copy_share_data')
+
+        self.manager.migration_start(
+            self.context, [], self.share['id'], 'ins1_id', 'ins2_id',
+            {'unmount': 'unmount_src'}, {'unmount': 'unmount_dest'})
+
+        copy = self.manager._copy_share_data.call_args[0][1]
+        self.assertEqual(
+            os.path.join(checkpoint_dir, self.share['id'] + '.checkpoint'),
+            copy.checkpoint)
+        self.assertEqual([], os.listdir(checkpoint_dir))
+
     @ddt.data(None, Exception('fake'), exception.ShareDataCopyCancelled(
         src_instance='ins1',
         dest_instance='ins2'))
@@ -118,12 +236,147 @@ class DataManagerTestCase(test.TestCase):
 
         self.manager._copy_share_data.assert_called_once_with(
             self.context, 'fake_copy', self.share, 'ins1_id', 'ins2_id',
-            'info_src', 'info_dest')
+            'info_src', 'info_dest', precopy_passes=0)
 
         if exc:
             share_rpc.ShareAPI.migration_complete.assert_called_once_with(
                 self.context, self.share.instance, 'ins2_id')
 
+    def test_migration_start_copy_jobs(self):
+        self.flags(data_copy_max_jobs=1)
+        self.manager = manager.DataManager()
+        self.mock_object(db, 'share_get', mock.Mock(return_value=self.share))
+        self.mock_object(db, 'share_instance_get', mock.Mock(
+            return_value=self.share.instance))
+        self.mock_object(self.manager, '_copy_share_data', mock.Mock(
+            side_effect=lambda *args, **kwargs: self.assertTrue(
+                self.manager.copy_jobs.locked())))
+
+        self.manager.migration_start(
+            self.context, [], self.share['id'], 'ins1_id', 'ins2_id',
+            'info_src', 'info_dest')
+
+        self.assertTrue(self.manager._copy_share_data.called)
+        self.assertFalse(self.manager.copy_jobs.locked())
+        self.assertNotIn(self.share['id'], self.manager.busy_tasks_shares)
+
+    def test__wait_for_copy_job(self):
+        self.manager.copy_jobs = mock.Mock()
+        self.manager.copy_jobs.locked.return_value = True
+        self.mock_object(manager.LOG, 'info')
+
+        self.manager._wait_for_copy_job(self.share['id'], 'fake_copy')
+
+        self.assertEqual('fake_copy',
+                         self.manager.busy_tasks_shares[self.share['id']])
+        self.manager.copy_jobs.acquire.assert_called_once_with()
+        self.assertTrue(manager.LOG.info.called)
+
+    def test__get_copy_throttle(self):
+        self.flags(data_copy_engine='parallel', data_copy_max_bandwidth=100,
+                   data_copy_job_max_bandwidth=10)
+        self.manager = manager.DataManager()
+
+        copy = self.manager._get_copy('/src', '/dest', [])
+
+        self.assertEqual(10 * units.Mi, copy.throttle.rate)
+        self.assertIs(self.manager.throttle, copy.throttle.parent)
+
+    @ddt.data('legacy', 'parallel')
+    def test__get_copy(self, engine):
+        self.flags(data_copy_engine=engine, data_copy_workers=4,
+                   data_copy_hash_algorithm='blake2b', check_hash=True)
+
+        copy = self.manager._get_copy('/src', '/dest', ['lost+found'])
+
+        if engine == 'parallel':
+            self.assertIsInstance(copy, data_utils.ParallelCopy)
+            self.assertEqual(4, copy.workers)
+            self.assertEqual('blake2b', copy.hash_algorithm)
+        else:
+            self.assertIs(data_utils.Copy, type(copy))
+        self.assertEqual('/src', copy.src)
+        self.assertEqual('/dest', copy.dest)
+        self.assertEqual(['lost+found'], copy.ignore_list)
+        self.assertTrue(copy.check_hash)
+
+    def test__precopy_share_data(self):
+        copy = data_utils.ParallelCopy('/src', '/dest', ['lost+found'])
+        pass_copies = [mock.Mock(cancelled=False, files_copied=files_copied)
+                       for files_copied in (5, 0, 1)]
+        self.mock_object(self.manager, '_get_copy',
+                         mock.Mock(side_effect=pass_copies))
+
+        self.manager._precopy_share_data(self.share['id'], copy, 3)
+
+        self.manager._get_copy.assert_has_calls(
+            [mock.call('/src', '/dest', ['lost+found'], delta=True)] * 2)
+        pass_copies[0].run.assert_called_once_with()
+        pass_copies[1].run.assert_called_once_with()
+        pass_copies[2].run.assert_not_called()
+        self.assertIs(copy, self.manager.busy_tasks_shares[self.share['id']])
+        self.assertFalse(copy.cancelled)
+
+    def test__precopy_share_data_cancelled(self):
+        copy = data_utils.ParallelCopy('/src', '/dest', [])
+        pass_copy = mock.Mock(cancelled=True)
+        self.mock_object(self.manager, '_get_copy',
+                         mock.Mock(return_value=pass_copy))
+
+        self.manager._precopy_share_data(self.share['id'], copy, 3)
+
+        pass_copy.run.assert_called_once_with()
+        self.assertTrue(copy.cancelled)
+
+    def test__precopy_share_data_legacy(self):
+        copy = data_utils.Copy('/src', '/dest', [])
+        self.mock_object(self.manager, '_get_copy')
+
+        self.manager._precopy_share_data(self.share['id'], copy, 3)
+
+        self.manager._get_copy.assert_not_called()
+
+    @ddt.data(True, False)
+    def test__copy_share_data_precopy(self, cancelled):
+        connection_info_src = {'mount': 'mount_cmd_src',
+                               'unmount': 'unmount_cmd_src'}
+        connection_info_dest = {'mount': 'mount_cmd_dest',
+                                'unmount': 'unmount_cmd_dest'}
+        fake_copy = mock.MagicMock(cancelled=cancelled)
+        fake_copy.get_progress.return_value = {'total_progress': 100}
+        self.mock_object(db, 'share_update')
+        self.mock_object(db, 'share_instance_get',
+                         mock.Mock(return_value=self.share['instance']))
+        self.mock_object(helper.DataServiceHelper,
+                         'allow_access_to_data_service',
+                         mock.Mock(return_value=[]))
+        self.mock_object(helper.DataServiceHelper, 'mount_share_instance')
+        self.mock_object(helper.DataServiceHelper, 'unmount_share_instance')
+        self.mock_object(helper.DataServiceHelper,
+                         'deny_access_to_data_service')
+        self.mock_object(helper.DataServiceHelper,
+                         'cast_access_rules_to_readonly')
+        self.mock_object(self.manager, '_precopy_share_data')
+
+        if cancelled:
+            self.assertRaises(
+                exception.ShareDataCopyCancelled,
+                self.manager._copy_share_data, self.context, fake_copy,
+                self.share, 'ins1_id', 'ins2_id', connection_info_src,
+                connection_info_dest, precopy_passes=2)
+            (helper.DataServiceHelper.cast_access_rules_to_readonly.
+                assert_not_called())
+        else:
+            self.manager._copy_share_data(
+                self.context, fake_copy, self.share, 'ins1_id', 'ins2_id',
+                connection_info_src, connection_info_dest, precopy_passes=2)
+            (helper.DataServiceHelper.cast_access_rules_to_readonly.
+                assert_called_once_with(self.share['instance']))
+
+        self.manager._precopy_share_data.assert_called_once_with(
+            self.share['id'], fake_copy, 2)
+        fake_copy.run.assert_called_once_with()
+
     @ddt.data({'cancelled': False, 'exc': None},
               {'cancelled': False, 'exc': Exception('fake')},
               {'cancelled': True, 'exc': None})
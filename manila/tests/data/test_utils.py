@@ -13,10 +13,16 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import errno
+import json
 import os
+import shutil
+import tempfile
 import time
 from unittest import mock
 
+import ddt
+
 from manila.data import utils as data_utils
 from manila import exception
 from manila import test
@@ -355,6 +361,21 @@ class CopyClassTestCase(test.TestCase):
         # reset
         self._copy.cancelled = False
 
+    def test_get_stats(self):
+        self.mock_object(self._copy.watch, 'elapsed',
+                         mock.Mock(return_value=4.0))
+
+        self._copy.initialized = True
+
+        self.assertEqual({'bytes_copied': 100, 'elapsed': 4.0,
+                          'throughput': 25.0}, self._copy.get_stats())
+
+    def test_get_stats_not_initialized(self):
+        self._copy.initialized = False
+
+        self.assertEqual({'bytes_copied': 100, 'elapsed': 0.0,
+                          'throughput': 0.0}, self._copy.get_stats())
+
     def test_run(self):
 
         # mocks
@@ -372,3 +393,404 @@ class CopyClassTestCase(test.TestCase):
         self._copy.copy_data.assert_called_once_with(self._copy.src)
         self._copy.copy_stats.assert_called_once_with(self._copy.src)
         self._copy.get_progress.assert_called_once_with()
+
+
+@ddt.ddt
+class ParallelCopyTestCase(test.TestCase):
+    def setUp(self):
+        super(ParallelCopyTestCase, self).setUp()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        self.src = os.path.join(self.tmp_dir, 'src')
+        self.dest = os.path.join(self.tmp_dir, 'dest')
+        os.makedirs(os.path.join(self.src, 'folder1', 'folder2'))
+        os.makedirs(os.path.join(self.src, 'lost+found'))
+        os.mkdir(self.dest)
+        self.files = {
+            'file1': b'a' * 1000,
+            'folder1/file2': b'b' * 10,
+            'folder1/folder2/file3': b'',
+            'lost+found/file4': b'c',
+        }
+        for path, data in self.files.items():
+            with open(os.path.join(self.src, path), 'wb') as f:
+                f.write(data)
+        os.chmod(os.path.join(self.src, 'file1'), 0o640)
+        os.utime(os.path.join(self.src, 'folder1'), (1000000, 1000000))
+        os.symlink('folder1/file2', os.path.join(self.src, 'link1'))
+        self.mock_log = self.mock_object(data_utils, 'LOG')
+
+        self._copy = data_utils.ParallelCopy(
+            self.src, self.dest, ['lost+found'], check_hash=True, workers=2)
+
+    def _read(self, path):
+        with open(os.path.join(self.dest, path), 'rb') as f:
+            return f.read()
+
+    def _assert_copied(self):
+        for path, data in self.files.items():
+            if path.startswith('lost+found'):
+                self.assertFalse(
+                    os.path.exists(os.path.join(self.dest, 'lost+found')))
+            else:
+                self.assertEqual(data, self._read(path))
+        self.assertEqual('folder1/file2',
+                         os.readlink(os.path.join(self.dest, 'link1')))
+        self.assertEqual(
+            0o640, os.stat(os.path.join(self.dest, 'file1')).st_mode & 0o777)
+        self.assertEqual(
+            os.stat(os.path.join(self.src, 'folder1')).st_mtime,
+            os.stat(os.path.join(self.dest, 'folder1')).st_mtime)
+        self.assertEqual(1000 + 10 + len('folder1/file2'),
+                         self._copy.total_size)
+        self.assertEqual({'total_progress': 100,
+                          'current_file_path': mock.ANY,
+                          'current_file_progress': 100},
+                         self._copy.get_progress())
+        self.assertTrue(self._copy.completed)
+
+    def test_run(self):
+        self._copy.run()
+
+        self._assert_copied()
+        self.assertTrue(self.mock_log.info.called)
+
+    @ddt.data(['copy_file_range'], ['copy_file_range', 'sendfile'])
+    def test_run_fallback(self, unsupported):
+        for name in unsupported:
+            self.mock_object(os, name, mock.Mock(
+                side_effect=OSError(errno.EXDEV, 'fake')), create=True)
+
+        self._copy.run()
+
+        self._assert_copied()
+
+    def test_run_empty(self):
+        shutil.rmtree(self.src)
+        os.mkdir(self.src)
+
+        self._copy.run()
+
+        self.assertEqual({'total_progress': 100}, self._copy.get_progress())
+
+    def test_run_error(self):
+        self.mock_object(os, 'chown', mock.Mock(
+            side_effect=OSError(errno.EPERM, 'fake')))
+
+        self.assertRaises(OSError, self._copy.run)
+        self.assertFalse(self._copy.completed)
+
+    def test_run_hash_mismatch(self):
+        self.mock_object(time, 'sleep')
+        self.mock_object(data_utils, '_hash_file',
+                         mock.Mock(return_value='fake_sum'))
+
+        self.assertRaises(exception.ShareDataCopyFailed, self._copy.run)
+        data_utils._hash_file.assert_called_with(mock.ANY, 'sha256')
+
+    @ddt.data('sha256', 'blake2b')
+    def test_run_streaming_hash(self, algorithm):
+        self._copy.hash_algorithm = algorithm
+        self.mock_object(os, 'copy_file_range', create=True)
+        self.mock_object(os, 'sendfile')
+        hash_file = self.mock_object(
+            data_utils, '_hash_file', mock.Mock(
+                side_effect=data_utils._hash_file))
+
+        self._copy.run()
+
+        self._assert_copied()
+        self.assertFalse(os.copy_file_range.called)
+        self.assertFalse(os.sendfile.called)
+        # Only the copies are read again.
+        self.assertEqual(
+            sorted(os.path.join(self.dest, path)
+                   for path in ('file1', 'folder1/file2',
+                                'folder1/folder2/file3')),
+            sorted(call[0][0] for call in hash_file.call_args_list))
+        self.assertEqual({algorithm},
+                         {call[0][1] for call in hash_file.call_args_list})
+        stats = self._copy.get_stats()
+        self.assertEqual(3 + 1, stats['files_copied'])
+        self.assertEqual(1010, stats['bytes_verified'])
+        self.assertEqual(self._copy.total_size, stats['bytes_copied'])
+        self.assertGreater(stats['elapsed'], 0)
+
+    def test_run_checkpoint(self):
+        checkpoint = os.path.join(self.tmp_dir, 'checkpoint')
+        self._copy.checkpoint = checkpoint
+
+        self._copy.run()
+
+        self._assert_copied()
+        with open(checkpoint) as f:
+            recorded = sorted(json.loads(line)[0] for line in f)
+        self.assertEqual(['file1', 'folder1/file2', 'folder1/folder2/file3',
+                          'link1'], recorded)
+
+        # An interrupted run may leave a partial record.
+        with open(checkpoint, 'a') as f:
+            f.write('["file1", 10')
+        os.utime(os.path.join(self.src, 'folder1', 'file2'),
+                 (2000000, 2000000))
+        copy = data_utils.ParallelCopy(
+            self.src, self.dest, ['lost+found'], workers=2,
+            checkpoint=checkpoint)
+
+        def _fake_copy_file(src_item, dest_item, src_stat, current_copy):
+            current_copy['copied'] = src_stat.st_size
+
+        copy_file = self.mock_object(copy, '_copy_file',
+                                     mock.Mock(side_effect=_fake_copy_file))
+
+        copy.run()
+
+        copy_file.assert_called_once_with(
+            os.path.join(self.src, 'folder1', 'file2'),
+            os.path.join(self.dest, 'folder1', 'file2'), mock.ANY, mock.ANY)
+        self.assertEqual(3, copy.get_stats()['files_skipped'])
+        self.assertEqual(self._copy.total_size, copy.total_size)
+        self.assertEqual(copy.total_size, copy.current_size)
+
+    def test_run_checkpoint_destination_missing(self):
+        checkpoint = os.path.join(self.tmp_dir, 'checkpoint')
+        self._copy.checkpoint = checkpoint
+        self._copy.run()
+        os.remove(os.path.join(self.dest, 'file1'))
+        copy = data_utils.ParallelCopy(
+            self.src, self.dest, ['lost+found'], checkpoint=checkpoint)
+
+        copy.run()
+
+        self.assertEqual(self.files['file1'], self._read('file1'))
+        self.assertEqual(1, copy.files_copied)
+        self.assertEqual(3, copy.files_skipped)
+
+    def test_run_delta(self):
+        self._copy.run()
+        with open(os.path.join(self.src, 'file1'), 'wb') as f:
+            f.write(b'd' * 500)
+        os.chmod(os.path.join(self.src, 'folder1', 'file2'), 0o600)
+        os.remove(os.path.join(self.src, 'folder1', 'folder2', 'file3'))
+        os.remove(os.path.join(self.src, 'link1'))
+        os.mkdir(os.path.join(self.src, 'link1'))
+        with open(os.path.join(self.src, 'link1', 'file5'), 'wb') as f:
+            f.write(b'e')
+        os.mkdir(os.path.join(self.dest, 'lost+found'))
+        copy = data_utils.ParallelCopy(
+            self.src, self.dest, ['lost+found'], workers=2, delta=True)
+
+        copy.run()
+
+        self.assertEqual(b'd' * 500, self._read('file1'))
+        self.assertEqual(b'e', self._read('link1/file5'))
+        self.assertEqual(
+            0o600,
+            os.stat(os.path.join(self.dest, 'folder1', 'file2')).st_mode &
+            0o777)
+        self.assertEqual(
+            [], os.listdir(os.path.join(self.dest, 'folder1', 'folder2')))
+        self.assertTrue(os.path.isdir(os.path.join(self.dest, 'lost+found')))
+        self.assertEqual({'total_progress': 100,
+                          'current_file_path': mock.ANY,
+                          'current_file_progress': 100},
+                         copy.get_progress())
+        stats = copy.get_stats()
+        self.assertEqual(2, stats['files_copied'])
+        self.assertEqual(1, stats['files_skipped'])
+        self.assertEqual(2, stats['files_deleted'])
+
+    @ddt.data(True, False)
+    def test_run_source_removed(self, delta):
+        copy = data_utils.ParallelCopy(
+            self.src, self.dest, ['lost+found'], check_hash=True, workers=2,
+            delta=delta)
+        walk = copy._walk
+
+        def _walk_and_remove():
+            result = walk()
+            os.remove(os.path.join(self.src, 'file1'))
+            shutil.rmtree(os.path.join(self.src, 'folder1', 'folder2'))
+            return result
+
+        self.mock_object(copy, '_walk',
+                         mock.Mock(side_effect=_walk_and_remove))
+
+        if not delta:
+            self.assertRaises(FileNotFoundError, copy.run)
+            self.assertFalse(copy.completed)
+            return
+
+        copy.run()
+
+        self.assertTrue(copy.completed)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, 'file1')))
+        self.assertEqual(self.files['folder1/file2'],
+                         self._read('folder1/file2'))
+        self.assertEqual(10 + len('folder1/file2'), copy.total_size)
+        self.assertEqual(copy.total_size, copy.current_size)
+        self.assertEqual(2, copy.get_stats()['files_copied'])
+        self.assertTrue(self.mock_log.debug.called)
+
+    def test_run_delta_folder_removed_while_walking(self):
+        folder2 = os.path.join(self.src, 'folder1', 'folder2')
+        scandir = os.scandir
+
+        def _fake_scandir(path):
+            if path == folder2:
+                raise FileNotFoundError(errno.ENOENT, 'fake', path)
+            return scandir(path)
+
+        self.mock_object(data_utils.os, 'scandir',
+                         mock.Mock(side_effect=_fake_scandir))
+        copy = data_utils.ParallelCopy(
+            self.src, self.dest, ['lost+found'], workers=2, delta=True)
+
+        copy.run()
+
+        self.assertTrue(copy.completed)
+        self.assertEqual(3, copy.get_stats()['files_copied'])
+        self.assertEqual(
+            [], os.listdir(os.path.join(self.dest, 'folder1', 'folder2')))
+
+    def test_run_throttle(self):
+        throttle = mock.Mock(chunk_size=data_utils.READ_CHUNK_SIZE)
+        copy = data_utils.ParallelCopy(
+            self.src, self.dest, ['lost+found'], workers=2,
+            throttle=throttle)
+
+        copy.run()
+
+        self.assertEqual(1000 + 10, sum(
+            call[0][0] for call in throttle.consume.call_args_list))
+
+    @mock.patch.object(data_utils, 'xxhash', None)
+    def test_init_xxhash_not_available(self):
+        self.assertRaises(exception.ShareDataCopyFailed,
+                          data_utils.ParallelCopy, self.src, self.dest, [],
+                          check_hash=True, hash_algorithm='xxh64')
+
+    def test_run_cancelled(self):
+        self._copy.cancel()
+
+        self._copy.run()
+
+        self.assertEqual([], os.listdir(self.dest))
+        self.assertEqual(0, self._copy.total_size)
+
+    def test_get_progress(self):
+        self._copy.initialized = True
+        self._copy.total_size = 200
+        self._copy.current_size = 50
+        self._copy.current_copy = {'file_path': '/fake/path', 'size': 100,
+                                   'copied': 25}
+        self._copy.in_progress = [self._copy.current_copy,
+                                  {'copied': 25}]
+
+        self.assertEqual({'total_progress': 50,
+                          'current_file_path': '/fake/path',
+                          'current_file_progress': 25},
+                         self._copy.get_progress())
+
+    def test_get_progress_not_initialized(self):
+        self.assertEqual({'total_progress': 0}, self._copy.get_progress())
+
+
+class FakeClock(object):
+    """Time that only advances when slept."""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, delay):
+        self.now += delay
+
+
+@ddt.ddt
+class ThrottleTestCase(test.TestCase):
+    def setUp(self):
+        super(ThrottleTestCase, self).setUp()
+        self.mock_time = self.mock_object(data_utils, '_time')
+        self.mock_time.monotonic.return_value = 10.0
+
+    def test_consume(self):
+        throttle = data_utils.Throttle(100)
+
+        throttle.consume(50)
+        throttle.consume(50)
+        self.mock_time.monotonic.return_value = 20.0
+        throttle.consume(100)
+        # The copy took longer than allowed by the rate.
+        self.mock_time.monotonic.return_value = 30.0
+        throttle.consume(100, started_at=21.0)
+
+        self.mock_time.sleep.assert_has_calls(
+            [mock.call(0.5), mock.call(1.0), mock.call(1.0)])
+        self.assertEqual(3, self.mock_time.sleep.call_count)
+
+    def test_consume_parent(self):
+        parent = data_utils.Throttle(50)
+        throttle = data_utils.Throttle(100, parent=parent)
+        other_throttle = data_utils.Throttle(100, parent=parent)
+
+        throttle.consume(50)
+        other_throttle.consume(50)
+
+        # Slept once per chunk, for the slowest of the throttles.
+        self.mock_time.sleep.assert_has_calls(
+            [mock.call(1.0), mock.call(2.0)])
+        self.assertEqual(2, self.mock_time.sleep.call_count)
+
+    @ddt.data((10, None), (10, 10), (10, 5), (5, 10))
+    @ddt.unpack
+    def test_copy_rate(self, rate, parent_rate):
+        clock = FakeClock()
+        self.mock_object(data_utils, '_time', clock)
+        mib = data_utils.READ_CHUNK_SIZE
+        parent = None
+        if parent_rate:
+            parent = data_utils.Throttle(parent_rate * mib)
+        throttle = data_utils.Throttle(rate * mib, parent=parent)
+        size = 200 * mib
+        progress = {'copied': 0}
+
+        def _fake_copy_file_range(src_fd, dest_fd, size=None):
+            copied = min(size, progress['size'] - progress['copied'])
+            # Copying is 4 times as fast as the throttled rate.
+            clock.sleep(copied / (4 * rate * mib))
+            return copied
+
+        self.mock_object(data_utils, '_copy_file_range',
+                         mock.Mock(side_effect=_fake_copy_file_range))
+        progress['size'] = size
+        started_at = clock.monotonic()
+
+        data_utils._copy_file_data(mock.sentinel.src_fd,
+                                   mock.sentinel.dest_fd, progress,
+                                   lambda: False, throttle=throttle)
+
+        self.assertEqual(size, progress['copied'])
+        achieved_rate = size / (clock.monotonic() - started_at)
+        expected_rate = min(rate, parent_rate or rate) * mib
+        self.assertLessEqual(achieved_rate, expected_rate * 1.01)
+        self.assertGreaterEqual(achieved_rate, expected_rate * 0.95)
+
+    @ddt.data((1, None, data_utils.READ_CHUNK_SIZE),
+              (100 * data_utils.READ_CHUNK_SIZE, None,
+               10 * data_utils.READ_CHUNK_SIZE),
+              (10 * data_utils.COPY_CHUNK_SIZE, None,
+               data_utils.COPY_CHUNK_SIZE),
+              (10 * data_utils.COPY_CHUNK_SIZE, 1,
+               data_utils.READ_CHUNK_SIZE))
+    @ddt.unpack
+    def test_chunk_size(self, rate, parent_rate, expected):
+        parent = None
+        if parent_rate:
+            parent = data_utils.Throttle(parent_rate)
+
+        throttle = data_utils.Throttle(rate, parent=parent)
+
+        self.assertEqual(expected, throttle.chunk_size)
@@ -36,6 +36,7 @@ See BaseMigrationChecks class for more information.
 import abc
 import copy
 import datetime
+import hashlib
 
 from oslo_db import exception as oslo_db_exc
 from oslo_utils import uuidutils
@@ -3044,3 +3045,104 @@ class AddUpdateSecurityServiceControlFields(BaseMigrationChecks):
         self.test_case.assertRaises(
             sa_exc.NoSuchTableError,
             utils.load_table, 'async_operation_data', engine)
+
+
+@map_to_migration('88f11b62f4c5')
+class ShareInstancesHostReplicaStateIndexChecks(BaseMigrationChecks):
+
+    def setup_upgrade_data(self, engine):
+        pass
+
+    def _get_share_instances_host_replica_state_index(self, engine):
+        share_instances_table = utils.load_table('share_instances', engine)
+        members = ['host', 'replica_state']
+        for idx in share_instances_table.indexes:
+            if sorted(idx.columns.keys()) == members:
+                return idx
+
+    def check_upgrade(self, engine, data):
+        self.test_case.assertTrue(
+            self._get_share_instances_host_replica_state_index(engine))
+
+    def check_downgrade(self, engine):
+        self.test_case.assertFalse(
+            self._get_share_instances_host_replica_state_index(engine))
+
+
+@map_to_migration('a3c5e7f91b2d')
+class AddSearchTrigramsTableChecks(BaseMigrationChecks):
+    sn_table_name = 'share_networks'
+    st_table_name = 'search_trigrams'
+    share_network_id = uuidutils.generate_uuid()
+    deleted_share_network_id = uuidutils.generate_uuid()
+
+    def setup_upgrade_data(self, engine):
+        sn_table = utils.load_table(self.sn_table_name, engine)
+        engine.execute(sn_table.insert({
+            'id': self.share_network_id,
+            'user_id': 'user_id',
+            'project_id': 'project_id',
+            'name': u'F\u00e4ke-SN',
+        }))
+        engine.execute(sn_table.insert({
+            'id': self.deleted_share_network_id,
+            'user_id': 'user_id',
+            'project_id': 'project_id',
+            'name': 'fake_deleted_sn',
+            'deleted': self.deleted_share_network_id,
+        }))
+
+    def check_upgrade(self, engine, data):
+        st_table = utils.load_table(self.st_table_name, engine)
+        resource_ids = (self.share_network_id,
+                        self.deleted_share_network_id)
+        trigrams = [
+            (st.resource_id, st.field, st.trigram)
+            for st in engine.execute(st_table.select().where(
+                st_table.c.resource_id.in_(resource_ids)))]
+        expected = [(self.share_network_id, 'share_networks.name', trigram)
+                    for trigram in ('-sn', 'ake', 'e-s', 'fak', 'ke-')]
+        self.test_case.assertEqual(expected, sorted(trigrams))
+
+    def check_downgrade(self, engine):
+        self.test_case.assertRaises(
+            sa_exc.NoSuchTableError,
+            utils.load_table, self.st_table_name, engine)
+
+
+@map_to_migration('5d2a8b7c9e41')
+class AddExportLocationsPathHashChecks(BaseMigrationChecks):
+    el_table_name = 'share_instance_export_locations'
+    el_uuid = uuidutils.generate_uuid()
+
+    def setup_upgrade_data(self, engine):
+        share_data = {'id': uuidutils.generate_uuid()}
+        share_table = utils.load_table('shares', engine)
+        engine.execute(share_table.insert(share_data))
+
+        share_instance_data = {
+            'id': uuidutils.generate_uuid(),
+            'share_id': share_data['id'],
+        }
+        si_table = utils.load_table('share_instances', engine)
+        engine.execute(si_table.insert(share_instance_data))
+
+        el_table = utils.load_table(self.el_table_name, engine)
+        engine.execute(el_table.insert({
+            'uuid': self.el_uuid,
+            'share_instance_id': share_instance_data['id'],
+            'path': 'host:/fake/path/',
+            'is_admin_only': False,
+        }))
+
+    def check_upgrade(self, engine, data):
+        el_table = utils.load_table(self.el_table_name, engine)
+        el = engine.execute(el_table.select().where(
+            el_table.c.uuid == self.el_uuid)).first()
+        self.test_case.assertEqual(
+            hashlib.sha256(b'host:/fake/path').hexdigest(), el.path_hash)
+
+    def check_downgrade(self, engine):
+        el_table = utils.load_table(self.el_table_name, engine)
+        for el in engine.execute(el_table.select()):
+            self.test_case.assertFalse(hasattr(el, 'path_hash'))
@@ -462,6 +462,57 @@ class ShareDatabaseAPITestCase(test.TestCase):
         else:
             self.assertNotIn('share_proto', instance)
 
+    @ddt.data(None, ['fake_host@watson'])
+    def test_share_instance_sizes_sum_by_hosts(self, hosts):
+        db_utils.create_share(host='fake_host@watson#pool0', size=1)
+        db_utils.create_share(host='fake_host@watson#pool0', size=2)
+        db_utils.create_share(host='fake_host@watson#pool1', size=4)
+        db_utils.create_share(host='fake_host@newton#pool0', size=8)
+        db_utils.create_share(host='fake_host@watsonx#pool0', size=16)
+
+        sizes = db_api.share_instance_sizes_sum_by_hosts(
+            self.ctxt, hosts=hosts)
+
+        expected = {
+            'fake_host@watson#pool0': 3,
+            'fake_host@watson#pool1': 4,
+        }
+        if not hosts:
+            expected['fake_host@newton#pool0'] = 8
+            expected['fake_host@watsonx#pool0'] = 16
+        self.assertEqual(expected, sizes)
+
+    def test_share_instance_hosts_get_all_by_share_ids(self):
+        share = db_utils.create_share(host='fake_host@watson#pool0',
+                                      is_public=True)
+        replica = db_utils.create_share_instance(
+            share_id=share['id'], host='fake_host@newton#pool0',
+            status=constants.STATUS_DEFERRED_DELETING)
+        deleted = db_utils.create_share_instance(
+            share_id=share['id'], host='fake_host@watsonx#pool0')
+        db_api.share_instance_delete(self.ctxt, deleted['id'])
+        without_instance = db_utils.create_share_without_instance()
+        db_utils.create_share(host='fake_host@watson#pool1')
+
+        shares = db_api.share_instance_hosts_get_all_by_share_ids(
+            self.ctxt, [share['id'], without_instance['id'], 'fake_id'])
+
+        self.assertEqual({share['id'], without_instance['id']}, set(shares))
+        self.assertEqual('fake', shares[share['id']]['project_id'])
+        self.assertTrue(shares[share['id']]['is_public'])
+        self.assertEqual(
+            {constants.STATUS_CREATING, replica['status']},
+            shares[share['id']]['statuses'])
+        self.assertEqual(
+            ['fake_host@newton#pool0', 'fake_host@watson#pool0'],
+            sorted(shares[share['id']]['hosts']))
+        self.assertEqual([], shares[without_instance['id']]['hosts'])
+
+    def test_share_instance_hosts_get_all_by_share_ids_no_ids(self):
+        self.assertEqual(
+            {}, db_api.share_instance_hosts_get_all_by_share_ids(
+                self.ctxt, []))
+
     def test_share_instance_get_all_by_host_not_found_exception(self):
         self.skipTest('ccloud: invalid test due to pull request '
                       'https://github.com/sapcc/manila/pull/6')
@@ -653,6 +704,96 @@ class ShareDatabaseAPITestCase(test.TestCase):
         self.assertEqual(shares[0]['id'], result[0]['id'])
         self.assertEqual(1, len(result))
 
+    def test_share_get_all_with_limit_and_offset(self):
+        shares = [db_utils.create_share(display_name='fake_name_%s' % i)
+                  for i in range(5)]
+
+        count, result = db_api.share_get_all_with_count(
+            self.ctxt, filters={'limit': 2, 'offset': 1},
+            sort_key='display_name', sort_dir='asc')
+
+        self.assertEqual(5, count)
+        self.assertEqual([shares[1]['id'], shares[2]['id']],
+                         [share['id'] for share in result])
+
+    @ddt.data(('display_name', 'asc'), ('display_name', 'desc'),
+              ('host', 'asc'), ('host', 'desc'))
+    @ddt.unpack
+    def test_share_get_all_with_marker(self, sort_key, sort_dir):
+        values = ['a', None, 'b', 'b', None, 'c']
+        for value in values:
+            db_utils.create_share(**{sort_key: value})
+        expected = [share['id'] for share in db_api.share_get_all(
+            self.ctxt, sort_key=sort_key, sort_dir=sort_dir)]
+
+        result = []
+        marker = None
+        while True:
+            filters = {'limit': 2}
+            if marker:
+                filters['marker'] = marker
+            page = db_api.share_get_all(
+                self.ctxt, filters=filters, sort_key=sort_key,
+                sort_dir=sort_dir)
+            if not page:
+                break
+            result.extend(share['id'] for share in page)
+            marker = page[-1]['id']
+
+        self.assertEqual(expected, result)
+
+    @ddt.data(('created_at', 'desc'), ('display_name', 'asc'),
+              ('host', 'asc'), ('host', 'desc'))
+    @ddt.unpack
+    def test_share_get_all_with_limit_replicated_shares(self, sort_key,
+                                                        sort_dir):
+        shares = []
+        for i in range(5):
+            share = db_utils.create_share(
+                display_name='fake_name_%s' % i, host='host%s' % i,
+                status=constants.STATUS_AVAILABLE)
+            db_utils.create_share_replica(
+                share_id=share['id'], host='host%s' % (4 - i),
+                status=constants.STATUS_AVAILABLE,
+                replica_state=constants.REPLICA_STATE_IN_SYNC)
+            shares.append(share)
+        filters = {'status': constants.STATUS_AVAILABLE}
+        expected = [share['id'] for share in db_api.share_get_all(
+            self.ctxt, filters=dict(filters), sort_key=sort_key,
+            sort_dir=sort_dir)]
+
+        by_marker = []
+        marker = None
+        while True:
+            page_filters = dict(filters, limit=2)
+            if marker:
+                page_filters['marker'] = marker
+            page = db_api.share_get_all(
+                self.ctxt, filters=page_filters, sort_key=sort_key,
+                sort_dir=sort_dir)
+            if not page:
+                break
+            by_marker.extend(share['id'] for share in page)
+            marker = page[-1]['id']
+        by_offset = []
+        for offset in range(0, 6, 2):
+            page = db_api.share_get_all(
+                self.ctxt, filters=dict(filters, limit=2, offset=offset),
+                sort_key=sort_key, sort_dir=sort_dir)
+            by_offset.extend(share['id'] for share in page)
+
+        self.assertEqual(sorted(share['id'] for share in shares),
+                         sorted(expected))
+        self.assertEqual(expected, by_marker)
+        self.assertEqual(expected, by_offset)
+
+    def test_share_get_all_with_marker_not_found(self):
+        db_utils.create_share()
+
+        self.assertRaises(exception.InvalidInput,
+                          db_api.share_get_all,
+                          self.ctxt, filters={'marker': 'fake_marker'})
+
     @ddt.data(
         ({'status': constants.STATUS_AVAILABLE}, 'status',
          [constants.STATUS_AVAILABLE, constants.STATUS_ERROR]),
@@ -704,6 +845,121 @@ class ShareDatabaseAPITestCase(test.TestCase):
 
         self.assertEqual(len(share_values), len(results))
 
+    @ddt.data(False, True)
+    def test_share_get_all_not_detailed(self, show_count):
+        now = timeutils.utcnow()
+        shares = [
+            db_utils.create_share(
+                display_name='fake_name_%s' % i,
+                created_at=now + datetime.timedelta(seconds=i))
+            for i in range(3)]
+        db_utils.create_share_replica(share_id=shares[1]['id'])
+        get_all = (db_api.share_get_all_with_count if show_count
+                   else db_api.share_get_all)
+
+        result = get_all(self.ctxt, filters={'limit': 2}, detailed=False)
+
+        expected = [{'id': share['id'], 'display_name': share['display_name']}
+                    for share in reversed(shares[1:])]
+        if show_count:
+            self.assertEqual((3, expected), result)
+        else:
+            self.assertEqual(expected, result)
+
+    def test_share_get_all_not_detailed_replicated_share(self):
+        now = timeutils.utcnow()
+        shares = [
+            db_utils.create_share(
+                display_name='fake_name_%s' % i,
+                created_at=now + datetime.timedelta(seconds=i))
+            for i in range(3)]
+        # The newest share has two instances.
+        db_utils.create_share_replica(share_id=shares[2]['id'])
+
+        first_page = db_api.share_get_all(
+            self.ctxt, filters={'limit': 2}, detailed=False)
+        second_page = db_api.share_get_all(
+            self.ctxt, filters={'limit': 2,
+                                'marker': first_page[-1]['id']},
+            detailed=False)
+
+        self.assertEqual(
+            [{'id': share['id'], 'display_name': share['display_name']}
+             for share in reversed(shares)],
+            first_page + second_page)
+        self.assertEqual(2, len(first_page))
+
+    @ddt.data(True, False)
+    def test_share_get_all_like_filters_search_index(self, use_search_index):
+        self.flags(use_search_index=use_search_index)
+        share_1 = db_utils.create_share(display_name='Alpha share')
+        share_2 = db_utils.create_share(display_name='beta')
+        db_utils.create_share(display_name='gamma',
+                              display_description='not a share')
+        db_api.share_update(self.ctxt, share_2['id'],
+                            {'display_name': 'beta SHARE'})
+
+        results = db_api.share_get_all(
+            self.ctxt, filters={'display_name~': 'share'})
+
+        self.assertEqual(sorted([share_1['id'], share_2['id']]),
+                         sorted(share['id'] for share in results))
+
+    def test_share_search_index(self):
+        session = db_api.get_session()
+        share = db_utils.create_share(display_name='Abcd',
+                                      display_description=None)
+
+        def get_trigrams():
+            return sorted(
+                (trigram.field, trigram.trigram)
+                for trigram in session.query(models.SearchTrigram).filter_by(
+                    resource_id=share['id']))
+
+        self.assertEqual([('shares.display_name', 'abc'),
+                          ('shares.display_name', 'bcd')], get_trigrams())
+
+        db_api.share_update(self.ctxt, share['id'],
+                            {'display_description': 'xyz'})
+
+        self.assertEqual([('shares.display_description', 'xyz'),
+                          ('shares.display_name', 'abc'),
+                          ('shares.display_name', 'bcd')], get_trigrams())
+
+        db_api.share_instance_delete(self.ctxt, share.instance['id'])
+
+        self.assertEqual([], get_trigrams())
+
+    @ddt.data(('Abcd', {'abc', 'bcd'}),
+              (u'Caf\u00e9', {'caf', 'afe'}),
+              (u'CAFE\u0301', {'caf', 'afe'}),
+              (u'\uff21bc', {'abc'}),
+              ('ab', set()),
+              (None, set()))
+    @ddt.unpack
+    def test_get_search_trigrams(self, value, expected):
+        self.assertEqual(expected, db_api._get_search_trigrams(value))
+
+    def test_share_get_all_like_filters_search_index_accents(self):
+        share = db_utils.create_share(display_name=u'Caf\u00e9 Cr\u00e8me')
+        db_utils.create_share(display_name='Cafe Creme')
+        trigram_model = models.SearchTrigram
+        session = db_api.get_session()
+
+        # An accent insensitive collation matches 'cafe' with the share, the
+        # trigram index must not exclude it.
+        indexed_ids = {
+            trigram.resource_id for trigram in session.query(
+                trigram_model).filter(
+                trigram_model.field == 'shares.display_name',
+                trigram_model.trigram.in_(
+                    db_api._get_search_trigrams('cafe')))}
+        results = db_api.share_get_all(
+            self.ctxt, filters={'display_name~': u'\u00e9 Cr\u00e8'})
+
+        self.assertIn(share['id'], indexed_ids)
+        self.assertEqual([share['id']], [s['id'] for s in results])
+
     @ddt.data(None, 'writable')
     def test_share_get_has_replicas_field(self, replication_type):
         share = db_utils.create_share(replication_type=replication_type)
@@ -810,6 +1066,65 @@ class ShareDatabaseAPITestCase(test.TestCase):
                 self.assertEqual(with_share_data,
                                  expected_share_keys.issubset(replica.keys()))
 
+    def test_share_replicas_get_all_by_share_paginated(self):
+        share = db_utils.create_share()
+        replicas = [
+            db_utils.create_share_replica(
+                replica_state=constants.REPLICA_STATE_IN_SYNC,
+                share_id=share['id'])
+            for i in range(4)]
+        expected = [replica['id'] for replica in sorted(
+            replicas, key=lambda r: (r['created_at'], r['id']),
+            reverse=True)]
+
+        first_page = db_api.share_replicas_get_all_by_share(
+            self.ctxt, share['id'], limit=2)
+        second_page = db_api.share_replicas_get_all_by_share(
+            self.ctxt, share['id'], limit=2, marker=first_page[-1]['id'])
+        with_offset = db_api.share_replicas_get_all(
+            self.ctxt, limit=2, offset=1)
+
+        self.assertEqual(expected[:2], [r['id'] for r in first_page])
+        self.assertEqual(expected[2:], [r['id'] for r in second_page])
+        self.assertEqual(expected[1:3], [r['id'] for r in with_offset])
+
+    @ddt.data(True, False)
+    def test_share_replicas_get_all_non_active_by_host(self,
+                                                       with_share_data):
+        share = db_utils.create_share()
+        expected = [
+            db_utils.create_share_replica(
+                host='fake_host@watson#pool0',
+                replica_state=constants.REPLICA_STATE_IN_SYNC,
+                share_id=share['id']),
+            db_utils.create_share_replica(
+                host='fake_host@watson',
+                replica_state=constants.REPLICA_STATE_OUT_OF_SYNC,
+                share_id=share['id']),
+        ]
+        db_utils.create_share_replica(
+            host='fake_host@watson#pool1',
+            replica_state=constants.REPLICA_STATE_ACTIVE,
+            share_id=share['id'])
+        db_utils.create_share_replica(
+            host='fake_host@watsonx#pool0',
+            replica_state=constants.REPLICA_STATE_IN_SYNC,
+            share_id=share['id'])
+        db_utils.create_share_replica(
+            host='fake_host@newton#pool0',
+            replica_state=constants.REPLICA_STATE_IN_SYNC,
+            share_id=share['id'])
+        db_utils.create_share_instance(
+            host='fake_host@watson#pool0', share_id=share['id'])
+
+        replicas = db_api.share_replicas_get_all_non_active_by_host(
+            self.ctxt, 'fake_host@watson', with_share_data=with_share_data)
+
+        self.assertEqual(sorted(r['id'] for r in expected),
+                         sorted(r['id'] for r in replicas))
+        for replica in replicas:
+            self.assertEqual(with_share_data, 'project_id' in replica.keys())
+
     def test_share_replicas_get_available_active_replica(self):
         share_server = db_utils.create_share_server()
         share_1 = db_utils.create_share()
@@ -1581,6 +1896,23 @@ class ShareSnapshotDatabaseAPITestCase(test.TestCase):
 
         self.assertEqual(1, len(snapshots))
 
+    @ddt.data('asc', 'desc')
+    def test_share_snapshot_get_all_with_marker(self, sort_dir):
+        expected = [self.snapshot_1['id'], self.snapshot_2['id']]
+        if sort_dir == 'desc':
+            expected.reverse()
+
+        snapshots = db_api.share_snapshot_get_all(
+            self.ctxt, limit=1, sort_key='id', sort_dir=sort_dir,
+            marker=expected[0])
+
+        self.assertEqual([expected[1]], [s['id'] for s in snapshots])
+
+    def test_share_snapshot_get_all_with_marker_not_found(self):
+        self.assertRaises(exception.InvalidInput,
+                          db_api.share_snapshot_get_all,
+                          self.ctxt, marker='fake_marker')
+
     def test_share_snapshot_get_latest_for_share(self):
 
         share = db_utils.create_share(size=1)
@@ -1904,6 +2236,7 @@ class ShareSnapshotDatabaseAPITestCase(test.TestCase):
             self.ctxt, snapshot.instance['id'], new_export_locations, False)
 
 
+@ddt.ddt
 class ShareExportLocationsDatabaseAPITestCase(test.TestCase):
 
     def setUp(self):
@@ -2000,6 +2333,118 @@ class ShareExportLocationsDatabaseAPITestCase(test.TestCase):
             self.ctxt, share['id'])
         self.assertEqual(locations, admin_result)
 
+    def test_share_get_all_filter_by_export_location_path(self):
+        share = db_utils.create_share()
+        other_share = db_utils.create_share()
+        db_api.share_export_locations_update(
+            self.ctxt, share.instance['id'],
+            ['host:/fake/1', 'host:/fake/2'], False)
+        db_api.share_export_locations_update(
+            self.ctxt, other_share.instance['id'], ['host:/fake/1/'], False)
+
+        result = db_api.share_get_all(
+            self.ctxt, filters={'export_location_path': 'host:/fake/1'})
+
+        self.assertEqual([share['id']], [s['id'] for s in result])
+
+    def test_share_get_all_filter_by_export_location_path_hash_collision(
+            self):
+        self.mock_object(db_api, '_get_export_location_path_hash',
+                         mock.Mock(return_value='fake_hash'))
+        share = db_utils.create_share()
+        db_api.share_export_locations_update(
+            self.ctxt, share.instance['id'], ['host:/fake/1'], False)
+
+        result = db_api.share_get_all(
+            self.ctxt, filters={'export_location_path': 'host:/fake/2'})
+
+        self.assertEqual([], result)
+
+    @ddt.data('host:/fake/1', 'host:/fake/1/', ' host:/fake/1 ')
+    def test_share_get_by_export_location_path(self, path):
+        share = db_utils.create_share()
+        other_share = db_utils.create_share()
+        db_api.share_export_locations_update(
+            self.ctxt, share.instance['id'],
+            ['host:/fake/1', 'host:/fake/2'], False)
+        db_api.share_export_locations_update(
+            self.ctxt, other_share.instance['id'], ['host:/fake/11'], False)
+
+        result = db_api.share_get_by_export_location_path(self.ctxt, path)
+
+        self.assertEqual(share['id'], result)
+
+    @ddt.data(({'project_id': 'fake_project'}, 'own'),
+              ({'project_id': 'fake_project', 'is_public': True}, 'own'),
+              ({'project_id': 'other_project', 'is_public': True}, 'public'),
+              ({}, 'public'))
+    @ddt.unpack
+    def test_share_get_by_export_location_path_scoped(self, kwargs,
+                                                      expected):
+        shares = {
+            'public': db_utils.create_share(project_id='public_project',
+                                            is_public=True),
+            'private': db_utils.create_share(project_id='private_project'),
+            'own': db_utils.create_share(project_id='fake_project'),
+        }
+        for share in shares.values():
+            db_api.share_export_locations_update(
+                self.ctxt, share.instance['id'], ['host:/fake/1'], False)
+
+        result = db_api.share_get_by_export_location_path(
+            self.ctxt, 'host:/fake/1', **kwargs)
+
+        self.assertEqual(shares[expected]['id'], result)
+
+    def test_share_get_by_export_location_path_other_project(self):
+        share = db_utils.create_share(project_id='other_project')
+        db_api.share_export_locations_update(
+            self.ctxt, share.instance['id'], ['host:/fake/1'], False)
+
+        self.assertRaises(exception.ExportLocationPathNotFound,
+                          db_api.share_get_by_export_location_path,
+                          self.ctxt, 'host:/fake/1',
+                          project_id='fake_project', is_public=True)
+
+    def test_share_get_by_export_location_path_admin_only(self):
+        ctxt_user = context.RequestContext(
+            user_id='fake user', project_id='fake_project', is_admin=False)
+        share = db_utils.create_share(project_id='fake_project')
+        db_api.share_export_locations_update(
+            self.ctxt, share.instance['id'],
+            [{'path': 'host:/fake/1', 'is_admin_only': True}], False)
+
+        self.assertRaises(exception.ExportLocationPathNotFound,
+                          db_api.share_get_by_export_location_path,
+                          ctxt_user, 'host:/fake/1',
+                          project_id='fake_project')
+        self.assertEqual(
+            share['id'],
+            db_api.share_get_by_export_location_path(
+                self.ctxt, 'host:/fake/1', project_id='fake_project'))
+
+    def test_share_get_by_export_location_path_deleted(self):
+        share = db_utils.create_share()
+        db_api.share_export_locations_update(
+            self.ctxt, share.instance['id'], ['host:/fake/1'], False)
+        db_api.share_export_locations_update(
+            self.ctxt, share.instance['id'], ['host:/fake/2'], True)
+
+        self.assertRaises(exception.ExportLocationPathNotFound,
+                          db_api.share_get_by_export_location_path,
+                          self.ctxt, 'host:/fake/1')
+
+    def test_share_get_by_export_location_path_hash_collision(self):
+        self.mock_object(db_api, '_get_export_location_path_hash',
+                         mock.Mock(return_value='fake_hash'))
+        share = db_utils.create_share()
+        db_api.share_export_locations_update(
+            self.ctxt, share.instance['id'], ['host:/fake/1'], False)
+
+        self.assertRaises(exception.ExportLocationPathNotFound,
+                          db_api.share_get_by_export_location_path,
+                          self.ctxt, 'host:/fake/2')
+
 
 @ddt.ddt
 class ShareInstanceExportLocationsMetadataDatabaseAPITestCase(test.TestCase):
@@ -2334,6 +2779,25 @@ class ShareNetworkDatabaseAPITestCase(BaseDatabaseAPITestCase):
         self.assertEqual(0, len(result['share_instances']))
         self.assertEqual(0, len(result['security_services']))
 
+    def test_get_all_by_ids(self):
+        share_nw_dict2 = self.share_nw_dict.copy()
+        share_nw_dict2['id'] += "suffix"
+        share_nw_dict3 = self.share_nw_dict.copy()
+        share_nw_dict3['id'] += "other"
+        for share_nw_dict in (self.share_nw_dict, share_nw_dict2,
+                              share_nw_dict3):
+            db_api.share_network_create(self.fake_context, share_nw_dict)
+
+        result = db_api.share_network_get_all_by_ids(
+            self.fake_context, [self.share_nw_dict['id'],
+                                share_nw_dict2['id'], 'fake'])
+
+        self.assertEqual(
+            sorted([self.share_nw_dict['id'], share_nw_dict2['id']]),
+            sorted(share_nw['id'] for share_nw in result))
+        self.assertEqual([], db_api.share_network_get_all_by_ids(
+            self.fake_context, []))
+
     def _create_share_network_for_project(self, project_id):
         ctx = context.RequestContext(user_id='fake user',
                                      project_id=project_id,
@@ -2534,6 +2998,47 @@ class ShareNetworkDatabaseAPITestCase(BaseDatabaseAPITestCase):
         self.assertEqual(1, len(result1))
         self.assertEqual(2, len(result2))
 
+    def test_get_all_by_filter_with_inexact_filters(self):
+        share_nw_names = ('fake name', 'other', 'fake other')
+        for i, name in enumerate(share_nw_names):
+            share_nw = dict(self.share_nw_dict)
+            share_nw['id'] = 'fake share nw id%s' % i
+            share_nw['name'] = name
+            share_nw['description'] = 'fake description %s' % i
+            db_api.share_network_create(self.fake_context, share_nw)
+        db_api.share_network_update(self.fake_context, 'fake share nw id1',
+                                    {'name': 'new name'})
+        db_api.share_network_delete(self.fake_context, 'fake share nw id0')
+
+        result = db_api.share_network_get_all_by_filter(
+            self.fake_context,
+            filters={'name~': 'name', 'description~': 'ption'})
+
+        self.assertEqual(['fake share nw id1'],
+                         [net['id'] for net in result])
+
+    def test_get_all_by_filter_paginated(self):
+        now = timeutils.utcnow()
+        for i in range(3):
+            share_nw = dict(self.share_nw_dict)
+            share_nw['id'] = 'fake share nw id%s' % i
+            share_nw['created_at'] = now + datetime.timedelta(seconds=i)
+            db_api.share_network_create(self.fake_context, share_nw)
+
+        first_page = db_api.share_network_get_all_by_filter(
+            self.fake_context, limit=2)
+        second_page = db_api.share_network_get_all_by_filter(
+            self.fake_context, limit=2, marker=first_page[-1]['id'])
+        with_offset = db_api.share_network_get_all_by_filter(
+            self.fake_context, offset=2)
+
+        self.assertEqual(['fake share nw id2', 'fake share nw id1'],
+                         [net['id'] for net in first_page])
+        self.assertEqual(['fake share nw id0'],
+                         [net['id'] for net in second_page])
+        self.assertEqual(['fake share nw id0'],
+                         [net['id'] for net in with_offset])
+
     def test_get_all_by_project(self):
         db_api.share_network_create(self.fake_context, self.share_nw_dict)
 
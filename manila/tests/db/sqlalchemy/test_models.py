@@ -14,6 +14,8 @@
 #    under the License.
 """Testing of SQLAlchemy model classes."""
 
+from unittest import mock
+
 import ddt
 
 from manila.common import constants
@@ -146,6 +148,50 @@ class ShareTestCase(test.TestCase):
         self.assertEqual(
             constants.STATUS_ERROR, share2.instance['status'])
 
+    def test_share_instance_cached(self):
+
+        instance_list = [
+            db_utils.create_share_instance(
+                status=constants.STATUS_AVAILABLE, share_id='fake_id'),
+            db_utils.create_share_instance(
+                status=constants.STATUS_CREATING, share_id='fake_id'),
+        ]
+        share = db_utils.create_share(instances=instance_list)
+        mock_select = self.mock_object(
+            share, '_select_instance',
+            mock.Mock(side_effect=share._select_instance))
+
+        self.assertEqual(instance_list[0]['id'], share.instance['id'])
+        self.assertEqual(constants.STATUS_AVAILABLE, share['status'])
+        self.assertEqual(instance_list[0]['host'], share['host'])
+
+        mock_select.assert_called_once_with(tuple(share.instances))
+
+    def test_share_instance_cache_invalidated(self):
+
+        instance_list = [
+            db_utils.create_share_instance(
+                status=constants.STATUS_AVAILABLE, share_id='fake_id'),
+            db_utils.create_share_instance(
+                status=constants.STATUS_CREATING, share_id='fake_id'),
+        ]
+        share = db_utils.create_share(instances=instance_list)
+        instances = list(share.instances)
+        available, creating = sorted(
+            instances, key=lambda x: x['status'] != constants.STATUS_AVAILABLE)
+        self.assertIs(available, share.instance)
+
+        creating['status'] = constants.STATUS_REPLICATION_CHANGE
+        self.assertIs(creating, share.instance)
+
+        new_instance = db_utils.create_share_instance(
+            status=constants.STATUS_REVERTING, share_id='fake_id')
+        share.instances = instances + [new_instance]
+        self.assertIs(new_instance, share.instance)
+
+        share.instances = []
+        self.assertIsNone(share.instance)
+
     def test_access_rules_status_no_instances(self):
         share = db_utils.create_share(instances=[])
 
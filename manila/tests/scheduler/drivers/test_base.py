@@ -25,6 +25,7 @@ from oslo_utils import timeutils
 from manila import context
 from manila import db
 from manila.scheduler.drivers import base
+from manila.scheduler.drivers import external
 from manila import test
 from manila import utils
 
@@ -56,6 +57,33 @@ class SchedulerTestCase(test.TestCase):
                 assert_called_once_with(service_name, host,
                                         capabilities, timestamp))
 
+    def test_get_scheduler_stats(self):
+        self.override_config('external_scheduler_api_url', '')
+        self.mock_object(self.driver.host_manager, 'get_cache_stats',
+                         mock.Mock(return_value={'fake_cache': 1}))
+        self.mock_object(self.driver.host_manager, 'get_filter_stats',
+                         mock.Mock(return_value={'FakeFilter': {}}))
+
+        result = self.driver.get_scheduler_stats()
+
+        self.assertEqual({'caches': {'fake_cache': 1},
+                          'filters': {'FakeFilter': {}}}, result)
+
+    def test_get_scheduler_stats_external_scheduler(self):
+        self.override_config('external_scheduler_api_url',
+                             'http://127.0.0.1/scheduler')
+        self.mock_object(self.driver.host_manager, 'get_cache_stats',
+                         mock.Mock(return_value={}))
+        self.mock_object(self.driver.host_manager, 'get_filter_stats',
+                         mock.Mock(return_value={}))
+        self.mock_object(external, 'get_stats',
+                         mock.Mock(return_value={'successes': 1}))
+
+        result = self.driver.get_scheduler_stats()
+
+        self.assertEqual({'caches': {}, 'filters': {},
+                          'external_scheduler': {'successes': 1}}, result)
+
     def test_hosts_up(self):
         service1 = {'host': 'host1'}
         service2 = {'host': 'host2'}
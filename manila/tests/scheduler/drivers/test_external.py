@@ -19,9 +19,12 @@ from unittest.mock import MagicMock
 from unittest.mock import patch
 
 import jsonschema
+from oslo_utils import fixture as utils_fixture
+from oslo_utils import timeutils
 import requests
 
 from manila import context
+from manila.scheduler.drivers import external
 from manila.scheduler.drivers.external import call_external_scheduler_api
 from manila.scheduler.weighers.base import WeighedObject
 from manila.tests.scheduler.drivers import test_base
@@ -56,6 +59,10 @@ class ExternalSchedulerAPITestCase(test_base.SchedulerTestCase):
         super(ExternalSchedulerAPITestCase, self).setUp()
         self.flags(external_scheduler_api_url='http://127.0.0.1:1234')
         self.flags(external_scheduler_timeout=5)
+        self.mock_object(external, '_circuit_breaker',
+                         external.CircuitBreaker())
+        external._stats.clear()
+        self.addCleanup(external._stats.clear)
         self.h1 = fakes.FakeHostState('host1', {})
         self.h2 = fakes.FakeHostState('host2', {})
         self.h3 = fakes.FakeHostState('host3', {})
@@ -90,7 +97,7 @@ class ExternalSchedulerAPITestCase(test_base.SchedulerTestCase):
             return response or MagicMock()
         return wrapped
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
     def test_context_included_in_request(self, mock_post):
         mock_response = MagicMock()
         mock_response.status_code = 200
@@ -127,7 +134,7 @@ class ExternalSchedulerAPITestCase(test_base.SchedulerTestCase):
             'Context should be serialized correctly'
         )
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
     @patch('manila.scheduler.drivers.external.LOG.debug')
     def test_enabled_api_success(self, mock_debug_log, mock_post):
         mock_response = MagicMock()
@@ -153,7 +160,7 @@ class ExternalSchedulerAPITestCase(test_base.SchedulerTestCase):
         )
         self.assertIn('Calling external scheduler API with ', log)
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
     @patch('manila.scheduler.drivers.external.LOG.warning')
     def test_enabled_api_empty_response(self, mock_warn_log, mock_post):
         mock_response = MagicMock()
@@ -171,7 +178,7 @@ class ExternalSchedulerAPITestCase(test_base.SchedulerTestCase):
             'External scheduler filtered out all hosts.'
         )
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
     @patch('manila.scheduler.drivers.external.LOG.error')
     def test_enabled_api_timeout(self, mock_err_log, mock_post):
         mock_post.side_effect = requests.exceptions.Timeout
@@ -195,7 +202,7 @@ class ExternalSchedulerAPITestCase(test_base.SchedulerTestCase):
         )
         self.assertIn('Failed to call external scheduler API: ', log)
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
     @patch('manila.scheduler.drivers.external.LOG.error')
     def test_enabled_api_invalid_response(self, mock_err_log, mock_post):
         invalid_response_dicts = [
@@ -230,7 +237,7 @@ class ExternalSchedulerAPITestCase(test_base.SchedulerTestCase):
             )
             self.assertIn('External scheduler response is invalid: ', log)
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
     @patch('manila.scheduler.drivers.external.LOG.error')
     def test_enabled_api_json_decode_err(self, mock_err_log, mock_post):
         log = ""
@@ -258,7 +265,7 @@ class ExternalSchedulerAPITestCase(test_base.SchedulerTestCase):
         )
         self.assertIn('Failed to call external scheduler API: ', log)
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
     @patch('manila.scheduler.drivers.external.LOG.error')
     def test_enabled_api_error_reply(self, mock_err_log, mock_post):
         mock_post.side_effect = requests.exceptions.HTTPError
@@ -281,3 +288,70 @@ class ExternalSchedulerAPITestCase(test_base.SchedulerTestCase):
             [h.obj.host for h in hosts]
         )
         self.assertIn('Failed to call external scheduler API: ', log)
+
+    @patch.object(external, '_session', None)
+    @patch('requests.Session.post')
+    def test_session_reused(self, mock_post):
+        mock_response = MagicMock()
+        mock_response.json.return_value = {'hosts': ['host1']}
+        mock_post.side_effect = self._check_request(mock_response)
+
+        for i in range(2):
+            call_external_scheduler_api(
+                self.example_ctx,
+                self.example_weighed_hosts,
+                self.example_spec,
+            )
+
+        self.assertEqual(2, mock_post.call_count)
+        self.assertIs(external._session, external._get_session())
+        stats = external.get_stats()
+        self.assertEqual(2, stats['successes'])
+        self.assertNotIn('failures', stats)
+
+    @patch('requests.Session.post')
+    @patch('manila.scheduler.drivers.external.LOG.warning')
+    def test_circuit_breaker(self, mock_warn_log, mock_post):
+        self.flags(external_scheduler_failure_threshold=2)
+        self.flags(external_scheduler_cooldown=30)
+        mock_response = MagicMock()
+        mock_response.json.return_value = {'hosts': ['host3']}
+        mock_post.side_effect = [requests.exceptions.Timeout,
+                                 requests.exceptions.Timeout,
+                                 requests.exceptions.Timeout,
+                                 mock_response]
+        now = timeutils.utcnow()
+        self.useFixture(utils_fixture.TimeFixture(now))
+
+        def call():
+            return [h.obj.host for h in call_external_scheduler_api(
+                self.example_ctx,
+                self.example_weighed_hosts,
+                self.example_spec,
+            )]
+
+        # The breaker opens after two failed calls
+        self.assertEqual(['host1', 'host2', 'host3'], call())
+        self.assertEqual(['host1', 'host2', 'host3'], call())
+        self.assertEqual(['host1', 'host2', 'host3'], call())
+        self.assertEqual(2, mock_post.call_count)
+        self.assertEqual(1, mock_warn_log.call_count)
+
+        # A single call is attempted after the cool-down, and fails again
+        timeutils.advance_time_seconds(31)
+        self.assertEqual(['host1', 'host2', 'host3'], call())
+        self.assertEqual(['host1', 'host2', 'host3'], call())
+        self.assertEqual(3, mock_post.call_count)
+
+        # The next successful call closes the breaker
+        timeutils.advance_time_seconds(31)
+        self.assertEqual(['host3'], call())
+        mock_post.side_effect = None
+        mock_post.return_value = mock_response
+        self.assertEqual(['host3'], call())
+        self.assertEqual(5, mock_post.call_count)
+
+        stats = external.get_stats()
+        self.assertEqual(2, stats['successes'])
+        self.assertEqual(3, stats['failures'])
+        self.assertEqual(2, stats['skipped'])
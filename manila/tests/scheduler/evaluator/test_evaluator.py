@@ -139,3 +139,30 @@ class EvaluatorTestCase(test.TestCase):
         self.assertRaises(exception.EvaluatorParseException,
                           evaluator.evaluate,
                           "7 / 0")
+
+    def test_expression_parsed_once(self):
+        evaluator._parse.cache_clear()
+        expression = "stats.free_capacity_gb > share.size * 2"
+
+        results = [
+            evaluator.evaluate(expression,
+                               stats={'free_capacity_gb': free},
+                               share={'size': 10})
+            for free in (5, 50, 15, 25)
+        ]
+
+        self.assertEqual([False, True, False, True], results)
+        cache_info = evaluator._parse.cache_info()
+        self.assertEqual(1, cache_info.misses)
+        self.assertEqual(3, cache_info.hits)
+
+    def test_bad_expression_not_cached(self):
+        evaluator._parse.cache_clear()
+
+        for i in range(2):
+            self.assertRaises(exception.EvaluatorParseException,
+                              evaluator.evaluate,
+                              "1/*1")
+
+        self.assertEqual(0, evaluator._parse.cache_info().currsize)
+        self.assertEqual(2, evaluator._parse.cache_info().misses)
@@ -16,6 +16,7 @@
 import ddt
 from unittest import mock
 
+from manila.common import constants
 from manila import exception
 from manila.scheduler.filters import affinity
 from manila import test
@@ -29,33 +30,30 @@ fake_hosts = [
     fakes.FakeHostState('aggregate3@host3', {}),
     ]
 
+
+def _fake_share(*hosts, **kwargs):
+    share = {
+        'project_id': 'fake_project_id',
+        'user_id': 'fake_user_id',
+        'is_public': True,
+        'statuses': {constants.STATUS_AVAILABLE} if hosts else set(),
+        'hosts': list(hosts),
+    }
+    share.update(kwargs)
+    return share
+
+
 fake_shares_1 = {
-    'abb6e0ac-7c3e-4ce0-8a69-5a166d246882': {
-        'instances': [
-            {'host': fake_hosts[0].host}
-            ]
-        },
-    '4de0cc74-450c-4468-8159-52128cf03407': {
-        'instances': [
-            {'host': fake_hosts[0].host}
-            ]
-        },
+    'abb6e0ac-7c3e-4ce0-8a69-5a166d246882': _fake_share(fake_hosts[0].host),
+    '4de0cc74-450c-4468-8159-52128cf03407': _fake_share(fake_hosts[0].host),
     }
 
 fake_shares_2 = {
-    'c920fb61-e250-4c3c-a25d-1fdd9ca7cbc3': {
-        'instances': [
-            {'host': fake_hosts[1].host}
-            ]
-        },
+    'c920fb61-e250-4c3c-a25d-1fdd9ca7cbc3': _fake_share(fake_hosts[1].host),
     }
 
 fake_shares_3 = {
-    '3923bebf-9825-4a66-971e-6092a9fe2dbb': {
-        'instances': [
-            {'host': fake_hosts[2].host}
-            ]
-        },
+    '3923bebf-9825-4a66-971e-6092a9fe2dbb': _fake_share(fake_hosts[2].host),
     }
 
 
@@ -80,19 +78,18 @@ class AffinityFilterTestCase(test.TestCase):
             'scheduler_hints': {'different_host': ','.join(list(hints))},
         }
 
-    def _fake_get(self, context, uuid):
-        if uuid in fake_shares_1.keys():
-            return fake_shares_1[uuid]
-        if uuid in fake_shares_2.keys():
-            return fake_shares_2[uuid]
-        if uuid in fake_shares_3.keys():
-            return fake_shares_3[uuid]
-        raise exception.ShareNotFound(uuid)
+    def _fake_get_hosts(self, context, share_ids):
+        shares = {}
+        for fake_shares in (fake_shares_1, fake_shares_2, fake_shares_3):
+            shares.update({share_id: share
+                           for share_id, share in fake_shares.items()
+                           if share_id in share_ids})
+        return shares
 
     @ddt.data('b5c207da-ac0b-43b0-8691-c6c9e860199d')
-    @mock.patch('manila.share.api.API.get')
-    def test_affinity_share_not_found(self, unknown_id, mock_share_get):
-        mock_share_get.side_effect = self._fake_get
+    @mock.patch('manila.db.share_instance_hosts_get_all_by_share_ids')
+    def test_affinity_share_not_found(self, unknown_id, mock_get_hosts):
+        mock_get_hosts.side_effect = self._fake_get_hosts
         self.assertRaises(exception.ShareNotFound,
                           self.filter._validate,
                           self._make_filter_hints(unknown_id))
@@ -106,9 +103,9 @@ class AffinityFilterTestCase(test.TestCase):
         self.assertRaises(affinity.SchedulerHintsNotSet,
                           self.filter._validate, hints)
 
-    @mock.patch('manila.share.api.API.get')
-    def test_affinity_filter(self, mock_share_get):
-        mock_share_get.side_effect = self._fake_get
+    @mock.patch('manila.db.share_instance_hosts_get_all_by_share_ids')
+    def test_affinity_filter(self, mock_get_hosts):
+        mock_get_hosts.side_effect = self._fake_get_hosts
 
         share_ids = fake_shares_1.keys()
         hints = self._make_filter_hints(*share_ids)
@@ -119,9 +116,9 @@ class AffinityFilterTestCase(test.TestCase):
         self.assertNotIn('aggregate2@host2', valid_hosts)
         self.assertNotIn('aggregate3@host3', valid_hosts)
 
-    @mock.patch('manila.share.api.API.get')
-    def test_anti_affinity_filter(self, mock_share_get):
-        mock_share_get.side_effect = self._fake_get
+    @mock.patch('manila.db.share_instance_hosts_get_all_by_share_ids')
+    def test_anti_affinity_filter(self, mock_get_hosts):
+        mock_get_hosts.side_effect = self._fake_get_hosts
 
         share_ids = fake_shares_2.keys()
         hints = self._make_anti_filter_hints(*share_ids)
@@ -131,3 +128,50 @@ class AffinityFilterTestCase(test.TestCase):
         self.assertIn('aggregate1@host1', valid_hosts)
         self.assertIn('aggregate3@host3', valid_hosts)
         self.assertNotIn('aggregate2@host2', valid_hosts)
+
+    @mock.patch('manila.db.share_instance_hosts_get_all_by_share_ids')
+    def test_affinity_filter_single_lookup(self, mock_get_hosts):
+        mock_get_hosts.side_effect = self._fake_get_hosts
+        share_ids = list(fake_shares_1.keys()) + list(fake_shares_2.keys())
+        hints = self._make_anti_filter_hints(*share_ids)
+
+        valid_hosts = self.anti_filter.filter_all(fake_hosts, hints)
+
+        self.assertEqual(['aggregate3@host3'],
+                         [h.host for h in valid_hosts])
+        mock_get_hosts.assert_called_once_with(None, mock.ANY)
+        self.assertEqual(sorted(share_ids),
+                         sorted(mock_get_hosts.call_args[0][1]))
+
+    @mock.patch('manila.db.share_instance_hosts_get_all_by_share_ids')
+    def test_affinity_filter_different_hosts(self, mock_get_hosts):
+        mock_get_hosts.side_effect = self._fake_get_hosts
+        share_ids = list(fake_shares_1.keys()) + list(fake_shares_2.keys())
+        hints = self._make_filter_hints(*share_ids)
+
+        self.assertEqual([], self.filter.filter_all(fake_hosts, hints))
+
+    @ddt.data({'is_public': False},
+              {'statuses': {constants.STATUS_DEFERRED_DELETING}})
+    @mock.patch('manila.policy.check_policy', return_value=False)
+    @mock.patch('manila.db.share_instance_hosts_get_all_by_share_ids')
+    def test_affinity_share_not_authorized(self, share_data, mock_get_hosts,
+                                           mock_check_policy):
+        share_id = 'b5c207da-ac0b-43b0-8691-c6c9e860199d'
+        share = _fake_share(fake_hosts[0].host, **share_data)
+        mock_get_hosts.return_value = {share_id: share}
+
+        self.assertRaises(exception.ShareNotFound,
+                          self.filter._validate,
+                          self._make_filter_hints(share_id))
+        mock_check_policy.assert_called_once_with(
+            None, 'share', mock.ANY, share, do_raise=False)
+
+    @mock.patch('manila.db.share_instance_hosts_get_all_by_share_ids')
+    def test_affinity_share_without_instances(self, mock_get_hosts):
+        share_id = 'b5c207da-ac0b-43b0-8691-c6c9e860199d'
+        mock_get_hosts.return_value = {share_id: _fake_share()}
+
+        self.assertRaises(exception.ShareInstanceNotFound,
+                          self.filter._validate,
+                          self._make_filter_hints(share_id))
@@ -141,6 +141,23 @@ class TestBaseFilterHandler(test.TestCase):
         self.assertEqual(filter_objs_expected, result)
         self.assertEqual('FakeFilter4', last_filter)
 
+    @mock.patch.object(FakeFilter3, 'filter_all', return_value=iter([2, 3]))
+    def test_get_filtered_objects_timings(self, fake3_filter_all):
+        timings = []
+        filter_classes = [FakeFilter1, FakeFilter3]
+
+        result, last_filter = self.handler.get_filtered_objects(
+            filter_classes, [1, 2, 3, 4], {'x': 'y'}, timings=timings)
+
+        self.assertEqual([2, 3], result)
+        self.assertEqual(['FakeFilter1', 'FakeFilter3'],
+                         [timing['name'] for timing in timings])
+        self.assertEqual([(4, 4), (4, 2)],
+                         [(timing['objects_in'], timing['objects_out'])
+                          for timing in timings])
+        for timing in timings:
+            self.assertGreaterEqual(timing['duration'], 0)
+
     def test_get_filtered_objects_with_filter_run_once(self):
         filter_objs_expected = [1, 2, 3, 4]
         filter_classes = [FakeFilter5]
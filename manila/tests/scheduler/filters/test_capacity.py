@@ -15,9 +15,12 @@
 Tests For CapacityFilter.
 """
 
+from unittest import mock
+
 import ddt
 
 from manila.scheduler.filters import capacity
+from manila.scheduler import utils as scheduler_utils
 from manila import test
 from manila.tests.scheduler import fakes
 from manila import utils
@@ -376,3 +379,69 @@ class HostFiltersTestCase(test.TestCase):
                                     'updated_at': None,
                                     'service': service})
         self.assertFalse(self.filter.host_passes(host, filter_properties))
+
+
+class VectorizedCapacityFilter(object):
+    """Checks one host at a time through the vectorized CapacityFilter."""
+
+    def __init__(self):
+        self.filter = capacity.CapacityFilter()
+
+    def host_passes(self, host_state, filter_properties):
+        return host_state in self.filter.filter_all([host_state],
+                                                    filter_properties)
+
+
+class VectorizedHostFiltersTestCase(HostFiltersTestCase):
+    """Runs the CapacityFilter tests with the vectorized filtering."""
+
+    def setUp(self):
+        super(VectorizedHostFiltersTestCase, self).setUp()
+        if scheduler_utils.numpy is None:
+            self.skipTest('NumPy is not installed')
+        self.flags(scheduler_vectorized_capacity=True)
+        self.filter = VectorizedCapacityFilter()
+
+    def test_filter_all_mixed_hosts(self):
+        filter_properties = {'size': 100}
+        hosts = [
+            fakes.FakeHostState('host%s' % i, capabilities)
+            for i, capabilities in enumerate((
+                {'total_capacity_gb': 500, 'free_capacity_gb': 200},
+                {'total_capacity_gb': 500, 'free_capacity_gb': 50},
+                {'total_capacity_gb': 'unknown', 'free_capacity_gb': 200},
+                {'total_capacity_gb': 500, 'free_capacity_gb': 'unknown'},
+                {'total_capacity_gb': 0, 'free_capacity_gb': 200},
+                {'total_capacity_gb': 500, 'free_capacity_gb': None},
+                {'total_capacity_gb': 500, 'free_capacity_gb': 120,
+                 'reserved_percentage': 5, 'thin_provisioning': True,
+                 'provisioned_capacity_gb': 400,
+                 'max_over_subscription_ratio': 2.0},
+                {'total_capacity_gb': 500, 'free_capacity_gb': 120,
+                 'reserved_percentage': 5, 'thin_provisioning': True,
+                 'provisioned_capacity_gb': 700,
+                 'max_over_subscription_ratio': 1.5},
+                {'total_capacity_gb': 500, 'free_capacity_gb': 120,
+                 'thin_provisioning': True, 'provisioned_capacity_gb': 0,
+                 'max_over_subscription_ratio': 0.8},
+            ))
+        ]
+        cap_filter = capacity.CapacityFilter()
+        expected = [host for host in hosts
+                    if cap_filter.host_passes(host, filter_properties)]
+        mock_host_passes = self.mock_object(
+            cap_filter, 'host_passes',
+            mock.Mock(side_effect=cap_filter.host_passes))
+
+        result = cap_filter.filter_all(hosts, filter_properties)
+
+        self.assertEqual(expected, result)
+        self.assertEqual(['host0', 'host2', 'host3', 'host6'],
+                         [host.host for host in result])
+        # Only the hosts not reporting numeric capacities are checked alone
+        mock_host_passes.assert_has_calls([
+            mock.call(hosts[2], filter_properties),
+            mock.call(hosts[3], filter_properties),
+            mock.call(hosts[5], filter_properties),
+        ])
+        self.assertEqual(3, mock_host_passes.call_count)
@@ -19,6 +19,7 @@ Tests For HostManager
 """
 
 import copy
+import datetime
 from unittest import mock
 
 import ddt
@@ -31,6 +32,7 @@ from manila import exception
 from manila.scheduler.filters import base_host
 from manila.scheduler import host_manager
 from manila.scheduler import utils as scheduler_utils
+from manila.scheduler.weighers import base_host as base_host_weigher
 from manila import test
 from manila.tests.scheduler import fakes
 from manila import utils
@@ -49,6 +51,11 @@ class FakeFilterClass2(base_host.BaseHostFilter):
         pass
 
 
+class FakeWeigherClass1(base_host_weigher.BaseHostWeigher):
+    def _weigh_object(self, host_state, weight_properties):
+        return 1.0
+
+
 @ddt.ddt
 class HostManagerTestCase(test.TestCase):
     """Test case for HostManager class."""
@@ -105,6 +112,55 @@ class HostManagerTestCase(test.TestCase):
             self.host_manager._choose_host_filters.assert_called_once_with(
                 mock.ANY)
 
+    @ddt.data(True, False)
+    def test_get_filtered_hosts_profile(self, profile):
+        self.flags(scheduler_profile_filters=profile)
+        self.mock_object(self.host_manager, '_choose_host_filters',
+                         mock.Mock(return_value=[FakeFilterClass1,
+                                                 FakeFilterClass2]))
+        self.mock_object(FakeFilterClass1, '_filter_one',
+                         lambda _self, obj, props: obj.host != 'fake_host1')
+        self.mock_object(FakeFilterClass2, '_filter_one',
+                         lambda _self, obj, props: True)
+        self.mock_object(host_manager.LOG, 'info')
+
+        self.host_manager.get_filtered_hosts(self.fake_hosts, {})
+        result, last_filter = self.host_manager.get_filtered_hosts(
+            self.fake_hosts, {})
+
+        self.assertEqual(self.fake_hosts[1:], result)
+        stats = self.host_manager.get_filter_stats()
+        if not profile:
+            self.assertEqual({}, stats)
+            host_manager.LOG.info.assert_not_called()
+            return
+        self.assertEqual(['FakeFilterClass1', 'FakeFilterClass2'],
+                         sorted(stats))
+        self.assertEqual('filter', stats['FakeFilterClass1']['type'])
+        self.assertEqual(2, stats['FakeFilterClass1']['calls'])
+        self.assertEqual(8, stats['FakeFilterClass1']['objects_in'])
+        self.assertEqual(6, stats['FakeFilterClass1']['objects_out'])
+        self.assertEqual(6, stats['FakeFilterClass2']['objects_in'])
+        self.assertEqual(
+            stats['FakeFilterClass1']['total_duration'] / 2,
+            stats['FakeFilterClass1']['average_duration'])
+        self.assertEqual(2, host_manager.LOG.info.call_count)
+
+    def test_get_weighed_hosts_profile(self):
+        self.flags(scheduler_profile_filters=True)
+        self.mock_object(self.host_manager, '_choose_host_weighers',
+                         mock.Mock(return_value=[FakeWeigherClass1]))
+        self.mock_object(host_manager.LOG, 'info')
+
+        self.host_manager.get_weighed_hosts(self.fake_hosts, {})
+
+        stats = self.host_manager.get_filter_stats()['FakeWeigherClass1']
+        self.assertEqual('weigher', stats['type'])
+        self.assertEqual(1, stats['calls'])
+        self.assertEqual(4, stats['objects_in'])
+        host_manager.LOG.info.assert_called_once_with(
+            mock.ANY, {'stage': 'weigher', 'timings': mock.ANY})
+
     def test_update_service_capabilities_for_shares(self):
         service_states = self.host_manager.service_states
         self.assertDictEqual(service_states, {})
@@ -138,6 +194,7 @@ class HostManagerTestCase(test.TestCase):
         self.assertDictEqual(service_states, expected)
 
     def test_get_all_host_states_share(self):
+        self.flags(scheduler_service_cache_ttl=0)
         fake_context = context.RequestContext('user', 'project')
         topic = CONF.share_topic
         tmp_pools = copy.deepcopy(fakes.SHARE_SERVICES_WITH_POOLS)
@@ -171,6 +228,103 @@ class HostManagerTestCase(test.TestCase):
             db.service_get_all_by_topic.assert_called_once_with(
                 fake_context, topic)
 
+    def test_get_all_host_states_share_service_cache(self):
+        self.flags(scheduler_service_cache_ttl=60)
+        fake_context = context.RequestContext('user', 'project')
+        start = timeutils.utcnow()
+        self.mock_object(
+            host_manager.timeutils, 'utcnow',
+            mock.Mock(side_effect=[start,
+                                   start + datetime.timedelta(seconds=59),
+                                   start + datetime.timedelta(seconds=61)]))
+        self.mock_object(
+            db, 'service_get_all_by_topic',
+            mock.Mock(return_value=fakes.SHARE_SERVICES_WITH_POOLS))
+        self.mock_object(utils, 'service_is_up', mock.Mock(return_value=True))
+
+        with mock.patch.dict(self.host_manager.service_states,
+                             fakes.SHARE_SERVICE_STATES_WITH_POOLS):
+            for i in range(3):
+                self.host_manager.get_all_host_states_share(fake_context)
+
+        self.assertEqual(2, db.service_get_all_by_topic.call_count)
+        self.assertEqual(1, self.host_manager.get_cache_stats()[
+            'service_cache_hits'])
+        self.assertEqual(2, self.host_manager.get_cache_stats()[
+            'service_cache_refreshes'])
+
+    def test_get_all_host_states_share_only_refreshes_updated_hosts(self):
+        self.flags(scheduler_service_cache_ttl=0)
+        fake_context = context.RequestContext('user', 'project')
+        self.mock_object(
+            db, 'service_get_all_by_topic',
+            mock.Mock(return_value=fakes.SHARE_SERVICES_WITH_POOLS))
+        self.mock_object(utils, 'service_is_up', mock.Mock(return_value=True))
+        for host, capabilities in (
+                fakes.SHARE_SERVICE_STATES_WITH_POOLS.items()):
+            self.host_manager.update_service_capabilities(
+                'share', host, copy.deepcopy(capabilities), 31337)
+        mock_update = self.mock_object(
+            host_manager.HostState, 'update_from_share_capability')
+
+        self.host_manager.get_all_host_states_share(fake_context)
+        self.host_manager.get_all_host_states_share(fake_context)
+
+        self.assertEqual(4, mock_update.call_count)
+
+        self.host_manager.update_service_capabilities(
+            'share', 'host2@BBB',
+            copy.deepcopy(fakes.SHARE_SERVICE_STATES_WITH_POOLS['host2@BBB']),
+            31338)
+        self.host_manager.get_all_host_states_share(fake_context)
+
+        self.assertEqual(5, mock_update.call_count)
+        mock_update.assert_called_with(
+            self.host_manager.service_states['host2@BBB'],
+            service=fakes.SHARE_SERVICES_WITH_POOLS[1],
+            context=fake_context, share_sizes=mock.ANY)
+        self.assertEqual({'host_state_hits': 7,
+                          'host_state_refreshes': 5,
+                          'service_cache_refreshes': 3},
+                         self.host_manager.get_cache_stats())
+        for share_node in fakes.SHARE_SERVICES_WITH_POOLS[:4]:
+            self.assertEqual(
+                share_node,
+                self.host_manager.host_state_map[share_node['host']].service)
+
+    def test_get_all_host_states_share_aggregates_share_sizes_once(self):
+        self.flags(scheduler_service_cache_ttl=0)
+        fake_context = context.RequestContext('user', 'project')
+        self.mock_object(
+            db, 'service_get_all_by_topic',
+            mock.Mock(return_value=fakes.SHARE_SERVICES_WITH_POOLS))
+        self.mock_object(utils, 'service_is_up', mock.Mock(return_value=True))
+        self.mock_object(db, 'share_instance_sizes_sum_by_host')
+        self.mock_object(
+            db, 'share_instance_sizes_sum_by_hosts',
+            mock.Mock(return_value={'host2@BBB#pool2': 100}))
+        service_states = copy.deepcopy(fakes.SHARE_SERVICE_STATES_WITH_POOLS)
+        for host_state in service_states.values():
+            for pool in host_state['pools']:
+                pool['thin_provisioning'] = True
+                pool.pop('provisioned_capacity_gb', None)
+
+        with mock.patch.dict(self.host_manager.service_states,
+                             service_states):
+            self.host_manager.get_all_host_states_share(fake_context)
+
+        db.share_instance_sizes_sum_by_hosts.assert_called_once_with(
+            fake_context, hosts=['host1@AAA', 'host2@BBB', 'host3@CCC',
+                                 'host4@DDD'])
+        self.assertFalse(db.share_instance_sizes_sum_by_host.called)
+        host_state_map = self.host_manager.host_state_map
+        self.assertEqual(
+            0, host_state_map['host1@AAA'].pools['pool1'].
+            provisioned_capacity_gb)
+        self.assertEqual(
+            100, host_state_map['host2@BBB'].pools['pool2'].
+            provisioned_capacity_gb)
+
     def test_get_pools_no_pools(self):
         fake_context = context.RequestContext('user', 'project')
         self.mock_object(utils, 'service_is_up', mock.Mock(return_value=True))
@@ -1265,3 +1419,29 @@ class PoolStateTestCase(test.TestCase):
         if 'ipv6_support' in share_capability:
             self.assertEqual(share_capability['ipv6_support'],
                              fake_pool.ipv6_support)
+
+    def test_update_from_share_capability_with_share_sizes(self):
+        fake_context = context.RequestContext('user', 'project', is_admin=True)
+        self.mock_object(db, 'share_instance_sizes_sum_by_host')
+        self.mock_object(db, 'share_instance_sizes_sum_by_hosts',
+                         mock.Mock(return_value={'host1#pool0': 4}))
+        share_sizes = host_manager.HostShareSizes(fake_context, ['host1'])
+        share_capability = {
+            'total_capacity_gb': 1024, 'free_capacity_gb': 512,
+            'thin_provisioning': True, 'reserved_percentage': 0,
+            'reserved_snapshot_percentage': 0,
+            'reserved_share_extend_percentage': 0, 'timestamp': None,
+        }
+        fake_pools = [host_manager.PoolState('host1', None, 'pool%s' % i)
+                      for i in range(2)]
+
+        for fake_pool in fake_pools:
+            fake_pool.update_from_share_capability(
+                share_capability, context=fake_context,
+                share_sizes=share_sizes)
+
+        self.assertEqual(4, fake_pools[0].provisioned_capacity_gb)
+        self.assertEqual(0, fake_pools[1].provisioned_capacity_gb)
+        db.share_instance_sizes_sum_by_hosts.assert_called_once_with(
+            fake_context, hosts=['host1'])
+        self.assertFalse(db.share_instance_sizes_sum_by_host.called)
@@ -225,6 +225,15 @@ class SchedulerManagerTestCase(test.TestCase):
                                                False)
         self.assertEqual('fake_pools', result)
 
+    def test_get_scheduler_stats(self):
+        self.mock_object(self.manager.driver, 'get_scheduler_stats',
+                         mock.Mock(return_value='fake_stats'))
+
+        result = self.manager.get_scheduler_stats(self.context)
+
+        self.manager.driver.get_scheduler_stats.assert_called_once_with()
+        self.assertEqual('fake_stats', result)
+
     @mock.patch.object(db, 'share_group_update', mock.Mock())
     def test_create_group_no_valid_host_puts_group_in_error_state(self):
         """Test that NoValidHost is raised for create_share_group.
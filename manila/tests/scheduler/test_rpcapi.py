@@ -91,6 +91,11 @@ class SchedulerRpcAPITestCase(test.TestCase):
                                  filters=None,
                                  version='1.9')
 
+    def test_get_scheduler_stats(self):
+        self._test_scheduler_api('get_scheduler_stats',
+                                 rpc_method='call',
+                                 version='1.12')
+
     def test_create_share_group(self):
         self._test_scheduler_api('create_share_group',
                                  rpc_method='cast',
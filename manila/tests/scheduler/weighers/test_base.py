@@ -62,3 +62,22 @@ class TestWeightHandler(test.TestCase):
         for seq, result, minval, maxval in map_:
             ret = base.normalize(seq, minval=minval, maxval=maxval)
             self.assertEqual(result, tuple(ret))
+
+    def test_get_weighed_objects_timings(self):
+        class FakeWeigher(base.BaseWeigher):
+            def _weigh_object(self, obj, weight_properties):
+                return obj
+
+        handler = base.BaseWeightHandler(
+            base.BaseWeigher, "manila.tests.scheduler.fakes")
+        timings = []
+
+        result = handler.get_weighed_objects(
+            [FakeWeigher], [1, 3, 2], {}, timings=timings)
+
+        self.assertEqual([3, 2, 1], [weighed.obj for weighed in result])
+        self.assertEqual(1, len(timings))
+        self.assertEqual('FakeWeigher', timings[0]['name'])
+        self.assertEqual(3, timings[0]['objects_in'])
+        self.assertEqual(3, timings[0]['objects_out'])
+        self.assertGreaterEqual(timings[0]['duration'], 0)
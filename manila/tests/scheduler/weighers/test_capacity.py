@@ -22,6 +22,8 @@ import ddt
 from oslo_config import cfg
 
 from manila import context
+from manila.scheduler import utils as scheduler_utils
+from manila.scheduler.weighers import base
 from manila.scheduler.weighers import base_host
 from manila.scheduler.weighers import capacity
 from manila.share import utils
@@ -304,3 +306,35 @@ class CapacityWeigherTestCase(test.TestCase):
         self.assertEqual(2.0, weighed_host.weight)
         self.assertEqual(
             winner, utils.extract_host(weighed_host.obj.host))
+
+
+class VectorizedCapacityWeigherTestCase(CapacityWeigherTestCase):
+    """Runs the CapacityWeigher tests with the vectorized weighing."""
+
+    def setUp(self):
+        super(VectorizedCapacityWeigherTestCase, self).setUp()
+        if scheduler_utils.numpy is None:
+            self.skipTest('NumPy is not installed')
+        self.flags(scheduler_vectorized_capacity=True)
+
+    def test_vectorized_weights_match_per_host_weights(self):
+        hosts = self._get_all_hosts()  # pylint: disable=no-value-for-parameter
+        weighed_objs = [base.WeighedObject(host, 0.0) for host in hosts]
+        weight_properties = {'size': 1, 'snapshot_id': 'fake_snapshot_id'}
+        self.flags(scheduler_vectorized_capacity=False)
+        per_host_weigher = capacity.CapacityWeigher()
+        expected = per_host_weigher.weigh_objects(weighed_objs,
+                                                  weight_properties)
+        self.flags(scheduler_vectorized_capacity=True)
+        weigher = capacity.CapacityWeigher()
+        mock_weigh_object = self.mock_object(
+            weigher, '_weigh_object',
+            mock.Mock(side_effect=weigher._weigh_object))
+
+        weights = weigher.weigh_objects(weighed_objs, weight_properties)
+
+        self.assertEqual(expected, weights)
+        self.assertEqual(per_host_weigher.minval, weigher.minval)
+        self.assertEqual(per_host_weigher.maxval, weigher.maxval)
+        # Only the host reporting 'unknown' capacities is weighed alone
+        self.assertEqual(1, mock_weigh_object.call_count)
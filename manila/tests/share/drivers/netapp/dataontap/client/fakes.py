@@ -57,6 +57,7 @@ SHARE_AGGREGATE_DISK_TYPE = 'FCAL'
 SHARE_AGGREGATE_DISK_TYPES = ['SATA', 'SSD']
 SHARE_NAME = 'fake_share'
 SHARE_SIZE = '1000000000'
+SHARE_USED_SIZE = '3145728'
 SHARE_NAME_2 = 'fake_share_2'
 FLEXGROUP_STYLE_EXTENDED = 'flexgroup'
 FLEXVOL_STYLE_EXTENDED = 'flexvol'
@@ -2222,6 +2223,61 @@ VOLUME_GET_EXPORT_POLICY_RESPONSE = etree.XML("""
   </results>
 """ % {'policy': EXPORT_POLICY_NAME, 'volume': SHARE_NAME})
 
+VOLUME_GET_ITER_ENSURE_INFO_RESPONSE = etree.XML("""
+  <results status="passed">
+    <attributes-list>
+      <volume-attributes>
+        <volume-export-attributes>
+          <policy>%(policy)s</policy>
+        </volume-export-attributes>
+        <volume-id-attributes>
+          <junction-path>/%(volume)s</junction-path>
+          <name>%(volume)s</name>
+        </volume-id-attributes>
+        <volume-snapshot-attributes>
+          <snapdir-access-enabled>true</snapdir-access-enabled>
+          <snapshot-policy>default</snapshot-policy>
+        </volume-snapshot-attributes>
+        <volume-space-attributes>
+          <is-space-reporting-logical>false</is-space-reporting-logical>
+        </volume-space-attributes>
+      </volume-attributes>
+      <volume-attributes>
+        <volume-export-attributes>
+          <policy>default</policy>
+        </volume-export-attributes>
+        <volume-id-attributes>
+          <name>%(volume2)s</name>
+        </volume-id-attributes>
+      </volume-attributes>
+    </attributes-list>
+    <num-records>2</num-records>
+  </results>
+""" % {'policy': EXPORT_POLICY_NAME, 'volume': SHARE_NAME,
+       'volume2': SHARE_NAME_2})
+
+VOLUME_GET_ITER_USED_SIZE_RESPONSE = etree.XML("""
+  <results status="passed">
+    <attributes-list>
+      <volume-attributes>
+        <volume-id-attributes>
+          <name>%(volume)s</name>
+        </volume-id-attributes>
+        <volume-space-attributes>
+          <size-used>%(size_used)s</size-used>
+        </volume-space-attributes>
+      </volume-attributes>
+      <volume-attributes>
+        <volume-id-attributes>
+          <name>%(volume2)s</name>
+        </volume-id-attributes>
+      </volume-attributes>
+    </attributes-list>
+    <num-records>2</num-records>
+  </results>
+""" % {'volume': SHARE_NAME, 'volume2': SHARE_NAME_2,
+       'size_used': SHARE_USED_SIZE})
+
 DELETED_EXPORT_POLICY_GET_ITER_RESPONSE = etree.XML("""
   <results status="passed">
     <attributes-list>
@@ -281,12 +281,21 @@ class NetAppClientCmodeTestCase(test.TestCase):
                           self.client._get_record_count,
                           api_response)
 
+    def _mock_send_iter_request_records(self, api_response):
+        attributes_list = api_response.get_child_by_name(
+            'attributes-list') or netapp_api.NaElement('none')
+        return self.mock_object(
+            self.client, 'send_iter_request_records',
+            mock.Mock(return_value=iter(attributes_list.get_children())))
+
     def test_send_iter_request(self):
 
+        # The pages are merged into the first one, keep the fixtures intact.
         api_responses = [
-            netapp_api.NaElement(fake.STORAGE_DISK_GET_ITER_RESPONSE_PAGE_1),
-            netapp_api.NaElement(fake.STORAGE_DISK_GET_ITER_RESPONSE_PAGE_2),
-            netapp_api.NaElement(fake.STORAGE_DISK_GET_ITER_RESPONSE_PAGE_3),
+            netapp_api.NaElement(copy.deepcopy(page))
+            for page in (fake.STORAGE_DISK_GET_ITER_RESPONSE_PAGE_1,
+                         fake.STORAGE_DISK_GET_ITER_RESPONSE_PAGE_2,
+                         fake.STORAGE_DISK_GET_ITER_RESPONSE_PAGE_3)
         ]
         mock_send_request = self.mock_object(
             self.client, 'send_request',
@@ -383,6 +392,80 @@ class NetAppClientCmodeTestCase(test.TestCase):
                           self.client.send_iter_request,
                           'storage-disk-get-iter')
 
+    def test_send_iter_request_records(self):
+
+        api_responses = [
+            netapp_api.NaElement(copy.deepcopy(page))
+            for page in (fake.STORAGE_DISK_GET_ITER_RESPONSE_PAGE_1,
+                         fake.STORAGE_DISK_GET_ITER_RESPONSE_PAGE_2,
+                         fake.STORAGE_DISK_GET_ITER_RESPONSE_PAGE_3)
+        ]
+        mock_send_request = self.mock_object(
+            self.client, 'send_request',
+            mock.Mock(side_effect=api_responses))
+
+        storage_disk_get_iter_args = {
+            'desired-attributes': {
+                'storage-disk-info': {
+                    'disk-name': None,
+                }
+            }
+        }
+        result = self.client.send_iter_request_records(
+            'storage-disk-get-iter', api_args=storage_disk_get_iter_args,
+            max_page_length=10)
+
+        # Pages are only requested while the records are consumed.
+        self.assertEqual('cluster3-01:v4.16',
+                         next(result).get_child_content('disk-name'))
+        mock_send_request.assert_called_once()
+        self.assertEqual(27, len(list(result)))
+        self.assertNotIn('tag', storage_disk_get_iter_args)
+
+        args1 = copy.deepcopy(storage_disk_get_iter_args)
+        args1['max-records'] = 10
+        args2 = copy.deepcopy(storage_disk_get_iter_args)
+        args2['max-records'] = 10
+        args2['tag'] = 'next_tag_1'
+        args3 = copy.deepcopy(storage_disk_get_iter_args)
+        args3['max-records'] = 10
+        args3['tag'] = 'next_tag_2'
+
+        mock_send_request.assert_has_calls([
+            mock.call('storage-disk-get-iter', args1, enable_tunneling=True),
+            mock.call('storage-disk-get-iter', args2, enable_tunneling=True),
+            mock.call('storage-disk-get-iter', args3, enable_tunneling=True),
+        ])
+
+    def test_send_iter_request_records_not_found(self):
+
+        api_response = netapp_api.NaElement(fake.NO_RECORDS_RESPONSE)
+        mock_send_request = self.mock_object(
+            self.client, 'send_request',
+            mock.Mock(return_value=api_response))
+
+        result = self.client.send_iter_request_records('storage-disk-get-iter')
+
+        self.assertEqual([], list(result))
+        mock_send_request.assert_called_once_with(
+            'storage-disk-get-iter',
+            {'max-records': client_cmode.DEFAULT_MAX_PAGE_LENGTH},
+            enable_tunneling=True)
+
+    @ddt.data(fake.INVALID_GET_ITER_RESPONSE_NO_ATTRIBUTES,
+              fake.INVALID_GET_ITER_RESPONSE_NO_RECORDS)
+    def test_send_iter_request_records_invalid(self, fake_response):
+
+        api_response = netapp_api.NaElement(fake_response)
+        self.mock_object(self.client,
+                         'send_request',
+                         mock.Mock(return_value=api_response))
+
+        self.assertRaises(exception.NetAppException,
+                          list,
+                          self.client.send_iter_request_records(
+                              'storage-disk-get-iter'))
+
     def test_set_vserver(self):
         self.client.set_vserver(fake.VSERVER_NAME)
         self.client.connection.set_vserver.assert_has_calls(
@@ -1086,9 +1169,7 @@ class NetAppClientCmodeTestCase(test.TestCase):
 
         api_response = netapp_api.NaElement(
             fake.AGGR_GET_ITER_ROOT_AGGR_RESPONSE)
-        self.mock_object(self.client,
-                         'send_iter_request',
-                         mock.Mock(return_value=api_response))
+        self._mock_send_iter_request_records(api_response)
 
         result = self.client.list_root_aggregates()
 
@@ -1104,7 +1185,7 @@ class NetAppClientCmodeTestCase(test.TestCase):
             }
         }
         self.assertSequenceEqual(fake.ROOT_AGGREGATE_NAMES, result)
-        self.client.send_iter_request.assert_has_calls([
+        self.client.send_iter_request_records.assert_has_calls([
             mock.call('aggr-get-iter', aggr_get_iter_args)])
 
     def test_list_non_root_aggregates(self):
@@ -2135,7 +2216,7 @@ class NetAppClientCmodeTestCase(test.TestCase):
     def test_get_node_for_aggregate_api_not_found(self):
 
         self.mock_object(self.client,
-                         'send_iter_request',
+                         'send_iter_request_records',
                          mock.Mock(side_effect=self._mock_api_error(
                              netapp_api.EAPINOTFOUND)))
 
@@ -2146,7 +2227,7 @@ class NetAppClientCmodeTestCase(test.TestCase):
     def test_get_node_for_aggregate_api_error(self):
 
         self.mock_object(self.client,
-                         'send_iter_request',
+                         'send_iter_request_records',
                          self._mock_api_error())
 
         self.assertRaises(netapp_api.NaApiError,
@@ -2156,9 +2237,7 @@ class NetAppClientCmodeTestCase(test.TestCase):
     def test_get_node_for_aggregate_not_found(self):
 
         api_response = netapp_api.NaElement(fake.NO_RECORDS_RESPONSE)
-        self.mock_object(self.client,
-                         'send_iter_request',
-                         mock.Mock(return_value=api_response))
+        self._mock_send_iter_request_records(api_response)
 
         result = self.client.get_node_for_aggregate(fake.SHARE_AGGREGATE_NAME)
 
@@ -2297,13 +2376,11 @@ class NetAppClientCmodeTestCase(test.TestCase):
     def test_get_aggregates(self):
 
         api_response = netapp_api.NaElement(fake.AGGR_GET_ITER_RESPONSE)
-        self.mock_object(self.client,
-                         'send_iter_request',
-                         mock.Mock(return_value=api_response))
+        self._mock_send_iter_request_records(api_response)
 
         result = self.client._get_aggregates()
 
-        self.client.send_iter_request.assert_has_calls([
+        self.client.send_iter_request_records.assert_has_calls([
             mock.call('aggr-get-iter', {})])
         self.assertListEqual(
             [aggr.to_string() for aggr in api_response.get_child_by_name(
@@ -2313,9 +2390,7 @@ class NetAppClientCmodeTestCase(test.TestCase):
     def test_get_aggregates_with_filters(self):
 
         api_response = netapp_api.NaElement(fake.AGGR_GET_SPACE_RESPONSE)
-        self.mock_object(self.client,
-                         'send_iter_request',
-                         mock.Mock(return_value=api_response))
+        self._mock_send_iter_request_records(api_response)
 
         desired_attributes = {
             'aggr-attributes': {
@@ -2340,7 +2415,7 @@ class NetAppClientCmodeTestCase(test.TestCase):
             'desired-attributes': desired_attributes
         }
 
-        self.client.send_iter_request.assert_has_calls([
+        self.client.send_iter_request_records.assert_has_calls([
             mock.call('aggr-get-iter', aggr_get_iter_args)])
         self.assertListEqual(
             [aggr.to_string() for aggr in api_response.get_child_by_name(
@@ -2350,13 +2425,11 @@ class NetAppClientCmodeTestCase(test.TestCase):
     def test_get_aggregates_not_found(self):
 
         api_response = netapp_api.NaElement(fake.NO_RECORDS_RESPONSE)
-        self.mock_object(self.client,
-                         'send_iter_request',
-                         mock.Mock(return_value=api_response))
+        self._mock_send_iter_request_records(api_response)
 
         result = self.client._get_aggregates()
 
-        self.client.send_iter_request.assert_has_calls([
+        self.client.send_iter_request_records.assert_has_calls([
             mock.call('aggr-get-iter', {})])
         self.assertListEqual([], result)
 
@@ -5811,6 +5884,88 @@ class NetAppClientCmodeTestCase(test.TestCase):
         self.client.send_iter_request.assert_has_calls([
             mock.call('volume-get-iter', volume_get_iter_args)])
 
+    def test_get_volumes_ensure_info(self):
+
+        api_response = netapp_api.NaElement(
+            fake.VOLUME_GET_ITER_ENSURE_INFO_RESPONSE)
+        self._mock_send_iter_request_records(api_response)
+
+        result = self.client.get_volumes_ensure_info()
+
+        volume_get_iter_args = {
+            'desired-attributes': {
+                'volume-attributes': {
+                    'volume-id-attributes': {
+                        'junction-path': None,
+                        'name': None,
+                    },
+                    'volume-export-attributes': {
+                        'policy': None,
+                    },
+                    'volume-snapshot-attributes': {
+                        'snapshot-policy': None,
+                        'snapdir-access-enabled': None,
+                    },
+                    'volume-space-attributes': {
+                        'is-space-reporting-logical': None,
+                    },
+                },
+            },
+        }
+        expected = {
+            fake.SHARE_NAME: {
+                'name': fake.SHARE_NAME,
+                'junction-path': '/%s' % fake.SHARE_NAME,
+                'export-policy': fake.EXPORT_POLICY_NAME,
+                'snapshot-policy': 'default',
+                'snapdir-access-enabled': 'true',
+                'is-space-reporting-logical': 'false',
+            },
+            fake.SHARE_NAME_2: {
+                'name': fake.SHARE_NAME_2,
+                'junction-path': None,
+                'export-policy': 'default',
+                'snapshot-policy': None,
+                'snapdir-access-enabled': None,
+                'is-space-reporting-logical': None,
+            },
+        }
+        self.assertEqual(expected, result)
+        self.client.send_iter_request_records.assert_called_once_with(
+            'volume-get-iter', volume_get_iter_args)
+
+    def test_get_volumes_used_size(self):
+
+        api_response = netapp_api.NaElement(
+            fake.VOLUME_GET_ITER_USED_SIZE_RESPONSE)
+        self._mock_send_iter_request_records(api_response)
+
+        result = self.client.get_volumes_used_size('share_*')
+
+        volume_get_iter_args = {
+            'query': {
+                'volume-attributes': {
+                    'volume-id-attributes': {
+                        'name': 'share_*',
+                    },
+                },
+            },
+            'desired-attributes': {
+                'volume-attributes': {
+                    'volume-id-attributes': {
+                        'name': None,
+                    },
+                    'volume-space-attributes': {
+                        'size-used': None,
+                    },
+                },
+            },
+        }
+        self.assertEqual({fake.SHARE_NAME: int(fake.SHARE_USED_SIZE)},
+                         result)
+        self.client.send_iter_request_records.assert_called_once_with(
+            'volume-get-iter', volume_get_iter_args)
+
     def test_get_nfs_export_policy_for_volume_not_found(self):
 
         api_response = netapp_api.NaElement(fake.NO_RECORDS_RESPONSE)
@@ -7072,9 +7227,7 @@ class NetAppClientCmodeTestCase(test.TestCase):
     def test__get_snapmirrors(self):
 
         api_response = netapp_api.NaElement(fake.SNAPMIRROR_GET_ITER_RESPONSE)
-        self.mock_object(self.client,
-                         'send_iter_request',
-                         mock.Mock(return_value=api_response))
+        self._mock_send_iter_request_records(api_response)
 
         desired_attributes = {
             'snapmirror-info': {
@@ -7112,31 +7265,27 @@ class NetAppClientCmodeTestCase(test.TestCase):
                 },
             },
         }
-        self.client.send_iter_request.assert_has_calls([
+        self.client.send_iter_request_records.assert_has_calls([
             mock.call('snapmirror-get-iter', snapmirror_get_iter_args)])
-        self.assertEqual(1, len(result))
+        self.assertEqual(1, len(list(result)))
 
     def test__get_snapmirrors_not_found(self):
 
         api_response = netapp_api.NaElement(fake.NO_RECORDS_RESPONSE)
-        self.mock_object(self.client,
-                         'send_iter_request',
-                         mock.Mock(return_value=api_response))
+        self._mock_send_iter_request_records(api_response)
 
         result = self.client._get_snapmirrors()
 
-        self.client.send_iter_request.assert_has_calls([
+        self.client.send_iter_request_records.assert_has_calls([
             mock.call('snapmirror-get-iter', {})])
 
-        self.assertEqual([], result)
+        self.assertEqual([], list(result))
 
     def test_get_snapmirrors(self):
 
         api_response = netapp_api.NaElement(
             fake.SNAPMIRROR_GET_ITER_FILTERED_RESPONSE)
-        self.mock_object(self.client,
-                         'send_iter_request',
-                         mock.Mock(return_value=api_response))
+        self._mock_send_iter_request_records(api_response)
 
         desired_attributes = ['source-vserver', 'source-volume',
                               'destination-vserver', 'destination-volume',
@@ -7184,7 +7333,7 @@ class NetAppClientCmodeTestCase(test.TestCase):
             'relationship-status': 'idle'
         }]
 
-        self.client.send_iter_request.assert_has_calls([
+        self.client.send_iter_request_records.assert_has_calls([
             mock.call('snapmirror-get-iter', snapmirror_get_iter_args)])
         self.assertEqual(expected, result)
 
@@ -7192,9 +7341,7 @@ class NetAppClientCmodeTestCase(test.TestCase):
 
         api_response = netapp_api.NaElement(
             fake.SNAPMIRROR_GET_ITER_FILTERED_RESPONSE_2)
-        self.mock_object(self.client,
-                         'send_iter_request',
-                         mock.Mock(return_value=api_response))
+        self._mock_send_iter_request_records(api_response)
 
         desired_attributes = ['source-vserver', 'destination-vserver',
                               'relationship-status', 'mirror-state']
@@ -7228,7 +7375,7 @@ class NetAppClientCmodeTestCase(test.TestCase):
             'mirror-state': 'snapmirrored',
         }]
 
-        self.client.send_iter_request.assert_has_calls([
+        self.client.send_iter_request_records.assert_has_calls([
             mock.call('snapmirror-get-iter', snapmirror_get_iter_args)])
         self.assertEqual(expected, result)
 
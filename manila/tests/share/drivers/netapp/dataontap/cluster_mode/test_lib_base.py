@@ -2320,11 +2320,45 @@ class NetAppFileStorageLibraryTestCase(test.TestCase):
         self.assertEqual(fake.NFS_EXPORTS, result)
         mock_get_export_addresses_with_metadata.assert_called_once_with(
             fake.SHARE, fake.SHARE_SERVER, fake.LIFS, expected_host,
-            cluster_client)
+            cluster_client, cache=None)
         protocol_helper.create_share.assert_called_once_with(
             fake.SHARE, fake.SHARE_NAME, clear_current_export_policy=True,
             ensure_share_already_exists=False, replica=False,
-            is_flexgroup=False)
+            is_flexgroup=False, volume=None)
+
+    def test_create_export_with_cache(self):
+
+        protocol_helper = mock.Mock()
+        protocol_helper.create_share.return_value = (
+            lambda export_address: export_address)
+        self.mock_object(self.library,
+                         '_get_helper',
+                         mock.Mock(return_value=protocol_helper))
+        self.mock_object(self.library,
+                         '_is_flexgroup_pool', mock.Mock(return_value=False))
+        self.mock_object(self.library, '_get_aggregate_node',
+                         mock.Mock(return_value=fake.CLUSTER_NODES[0]))
+        vserver_client = mock.Mock()
+        vserver_client.get_network_interfaces.return_value = fake.LIFS
+        volume = {'junction-path': '/%s' % fake.SHARE_NAME}
+        cache = {}
+
+        for i in range(2):
+            self.library._create_export(fake.SHARE,
+                                        fake.SHARE_SERVER,
+                                        fake.VSERVER1,
+                                        vserver_client,
+                                        volume=volume,
+                                        cache=cache)
+
+        vserver_client.get_network_interfaces.assert_called_once_with(
+            protocols=[fake.SHARE['share_proto']])
+        self.library._get_aggregate_node.assert_called_once_with(
+            fake.POOL_NAME, None)
+        protocol_helper.create_share.assert_called_with(
+            fake.SHARE, fake.SHARE_NAME, clear_current_export_policy=True,
+            ensure_share_already_exists=False, replica=False,
+            is_flexgroup=False, volume=volume)
 
     def test_create_export_lifs_not_found(self):
 
@@ -7080,6 +7114,109 @@ class NetAppFileStorageLibraryTestCase(test.TestCase):
                                                 snap_dict,
                                                 share_server=fake.SHARE_SERVER)
 
+    @ddt.data(True, False)
+    def test_update_share_usage_size(self, have_cluster_creds):
+        self.library._have_cluster_creds = have_cluster_creds
+        vserver_client = mock.Mock()
+        self.mock_object(self.library, '_get_vserver',
+                         mock.Mock(return_value=(fake.VSERVER1,
+                                                 vserver_client)))
+        client = self.client if have_cluster_creds else vserver_client
+        self.mock_object(client, 'get_volumes_used_size',
+                         mock.Mock(return_value={
+                             'share_s_1': 3 * units.Gi,
+                             'share_s_2': units.Gi // 2,
+                         }))
+        self.mock_object(timeutils, 'utcnow',
+                         mock.Mock(return_value='fake_now'))
+        shares = [
+            fake_share.fake_share_instance(id='s-1'),
+            fake_share.fake_share_instance(id='s-2'),
+            fake_share.fake_share_instance(id='s-3'),
+        ]
+
+        result = self.library.update_share_usage_size(self.context, shares)
+
+        expected = [
+            {'id': 's-1', 'used_size': 3.0, 'gathered_at': 'fake_now'},
+            {'id': 's-2', 'used_size': 0.5, 'gathered_at': 'fake_now'},
+        ]
+        self.assertEqual(expected, result)
+        client.get_volumes_used_size.assert_called_once_with('share_*')
+        self.assertEqual(not have_cluster_creds,
+                         self.library._get_vserver.called)
+
+    def test_ensure_shares(self):
+        self.library.configuration.netapp_ensure_shares_concurrency = 2
+        share_server_1 = {'id': 'fake_server_1'}
+        share_server_2 = {'id': 'fake_server_2'}
+        shares = [
+            fake_share.fake_share_instance(id='s-1',
+                                           share_server=share_server_1),
+            fake_share.fake_share_instance(id='s-2',
+                                           share_server=share_server_2),
+            fake_share.fake_share_instance(id='s-3',
+                                           share_server=share_server_1),
+        ]
+        volume = {'name': 'share_s_1'}
+        vserver_client_1 = mock.Mock()
+        vserver_client_1.get_volumes_ensure_info.return_value = {
+            'share_s_1': volume,
+        }
+        vserver_client_2 = mock.Mock()
+        vserver_client_2.get_volumes_ensure_info.side_effect = (
+            netapp_api.NaApiError)
+        self.mock_object(
+            self.library, '_get_vserver',
+            mock.Mock(side_effect=lambda share_server: {
+                'fake_server_1': (fake.VSERVER1, vserver_client_1),
+                'fake_server_2': (fake.VSERVER2, vserver_client_2),
+            }[share_server['id']]))
+        self.mock_object(self.library, 'update_share',
+                         mock.Mock(return_value=fake.NFS_EXPORTS))
+
+        result = self.library.ensure_shares(self.context, shares)
+
+        expected = {
+            share_id: {
+                'export_locations': fake.NFS_EXPORTS,
+                'status': constants.STATUS_AVAILABLE,
+            } for share_id in ('s-1', 's-2')
+        }
+        self.assertEqual(expected, result)
+        self.assertEqual(2, self.library._get_vserver.call_count)
+        self.library.update_share.assert_has_calls([
+            mock.call(shares[0], share_server=share_server_1, volume=volume,
+                      cache={}),
+            mock.call(shares[1], share_server=share_server_2, volume=None,
+                      cache={}),
+        ], any_order=True)
+        self.assertEqual(2, self.library.update_share.call_count)
+
+    def test_ensure_shares_update_share_error(self):
+        shares = [
+            fake_share.fake_share_instance(id='s-1', share_server=None),
+            fake_share.fake_share_instance(id='s-2', share_server=None),
+        ]
+        vserver_client = mock.Mock()
+        vserver_client.get_volumes_ensure_info.return_value = {
+            'share_s_1': {'name': 'share_s_1'},
+            'share_s_2': {'name': 'share_s_2'},
+        }
+        self.mock_object(self.library, '_get_vserver',
+                         mock.Mock(return_value=(fake.VSERVER1,
+                                                 vserver_client)))
+        self.mock_object(
+            self.library, 'update_share',
+            mock.Mock(side_effect=[exception.NetAppException('fake'),
+                                   fake.NFS_EXPORTS]))
+
+        result = self.library.ensure_shares(self.context, shares)
+
+        self.assertEqual(['s-2'], list(result))
+        self.library._get_vserver.assert_called_once_with(share_server=None)
+        vserver_client.get_volumes_ensure_info.assert_called_once_with()
+
     # @ddt.data('default', 'hidden', 'visible')
     # def test_get_backend_info(self, snapdir):
     #
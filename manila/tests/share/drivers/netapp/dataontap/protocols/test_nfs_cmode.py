@@ -73,6 +73,29 @@ class NetAppClusteredNFSHelperTestCase(test.TestCase):
         else:
             self.assertTrue(self.mock_client.get_volume_junction_path.called)
 
+    @ddt.data(fake.EXPORT_POLICY_NAME, 'default')
+    def test_create_share_with_volume(self, export_policy):
+
+        mock_ensure_export_policy = self.mock_object(self.helper,
+                                                     '_ensure_export_policy')
+        volume = {
+            'export-policy': export_policy,
+            'junction-path': fake.NFS_SHARE_PATH,
+        }
+
+        result = self.helper.create_share(fake.NFS_SHARE, fake.SHARE_NAME,
+                                          clear_current_export_policy=False,
+                                          volume=volume)
+
+        self.assertEqual(fake.SHARE_ADDRESS_1 + ":" + fake.NFS_SHARE_PATH,
+                         result(fake.SHARE_ADDRESS_1))
+        self.assertFalse(
+            self.mock_client.clear_nfs_export_policy_for_volume.called)
+        self.assertEqual(export_policy != fake.EXPORT_POLICY_NAME,
+                         mock_ensure_export_policy.called)
+        self.assertFalse(self.mock_client.get_volume_junction_path.called)
+        self.assertFalse(self.mock_client.get_volume.called)
+
     def test_delete_share(self):
 
         self.helper.delete_share(fake.NFS_SHARE, fake.SHARE_NAME)
@@ -253,7 +253,7 @@ class ShareAPITestCase(test.TestCase):
             ctx, sort_dir='desc', sort_key='created_at',
             project_id='fake_pid_1',
             filters={'list_deferred_delete': True},
-            is_public=False
+            is_public=False, detailed=True
         )
         self.assertEqual(_FAKE_LIST_OF_ALL_SHARES[0], shares)
 
@@ -270,7 +270,7 @@ class ShareAPITestCase(test.TestCase):
                       do_raise=False)])
         db_api.share_get_all.assert_called_once_with(
             ctx, sort_dir='desc', sort_key='created_at',
-            filters={'list_deferred_delete': True})
+            filters={'list_deferred_delete': True}, detailed=True)
         self.assertEqual(_FAKE_LIST_OF_ALL_SHARES, shares)
 
     def test_get_all_admin_filter_by_all_tenants_with_blank(self):
@@ -286,7 +286,7 @@ class ShareAPITestCase(test.TestCase):
                       do_raise=False)])
         db_api.share_get_all.assert_called_once_with(
             ctx, sort_dir='desc', sort_key='created_at',
-            filters={'list_deferred_delete': True})
+            filters={'list_deferred_delete': True}, detailed=True)
         self.assertEqual(_FAKE_LIST_OF_ALL_SHARES, shares)
 
     def test_get_all_admin_filter_by_all_tenants_with_false(self):
@@ -303,7 +303,7 @@ class ShareAPITestCase(test.TestCase):
         db_api.share_get_all_by_project.assert_called_once_with(
             ctx, sort_dir='desc', sort_key='created_at',
             project_id='fake_pid_1', filters={'list_deferred_delete': True},
-            is_public=False
+            is_public=False, detailed=True
         )
         self.assertEqual(_FAKE_LIST_OF_ALL_SHARES[0], shares)
 
@@ -362,6 +362,7 @@ class ShareAPITestCase(test.TestCase):
         db_api.share_get_all_by_share_server.assert_called_once_with(
             ctx, 'fake_server_3', sort_dir='desc', sort_key='created_at',
             filters={'list_deferred_delete': True},
+            detailed=True,
         )
         db_api.share_get_all_by_project.assert_has_calls([])
         db_api.share_get_all.assert_has_calls([])
@@ -381,7 +382,8 @@ class ShareAPITestCase(test.TestCase):
         ])
         db_api.share_get_all_by_project.assert_called_once_with(
             ctx, sort_dir='desc', sort_key='created_at',
-            project_id='fake_pid_2', filters=expected_filters, is_public=False
+            project_id='fake_pid_2', filters=expected_filters, is_public=False,
+            detailed=True
         )
         self.assertEqual(_FAKE_LIST_OF_ALL_SHARES[1::2], shares)
 
@@ -416,7 +418,7 @@ class ShareAPITestCase(test.TestCase):
         db_api.share_get_all_by_project.assert_called_once_with(
             ctx, sort_dir='desc', sort_key='created_at',
             project_id='fake_pid_2',
-            filters=expected_filters, is_public=False
+            filters=expected_filters, is_public=False, detailed=True
         )
         self.assertEqual(get_share_number, len(shares))
         self.assertEqual(expected_result, shares)
@@ -435,7 +437,7 @@ class ShareAPITestCase(test.TestCase):
             project_id='fake_pid_2',
             filters={'export_location_' + type: 'test',
                      'list_deferred_delete': True},
-            is_public=False
+            is_public=False, detailed=True
         )
         self.assertEqual(_FAKE_LIST_OF_ALL_SHARES[1:], shares)
 
@@ -449,7 +451,7 @@ class ShareAPITestCase(test.TestCase):
         ])
         db_api.share_get_all.assert_called_once_with(
             ctx, sort_dir='desc', sort_key='created_at',
-            filters={'list_deferred_delete': True})
+            filters={'list_deferred_delete': True}, detailed=True)
         self.assertEqual(_FAKE_LIST_OF_ALL_SHARES[:1], shares)
 
     def test_get_all_admin_filter_by_status(self):
@@ -466,7 +468,8 @@ class ShareAPITestCase(test.TestCase):
         ])
         db_api.share_get_all_by_project.assert_called_once_with(
             ctx, sort_dir='desc', sort_key='created_at',
-            project_id='fake_pid_2', filters=expected_filter, is_public=False
+            project_id='fake_pid_2', filters=expected_filter, is_public=False,
+            detailed=True
         )
         self.assertEqual(_FAKE_LIST_OF_ALL_SHARES[0::2], shares)
 
@@ -484,7 +487,7 @@ class ShareAPITestCase(test.TestCase):
         ])
         db_api.share_get_all.assert_called_once_with(
             ctx, sort_dir='desc', sort_key='created_at',
-            filters=expected_filter)
+            filters=expected_filter, detailed=True)
         self.assertEqual(_FAKE_LIST_OF_ALL_SHARES[1::2], shares)
 
     def test_get_all_non_admin_filter_by_all_tenants(self):
@@ -501,7 +504,8 @@ class ShareAPITestCase(test.TestCase):
         ])
         db_api.share_get_all_by_project.assert_called_once_with(
             ctx, sort_dir='desc', sort_key='created_at',
-            project_id='fake_pid_2', filters={}, is_public=False
+            project_id='fake_pid_2', filters={}, is_public=False,
+            detailed=True
         )
         self.assertEqual(_FAKE_LIST_OF_ALL_SHARES[1:], shares)
 
@@ -525,7 +529,8 @@ class ShareAPITestCase(test.TestCase):
 
         db_api.share_get_all_by_project.assert_called_once_with(
             ctx, sort_dir='desc', sort_key='created_at',
-            project_id='fake_pid_2', filters=expected_filter_1, is_public=False
+            project_id='fake_pid_2', filters=expected_filter_1,
+            is_public=False, detailed=True
         )
 
         # two items expected, one filtered
@@ -549,11 +554,11 @@ class ShareAPITestCase(test.TestCase):
             mock.call(
                 ctx, sort_dir='desc', sort_key='created_at',
                 project_id='fake_pid_2', filters=expected_filter_1,
-                is_public=False),
+                is_public=False, detailed=True),
             mock.call(
                 ctx, sort_dir='desc', sort_key='created_at',
                 project_id='fake_pid_2', filters=expected_filter_2,
-                is_public=False),
+                is_public=False, detailed=True),
         ])
 
     @ddt.data('True', 'true', '1', 'yes', 'y', 'on', 't', True)
@@ -570,7 +575,7 @@ class ShareAPITestCase(test.TestCase):
         ])
         db_api.share_get_all_by_project.assert_called_once_with(
             ctx, sort_dir='desc', sort_key='created_at',
-            project_id='fake_pid_2', filters={}, is_public=True
+            project_id='fake_pid_2', filters={}, is_public=True, detailed=True
         )
         self.assertEqual(_FAKE_LIST_OF_ALL_SHARES[1:], shares)
 
@@ -589,7 +594,8 @@ class ShareAPITestCase(test.TestCase):
         ])
         db_api.share_get_all_by_project.assert_called_once_with(
             ctx, sort_dir='desc', sort_key='created_at',
-            project_id='fake_pid_2', filters={}, is_public=False
+            project_id='fake_pid_2', filters={}, is_public=False,
+            detailed=True
         )
         self.assertEqual(_FAKE_LIST_OF_ALL_SHARES[1:], shares)
 
@@ -617,7 +623,8 @@ class ShareAPITestCase(test.TestCase):
                       do_raise=False)])
         db_api.share_get_all_by_project.assert_called_once_with(
             ctx, sort_dir='asc', sort_key='status',
-            project_id='fake_pid_1', filters={}, is_public=False
+            project_id='fake_pid_1', filters={}, is_public=False,
+            detailed=True
         )
         self.assertEqual(_FAKE_LIST_OF_ALL_SHARES[0], shares)
 
@@ -674,7 +681,8 @@ class ShareAPITestCase(test.TestCase):
 
         db_api.share_get_all_by_project.assert_called_once_with(
             ctx, sort_dir='desc', sort_key='created_at',
-            project_id='fake_pid_1', filters=search_opts, is_public=False)
+            project_id='fake_pid_1', filters=search_opts, is_public=False,
+            detailed=True)
         self.assertEqual(_FAKE_LIST_OF_ALL_SHARES[0], shares)
 
     def test_get_all_filter_by_metadata(self):
@@ -2723,6 +2731,34 @@ class ShareAPITestCase(test.TestCase):
             db_api.share_get.assert_called_once_with(
                 self.context, 'fakeid')
 
+    @ddt.data(True, False)
+    def test_get_by_export_location_path(self, is_admin):
+        ctx = context.RequestContext('fake_user', 'fake_project',
+                                     is_admin=is_admin)
+        share = db_utils.create_share()
+        self.mock_object(db_api, 'share_get_by_export_location_path',
+                         mock.Mock(return_value=share['id']))
+        self.mock_object(self.api, 'get', mock.Mock(return_value=share))
+
+        result = self.api.get_by_export_location_path(ctx, 'fake_path')
+
+        self.assertEqual(share, result)
+        db_api.share_get_by_export_location_path.assert_called_once_with(
+            ctx, 'fake_path', project_id=None if is_admin else 'fake_project',
+            is_public=True)
+        self.api.get.assert_called_once_with(ctx, share['id'])
+
+    def test_get_by_export_location_path_not_authorized(self):
+        share = db_utils.create_share(is_public=False)
+        self.mock_object(db_api, 'share_get_by_export_location_path',
+                         mock.Mock(return_value=share['id']))
+        self.mock_object(
+            policy, 'check_policy', mock.Mock(return_value=False))
+
+        self.assertRaises(exception.NotFound,
+                          self.api.get_by_export_location_path,
+                          self.context, 'fake_path')
+
     def test_get_admin_deferred_state(self):
         rv = {
             'id': 'fake_id',
@@ -2776,7 +2812,7 @@ class ShareAPITestCase(test.TestCase):
                 do_raise=False)])
         db_api.share_snapshot_get_all_by_project.assert_called_once_with(
             ctx, 'fakepid', limit=None, offset=None, sort_dir='desc',
-            sort_key='share_id', filters={})
+            sort_key='share_id', filters={}, marker=None)
 
     @mock.patch.object(db_api, 'share_snapshot_get_all', mock.Mock())
     def test_get_all_snapshots_admin_all_tenants(self):
@@ -2792,7 +2828,7 @@ class ShareAPITestCase(test.TestCase):
                 do_raise=False)])
         db_api.share_snapshot_get_all.assert_called_once_with(
             self.context, limit=None, offset=None, sort_dir='desc',
-            sort_key='share_id', filters={})
+            sort_key='share_id', filters={}, marker=None)
 
     @mock.patch.object(db_api, 'share_snapshot_get_all_by_project',
                        mock.Mock())
@@ -2809,7 +2845,7 @@ class ShareAPITestCase(test.TestCase):
                 do_raise=False)])
         db_api.share_snapshot_get_all_by_project.assert_called_once_with(
             ctx, 'fakepid', limit=None, offset=None, sort_dir='desc',
-            sort_key='share_id', filters={})
+            sort_key='share_id', filters={}, marker=None)
 
     def test_get_all_snapshots_not_admin_search_opts(self):
         search_opts = {'size': 'fakesize'}
@@ -2831,7 +2867,7 @@ class ShareAPITestCase(test.TestCase):
                 do_raise=False)])
         db_api.share_snapshot_get_all_by_project.assert_called_once_with(
             ctx, 'fakepid', limit=None, offset=None, sort_dir='desc',
-            sort_key='share_id', filters=search_opts)
+            sort_key='share_id', filters=search_opts, marker=None)
 
     @ddt.data(({'name': 'fo'}, 0, []), ({'description': 'd'}, 0, []),
               ({'name': 'foo', 'description': 'd'}, 0, []),
@@ -2872,7 +2908,7 @@ class ShareAPITestCase(test.TestCase):
                 do_raise=False)])
         db_api.share_snapshot_get_all_by_project.assert_called_once_with(
             ctx, 'fakepid', limit=None, offset=None, sort_dir='desc',
-            sort_key='share_id', filters=search_opts)
+            sort_key='share_id', filters=search_opts, marker=None)
 
     def test_get_all_snapshots_with_sorting_valid(self):
         self.mock_object(
@@ -2892,7 +2928,7 @@ class ShareAPITestCase(test.TestCase):
 
         db_api.share_snapshot_get_all_by_project.assert_called_once_with(
             ctx, 'fake_pid_1', limit=None, offset=None, sort_dir='asc',
-            sort_key='status', filters={})
+            sort_key='status', filters={}, marker=None)
         self.assertEqual(_FAKE_LIST_OF_ALL_SNAPSHOTS[0], snapshots)
 
     def test_get_all_snapshots_sort_key_invalid(self):
@@ -40,6 +40,7 @@ from manila.share import manager
 from manila.share import migration as migration_api
 from manila.share import rpcapi
 from manila.share import share_types
+from manila.share import utils as share_utils
 from manila import test
 from manila.tests.api import fakes as test_fakes
 from manila.tests import db_utils
@@ -192,7 +193,8 @@ class ShareManagerTestCase(test.TestCase):
         self.assertTrue(self.share_manager.driver.initialized)
         (self.share_manager.db.share_instances_get_all_by_host.
             assert_called_once_with(utils.IsAMatcher(context.RequestContext),
-                                    self.share_manager.host))
+                                    self.share_manager.host,
+                                    with_share_data=True))
         self.share_manager.driver.do_setup.assert_called_once_with(
             utils.IsAMatcher(context.RequestContext))
         (self.share_manager.driver.check_for_setup_error.
@@ -293,6 +295,8 @@ class ShareManagerTestCase(test.TestCase):
                 display_name='fake_name_7').instance,
         ]
 
+        for instance in instances:
+            instance.share = db.share_get(self.context, instance['share_id'])
         instances[4]['access_rules_status'] = (
             constants.SHARE_INSTANCE_RULES_SYNCING)
 
@@ -345,9 +349,7 @@ class ShareManagerTestCase(test.TestCase):
             mock.Mock(return_value=instances))
         # instance 0 and 2 are reloaded
         self.mock_object(self.share_manager.db, 'share_instance_get',
-                         mock.Mock(side_effect=[instances[0], instances[2],
-                                                instances[4], instances[0],
-                                                instances[2]]))
+                         mock.Mock(side_effect=[instances[0], instances[2]]))
         self.mock_object(self.share_manager.db,
                          'share_export_locations_update')
         mock_ensure_shares = self.mock_object(
@@ -395,7 +397,7 @@ class ShareManagerTestCase(test.TestCase):
                 [dict_instances[0], dict_instances[2], dict_instances[4]])
             mock_share_get_all_by_host.assert_called_once_with(
                 utils.IsAMatcher(context.RequestContext),
-                self.share_manager.host)
+                self.share_manager.host, with_share_data=True)
             exports_update.assert_has_calls([
                 mock.call(mock.ANY, instances[0]['id'], fake_export_locations,
                           reexport=True),
@@ -480,7 +482,7 @@ class ShareManagerTestCase(test.TestCase):
             mock_ensure_shares.assert_not_called()
             mock_share_instances_get_all_by_host.assert_called_once_with(
                 utils.IsAMatcher(context.RequestContext),
-                self.share_manager.host)
+                self.share_manager.host, with_share_data=True)
 
     @ddt.data(exception.ManilaException, ['fake/path/1', 'fake/path'])
     def test_init_host_with_ensure_share(self, expected_ensure_share_result):
@@ -492,9 +494,6 @@ class ShareManagerTestCase(test.TestCase):
         self.mock_object(self.share_manager.db,
                          'share_instances_get_all_by_host',
                          mock.Mock(return_value=instances))
-        self.mock_object(self.share_manager.db, 'share_instance_get',
-                         mock.Mock(side_effect=[instances[0], instances[2],
-                                                instances[3]]))
         self.mock_object(
             self.share_manager.driver, 'ensure_shares',
             mock.Mock(side_effect=raise_NotImplementedError))
@@ -519,7 +518,8 @@ class ShareManagerTestCase(test.TestCase):
         # verification of call
         (self.share_manager.db.share_instances_get_all_by_host.
             assert_called_once_with(utils.IsAMatcher(context.RequestContext),
-                                    self.share_manager.host))
+                                    self.share_manager.host,
+                                    with_share_data=True))
         self.share_manager.driver.do_setup.assert_called_once_with(
             utils.IsAMatcher(context.RequestContext))
         self.share_manager.driver.check_for_setup_error.assert_called_with()
@@ -532,7 +532,7 @@ class ShareManagerTestCase(test.TestCase):
         ])
         self.share_manager.driver.ensure_shares.assert_called_once_with(
             utils.IsAMatcher(context.RequestContext),
-            [dict_instances[0], dict_instances[2], dict_instances[3]])
+            [dict_instances[0], dict_instances[2], dict_instances[4]])
         self.share_manager._get_share_server.assert_has_calls([
             mock.call(utils.IsAMatcher(context.RequestContext), instances[0]),
             mock.call(utils.IsAMatcher(context.RequestContext), instances[2]),
@@ -608,9 +608,6 @@ class ShareManagerTestCase(test.TestCase):
         self.mock_object(self.share_manager.db,
                          'share_instances_get_all_by_host',
                          mock.Mock(return_value=instances))
-        self.mock_object(self.share_manager.db, 'share_instance_get',
-                         mock.Mock(side_effect=[instances[0], instances[2],
-                                                instances[3]]))
         self.mock_object(
             self.share_manager.driver, 'ensure_shares',
             mock.Mock(side_effect=raise_exception))
@@ -628,7 +625,8 @@ class ShareManagerTestCase(test.TestCase):
         # verification of call
         (self.share_manager.db.share_instances_get_all_by_host.
          assert_called_once_with(utils.IsAMatcher(context.RequestContext),
-                                 self.share_manager.host))
+                                 self.share_manager.host,
+                                 with_share_data=True))
         self.share_manager.driver.do_setup.assert_called_once_with(
             utils.IsAMatcher(context.RequestContext))
         self.share_manager.driver.check_for_setup_error.assert_called_with()
@@ -641,7 +639,7 @@ class ShareManagerTestCase(test.TestCase):
         ])
         self.share_manager.driver.ensure_shares.assert_called_once_with(
             utils.IsAMatcher(context.RequestContext),
-            [dict_instances[0], dict_instances[2], dict_instances[3]])
+            [dict_instances[0], dict_instances[2], dict_instances[4]])
         mock_ensure_share.assert_not_called()
 
     def test_init_host_with_exception_on_get_backend_info(self):
@@ -691,8 +689,7 @@ class ShareManagerTestCase(test.TestCase):
         # instances are reloaded
         self.mock_object(self.share_manager.db, 'share_instance_get',
                          mock.Mock(side_effect=[instances[0], instances[2],
-                                                instances[4], instances[0],
-                                                instances[2], instances[4]]))
+                                                instances[4]]))
         self.mock_object(self.share_manager.driver, 'ensure_share',
                          mock.Mock(return_value=None))
         self.mock_object(self.share_manager.driver, 'ensure_shares',
@@ -719,7 +716,7 @@ class ShareManagerTestCase(test.TestCase):
         # verification of call
         (smanager.db.share_instances_get_all_by_host.
             assert_called_once_with(utils.IsAMatcher(context.RequestContext),
-                                    smanager.host))
+                                    smanager.host, with_share_data=True))
         smanager.driver.do_setup.assert_called_once_with(
             utils.IsAMatcher(context.RequestContext))
         smanager.driver.check_for_setup_error.assert_called_with()
@@ -1649,15 +1646,15 @@ class ShareManagerTestCase(test.TestCase):
     @ddt.data('openstack1@watson#_pool0', 'openstack1@newton#_pool0')
     def test_periodic_share_replica_update(self, host):
         mock_debug_log = self.mock_object(manager.LOG, 'debug')
+        backend = share_utils.extract_host(host)
         replicas = [
-            fake_replica(host='openstack1@watson#pool4'),
-            fake_replica(host='openstack1@watson#pool5'),
-            fake_replica(host='openstack1@newton#pool5'),
-            fake_replica(host='openstack1@newton#pool5'),
-
+            fake_replica(host=backend + '#pool4'),
+            fake_replica(host=backend + '#pool5'),
         ]
-        self.mock_object(self.share_manager.db, 'share_replicas_get_all',
-                         mock.Mock(return_value=replicas))
+        mock_get_replicas = self.mock_object(
+            self.share_manager.db,
+            'share_replicas_get_all_non_active_by_host',
+            mock.Mock(return_value=replicas))
         mock_update_method = self.mock_object(
             self.share_manager, '_share_replica_update')
 
@@ -1665,6 +1662,15 @@ class ShareManagerTestCase(test.TestCase):
 
         self.share_manager.periodic_share_replica_update(self.context)
 
+        mock_get_replicas.assert_called_once_with(
+            self.context, backend, with_share_data=False,
+            with_share_server=False)
+        mock_update_method.assert_has_calls([
+            mock.call(self.context, replicas[0]['id'],
+                      share_id=replicas[0]['share_id']),
+            mock.call(self.context, replicas[1]['id'],
+                      share_id=replicas[1]['share_id']),
+        ])
         self.assertEqual(2, mock_update_method.call_count)
         self.assertEqual(1, mock_debug_log.call_count)
 
@@ -4153,6 +4159,90 @@ class ShareManagerTestCase(test.TestCase):
                 mock.call(self.context, fake_share_server['id'], label='admin')
             ]))
 
+    def test__form_server_setup_info_with_network_allocations(self):
+        self.mock_object(
+            self.share_manager.db, 'network_allocations_get_for_share_server')
+        allocations = [
+            {'id': 'foo', 'label': None},
+            {'id': 'bar', 'label': 'user'},
+            {'id': 'admin-foo', 'label': 'admin'},
+        ]
+        fake_share_server = dict(
+            id='fake_share_server_id', backend_details=dict(foo='bar'))
+        fake_share_network = dict(
+            security_services='fake_security_services')
+        fake_share_network_subnet = dict(
+            segmentation_id='fake_segmentation_id',
+            cidr='fake_cidr',
+            neutron_net_id='fake_neutron_net_id',
+            neutron_subnet_id='fake_neutron_subnet_id',
+            network_type='fake_network_type')
+
+        network_info = self.share_manager._form_server_setup_info(
+            self.context, fake_share_server, fake_share_network,
+            fake_share_network_subnet, network_allocations=allocations)
+
+        self.assertEqual(allocations[:2], network_info['network_allocations'])
+        self.assertEqual(allocations[2:],
+                         network_info['admin_network_allocations'])
+        (self.share_manager.db.network_allocations_get_for_share_server.
+            assert_not_called())
+
+    @ddt.data(1, 4)
+    def test_ensure_driver_resources_with_share_servers(self, concurrency):
+        self.flags(share_service_ensure_concurrency=concurrency)
+        share_network = db_utils.create_share_network()
+        subnet = db_utils.create_share_network_subnet(
+            id='fake_subnet_id', share_network_id=share_network['id'],
+            gateway='10.0.0.1')
+        share_servers = [
+            db_utils.create_share_server(
+                host=self.share_manager.host,
+                share_network_subnet_id=subnet['id'])
+            for i in range(3)]
+        db_utils.create_share_server(
+            host=self.share_manager.host,
+            share_network_subnet_id=subnet['id'],
+            status=constants.STATUS_ERROR)
+        for share_server in share_servers:
+            for label in ('user', 'admin'):
+                db.network_allocation_create(self.context, {
+                    'share_server_id': share_server['id'],
+                    'ip_address': '10.0.0.2',
+                    'label': label,
+                })
+        self.mock_object(self.share_manager.driver, 'get_backend_info',
+                         mock.Mock(side_effect=NotImplementedError))
+        self.mock_object(self.share_manager.driver, 'ensure_share_server',
+                         mock.Mock(return_value={'foo': 'bar'}))
+        self.mock_object(self.share_manager.db, 'share_network_get')
+        self.mock_object(self.share_manager.db,
+                         'share_instances_get_all_by_host',
+                         mock.Mock(return_value=[]))
+
+        self.share_manager.ensure_driver_resources(self.context)
+
+        ensure_share_server = self.share_manager.driver.ensure_share_server
+        self.assertEqual(3, ensure_share_server.call_count)
+        self.assertEqual(
+            sorted(s['id'] for s in share_servers),
+            sorted(c[0][1]['id'] for c in ensure_share_server.call_args_list))
+        for call in ensure_share_server.call_args_list:
+            network_info = call[0][2]
+            self.assertEqual(1, len(network_info['network_allocations']))
+            self.assertEqual(
+                '10.0.0.1', network_info['network_allocations'][0]['gateway'])
+            self.assertEqual(
+                1, len(network_info['admin_network_allocations']))
+        self.share_manager.db.share_network_get.assert_not_called()
+        for share_server in share_servers:
+            share_server = db.share_server_get(
+                self.context, share_server['id'])
+            self.assertEqual('bar', share_server['backend_details']['foo'])
+            allocations = db.network_allocations_get_for_share_server(
+                self.context, share_server['id'], label='user')
+            self.assertEqual('10.0.0.1', allocations[0]['gateway'])
+
     @ddt.data(
         {'network_info': {'network_type': 'vlan', 'segmentation_id': '100'}},
         {'network_info': {'network_type': 'vlan', 'segmentation_id': '1'}},
@@ -5545,9 +5635,51 @@ class ShareManagerTestCase(test.TestCase):
                 self.context, new_instance)
             data_rpc.DataAPI.migration_start.assert_called_once_with(
                 self.context, share['id'], ['lost+found'], instance['id'],
-                new_instance['id'], src_connection_info, dest_connection_info)
+                new_instance['id'], src_connection_info, dest_connection_info,
+                precopy_passes=0)
             helper.cleanup_new_instance.assert_called_once_with(new_instance)
 
+    def test__migration_start_host_assisted_precopy(self):
+        share_server = db_utils.create_share_server()
+        instance = db_utils.create_share_instance(
+            share_id='fake_id',
+            status=constants.STATUS_AVAILABLE,
+            share_server_id=share_server['id'])
+        new_instance = db_utils.create_share_instance(
+            share_id='new_fake_id',
+            status=constants.STATUS_AVAILABLE)
+        share = db_utils.create_share(id='fake_id', instances=[instance])
+        config = {'migration_ignore_files': ['lost+found'],
+                  'migration_precopy_passes': 2}
+
+        # mocks
+        helper = mock.Mock()
+        helper.create_instance_and_wait.return_value = new_instance
+        self.mock_object(migration_api, 'ShareMigrationHelper',
+                         mock.Mock(return_value=helper))
+        self.mock_object(self.share_manager.driver.configuration, 'safe_get',
+                         mock.Mock(side_effect=config.get))
+        self.mock_object(self.share_manager.db, 'share_server_get',
+                         mock.Mock(return_value=share_server))
+        self.mock_object(self.share_manager, '_cast_access_rules_to_readonly')
+        self.mock_object(self.share_manager.driver, 'connection_get_info',
+                         mock.Mock(return_value='src_fake_info'))
+        self.mock_object(rpcapi.ShareAPI, 'connection_get_info',
+                         mock.Mock(return_value='dest_fake_info'))
+        self.mock_object(data_rpc.DataAPI, 'migration_start')
+
+        # run
+        self.share_manager._migration_start_host_assisted(
+            self.context, share, instance, 'fake_host', 'fake_net_id',
+            'fake_az_id', 'fake_type_id')
+
+        # asserts
+        self.share_manager._cast_access_rules_to_readonly.assert_not_called()
+        data_rpc.DataAPI.migration_start.assert_called_once_with(
+            self.context, share['id'], ['lost+found'], instance['id'],
+            new_instance['id'], 'src_fake_info', 'dest_fake_info',
+            precopy_passes=2)
+
     @ddt.data({'share_network_id': 'fake_net_id', 'exc': None,
                'has_snapshots': True},
               {'share_network_id': None, 'exc': Exception('fake'),
@@ -7981,25 +8113,30 @@ class ShareManagerTestCase(test.TestCase):
             fake_replica(host='malfoy@manor#_pool0',
                          replica_state=constants.REPLICA_STATE_IN_SYNC)
         ]
-        replicas.append(fake_replica(replica_state=constants.STATUS_ACTIVE))
         snapshot = fakes.fake_snapshot(create_instance=True,
                                        status=constants.STATUS_DELETING)
         snapshot_instances = 3 * [
-            fakes.fake_snapshot_instance(base_snapshot=snapshot)
+            fakes.fake_snapshot_instance(base_snapshot=snapshot,
+                                         share={'share_id': 'fake_share_id'})
         ]
-        self.mock_object(
-            db, 'share_replicas_get_all', mock.Mock(return_value=replicas))
+        mock_get_replicas = self.mock_object(
+            db, 'share_replicas_get_all_non_active_by_host',
+            mock.Mock(return_value=replicas))
         self.mock_object(db, 'share_snapshot_instance_get_all_with_filters',
                          mock.Mock(return_value=snapshot_instances))
         mock_snapshot_update_call = self.mock_object(
             self.share_manager, '_update_replica_snapshot')
+        self.share_manager.host = 'malfoy@manor#_pool0'
 
         retval = self.share_manager.periodic_share_replica_snapshot_update(
             self.context)
 
         self.assertIsNone(retval)
+        mock_get_replicas.assert_called_once_with(
+            self.context, 'malfoy@manor', with_share_data=False,
+            with_share_server=False)
         self.assertEqual(1, mock_debug_log.call_count)
-        self.assertEqual(0, mock_snapshot_update_call.call_count)
+        self.assertEqual(9, mock_snapshot_update_call.call_count)
 
     @ddt.data(True, False)
     def test_periodic_share_replica_snapshot_update_nothing_to_update(
@@ -8009,13 +8146,12 @@ class ShareManagerTestCase(test.TestCase):
             fake_replica(host='malfoy@manor#_pool0',
                          replica_state=constants.REPLICA_STATE_IN_SYNC)
         ]
-        replicas.append(fake_replica(replica_state=constants.STATUS_ACTIVE))
         snapshot = fakes.fake_snapshot(create_instance=True,
                                        status=constants.STATUS_DELETING)
         snapshot_instances = 3 * [
             fakes.fake_snapshot_instance(base_snapshot=snapshot)
         ]
-        self.mock_object(db, 'share_replicas_get_all',
+        self.mock_object(db, 'share_replicas_get_all_non_active_by_host',
                          mock.Mock(side_effect=[[], replicas]))
         self.mock_object(db, 'share_snapshot_instance_get_all_with_filters',
                          mock.Mock(side_effect=[snapshot_instances, []]))
@@ -8232,6 +8368,50 @@ class ShareManagerTestCase(test.TestCase):
         mock_driver_call.assert_called_once_with(
             self.context, instances)
 
+    @ddt.data(0, 2)
+    def test_update_share_usage_size_preloaded(self, batch_size):
+        self.flags(share_usage_size_notification_batch_size=batch_size)
+        instances = self._setup_init_mocks(setup_access_rules=False)[:3]
+        update_shares = [{'id': instance['id'], 'used_size': '3',
+                          'gathered_at': 'fake'} for instance in instances]
+        manager = self.share_manager
+        self.mock_object(manager, 'driver')
+        self.mock_object(manager.db, 'share_instances_get_all_by_host',
+                         mock.Mock(return_value=instances))
+        self.mock_object(manager.db, 'share_instance_get')
+        self.mock_object(manager.db, 'share_get')
+        self.mock_object(manager.driver, 'update_share_usage_size',
+                         mock.Mock(return_value=update_shares))
+        mock_notify = self.mock_object(share_utils,
+                                       'notify_about_share_usage')
+        mock_notify_batch = self.mock_object(share_utils,
+                                             'notify_about_shares_usage')
+
+        self.share_manager.update_share_usage_size(self.context)
+
+        manager.db.share_instance_get.assert_not_called()
+        manager.db.share_get.assert_not_called()
+        extra_usage_info = {'used_size': '3', 'gathered_at': 'fake'}
+        if batch_size:
+            mock_notify.assert_not_called()
+            shares_usage = [
+                (instance['share'], instance, extra_usage_info)
+                for instance in instances]
+            mock_notify_batch.assert_has_calls([
+                mock.call(self.context, shares_usage[:2],
+                          'consumed.size.batch', host=manager.host),
+                mock.call(self.context, shares_usage[2:],
+                          'consumed.size.batch', host=manager.host),
+            ])
+            self.assertEqual(2, mock_notify_batch.call_count)
+        else:
+            mock_notify_batch.assert_not_called()
+            mock_notify.assert_has_calls([
+                mock.call(self.context, instance['share'], instance,
+                          'consumed.size', extra_usage_info=extra_usage_info,
+                          host=manager.host)
+                for instance in instances])
+
     @mock.patch('manila.tests.fake_notifier.FakeNotifier._notify')
     def test_update_share_usage_size_fail(self, mock_notify):
         instances = self._setup_init_mocks(setup_access_rules=False)
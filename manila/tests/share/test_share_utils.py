@@ -211,3 +211,32 @@ class NotifyUsageTestCase(test.TestCase):
             mock.sentinel.context,
             'share.test_suffix',
             mock_usage.return_value)
+
+    @mock.patch('manila.share.utils._usage_from_share')
+    @mock.patch('manila.share.utils.CONF')
+    @mock.patch('manila.share.utils.rpc')
+    def test_notify_about_shares_usage(self, mock_rpc, mock_conf,
+                                       mock_usage):
+        mock_conf.host = 'host1'
+        mock_usage.side_effect = ['usage1', 'usage2']
+        shares_usage = [
+            (mock.sentinel.share1, mock.sentinel.share_instance1,
+             {'a': 'b'}),
+            (mock.sentinel.share2, mock.sentinel.share_instance2, None),
+        ]
+
+        output = share_utils.notify_about_shares_usage(mock.sentinel.context,
+                                                       shares_usage,
+                                                       'test_suffix')
+
+        self.assertIsNone(output)
+        mock_usage.assert_has_calls([
+            mock.call(mock.sentinel.share1, mock.sentinel.share_instance1,
+                      a='b'),
+            mock.call(mock.sentinel.share2, mock.sentinel.share_instance2),
+        ])
+        mock_rpc.get_notifier.assert_called_once_with('share', 'host1')
+        mock_rpc.get_notifier.return_value.info.assert_called_once_with(
+            mock.sentinel.context,
+            'share.test_suffix',
+            {'shares': ['usage1', 'usage2']})
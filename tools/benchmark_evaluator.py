@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+# Measure the cost of evaluating a driver filter function for every pool of
+# a scheduling request, with and without the evaluator parse cache.
+#
+# Usage: python tools/benchmark_evaluator.py [pools] [requests]
+
+import sys
+import timeit
+
+from manila.scheduler.evaluator import evaluator
+
+EXPRESSION = ("share.size < stats.free_capacity_gb * 0.9 and "
+              "(capabilities.thin_provisioning == 1 ? "
+              "stats.total_capacity_gb > 100 : share.size < 1024)")
+
+
+def run_request(pools, uncached):
+    for i in range(pools):
+        if uncached:
+            evaluator._parse.cache_clear()
+        evaluator.evaluate(
+            EXPRESSION,
+            share={'size': 10},
+            stats={'free_capacity_gb': i, 'total_capacity_gb': 2 * i},
+            capabilities={'thin_provisioning': i % 2})
+
+
+def main():
+    pools = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    for label, uncached in (('uncached', True), ('cached', False)):
+        evaluator._parse.cache_clear()
+        elapsed = timeit.timeit(lambda: run_request(pools, uncached),
+                                number=requests)
+        print("%-8s %d pools: %.2f ms per request" %
+              (label, pools, elapsed * 1000 / requests))
+
+
+if __name__ == '__main__':
+    main()
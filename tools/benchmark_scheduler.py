@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+# Measure the share scheduling decisions of the FilterScheduler offline.
+#
+# The capability reports of the share backends are either synthesised for
+# --hosts backends with --pools pools each, or replayed from a JSON file
+# given with --capabilities-file, holding either the response of the
+# "GET /scheduler-stats/pools/detail" API or a dict mapping each backend
+# ('host@backend') to its reported capabilities. The share requests are
+# either synthesised (--requests) or replayed from a JSON list of request
+# specs given with --requests-file.
+#
+# Every request runs through FilterScheduler._schedule_share() with the
+# filters and weighers of the loaded configuration, and the capacity the
+# chosen pools consume is accounted as in the scheduler service. No
+# database or message queue is needed, as long as the replayed requests do
+# not carry share IDs or scheduler hints. The tool reports the p50/p99
+# decision latency, the time spent in each filter and weigher and, with
+# --allocations, the memory each of them allocates.
+#
+# Usage: python tools/benchmark_scheduler.py [--config-file manila.conf]
+#            [--hosts 50] [--pools 20] [--requests 1000] [--allocations]
+
+import copy
+import json
+import logging
+import random
+import sys
+import time
+import tracemalloc
+
+from oslo_config import cfg
+from oslo_utils import timeutils
+
+from manila import context
+from manila import exception
+from manila import rpc
+from manila.scheduler.drivers import filter as filter_driver
+from manila.scheduler import host_manager
+from manila.share import utils as share_utils
+
+CONF = cfg.CONF
+
+cli_opts = [
+    cfg.IntOpt('hosts', default=50, min=1,
+               help='Number of synthesised share backends.'),
+    cfg.IntOpt('pools', default=20, min=1,
+               help='Number of pools of each synthesised share backend.'),
+    cfg.IntOpt('requests', default=1000, min=1,
+               help='Number of synthesised share requests.'),
+    cfg.IntOpt('seed', default=0,
+               help='Seed of the synthesised capabilities and requests.'),
+    cfg.StrOpt('capabilities-file',
+               help='JSON file with captured capability reports to replay '
+                    'instead of synthesised ones.'),
+    cfg.StrOpt('requests-file',
+               help='JSON file with a list of captured request specs to '
+                    'replay instead of synthesised ones.'),
+    cfg.IntOpt('update-every', default=0, min=0,
+               help='Deliver the capability reports again every N requests, '
+                    'as the periodic reports of the backends would. 0 '
+                    'delivers them once only.'),
+    cfg.BoolOpt('allocations', default=False,
+                help='Replay the requests a second time with tracemalloc to '
+                     'report the memory allocated by each filter and '
+                     'weigher.'),
+    cfg.BoolOpt('json', default=False,
+                help='Print the results as JSON.'),
+    cfg.BoolOpt('verbose', default=False,
+                help='Do not silence the scheduler warnings.'),
+]
+
+
+class Stats(object):
+    """Time and memory allocated by one filter or weigher."""
+
+    def __init__(self):
+        self.durations = []
+        self.allocated = []
+
+    def record(self, duration, allocated=None):
+        self.durations.append(duration)
+        if allocated is not None:
+            self.allocated.append(allocated)
+
+
+def percentile(values, percent):
+    """Returns the nearest-rank percentile of a list of values."""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    rank = max(int(round(percent / 100.0 * len(values) + 0.5)) - 1, 0)
+    return values[min(rank, len(values) - 1)]
+
+
+def measure(stats, name, func, *args):
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        # Python >= 3.9; the peak of the whole replay is reported before.
+        if hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+        start_memory = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    result = func(*args)
+    duration = time.perf_counter() - start
+    allocated = None
+    if tracing:
+        allocated = tracemalloc.get_traced_memory()[1] - start_memory
+    stats.setdefault(name, Stats()).record(duration, allocated)
+    return result
+
+
+def instrument_filter(filter_cls, stats):
+    def filter_all(self, filter_obj_list, filter_properties):
+        def run():
+            objs = filter_cls.filter_all(
+                self, filter_obj_list, filter_properties)
+            return objs if objs is None else list(objs)
+        return measure(stats, filter_cls.__name__, run)
+
+    return type(filter_cls.__name__, (filter_cls,),
+                {'filter_all': filter_all})
+
+
+def instrument_weigher(weigher_cls, stats):
+    def weigh_objects(self, weighed_obj_list, weight_properties):
+        return measure(stats, weigher_cls.__name__, weigher_cls.weigh_objects,
+                       self, weighed_obj_list, weight_properties)
+
+    return type(weigher_cls.__name__, (weigher_cls,),
+                {'weigh_objects': weigh_objects})
+
+
+class BenchmarkHostManager(host_manager.HostManager):
+    """HostManager fed with capability reports instead of the database."""
+
+    def __init__(self, capabilities):
+        super(BenchmarkHostManager, self).__init__()
+        self.capabilities = capabilities
+        self.stats = {}
+        self.services = [{
+            'host': host,
+            'topic': CONF.share_topic,
+            'disabled': False,
+            'created_at': None,
+            'availability_zone_id': 'benchmark_az_id',
+            'availability_zone': {'name': 'benchmark_az'},
+        } for host in capabilities]
+        self.deliver_capabilities()
+
+    def deliver_capabilities(self):
+        for host, capability in self.capabilities.items():
+            self.update_service_capabilities(
+                'share', host, copy.deepcopy(capability), None)
+
+    def _get_share_services(self, context):
+        now = timeutils.utcnow()
+        for service in self.services:
+            service['updated_at'] = now
+        return self.services
+
+    def _choose_host_filters(self, filter_cls_names):
+        filter_classes = super(
+            BenchmarkHostManager, self)._choose_host_filters(filter_cls_names)
+        return [instrument_filter(cls, self.stats) for cls in filter_classes]
+
+    def _choose_host_weighers(self, weight_cls_names):
+        weigher_classes = super(
+            BenchmarkHostManager, self)._choose_host_weighers(
+                weight_cls_names)
+        return [instrument_weigher(cls, self.stats)
+                for cls in weigher_classes]
+
+
+def synthesise_capabilities(rand):
+    capabilities = {}
+    for i in range(CONF.hosts):
+        pools = []
+        for j in range(CONF.pools):
+            total = rand.choice((1024, 4096, 16384, 65536))
+            allocated = rand.randint(0, total)
+            thin = rand.random() < 0.5
+            pools.append({
+                'pool_name': 'pool%d' % j,
+                'total_capacity_gb': total,
+                'free_capacity_gb': total - allocated,
+                'allocated_capacity_gb': allocated,
+                'provisioned_capacity_gb': allocated,
+                'thin_provisioning': thin,
+                'max_over_subscription_ratio': 2.0 if thin else 1.0,
+                'reserved_percentage': 5,
+                'reserved_snapshot_percentage': 5,
+                'reserved_share_extend_percentage': 5,
+                'qos': False,
+                'dedupe': False,
+                'compression': False,
+                'replication_type': None,
+                'replication_domain': None,
+                'utilization': rand.randint(0, 100),
+            })
+        capabilities['benchmark%d@backend%d' % (i, i)] = {
+            'share_backend_name': 'backend%d' % i,
+            'vendor_name': 'Benchmark',
+            'driver_version': '1.0',
+            'storage_protocol': 'NFS_CIFS',
+            'driver_handles_share_servers': False,
+            'snapshot_support': True,
+            'create_share_from_snapshot_support': True,
+            'revert_to_snapshot_support': False,
+            'mount_snapshot_support': False,
+            'pools': pools,
+        }
+    return capabilities
+
+
+def synthesise_requests(rand):
+    requests = []
+    for i in range(CONF.requests):
+        size = rand.choice((1, 10, 50, 100, 500, 1000))
+        requests.append({
+            'share_properties': {
+                'size': size,
+                'share_proto': 'NFS',
+                'project_id': 'benchmark',
+                'user_id': 'benchmark',
+                'metadata': {},
+                'snapshot_id': None,
+            },
+            'share_instance_properties': {'availability_zone_id': None},
+            'share_proto': 'NFS',
+            'share_type': {
+                'name': 'benchmark',
+                'extra_specs': {
+                    'driver_handles_share_servers': 'False',
+                    'snapshot_support': 'True',
+                },
+            },
+        })
+    return requests
+
+
+def load_capabilities(path):
+    with open(path) as f:
+        data = json.load(f)
+    if not isinstance(data.get('pools'), list):
+        return data
+
+    # Response of the pools detail API: regroup the pools by backend.
+    capabilities = {}
+    for pool in data['pools']:
+        backend = share_utils.extract_host(pool['name'], level='backend')
+        pool_capability = dict(pool['capabilities'])
+        pool_capability['pool_name'] = share_utils.extract_host(
+            pool['name'], level='pool')
+        capability = capabilities.setdefault(
+            backend, dict(pool['capabilities'], pools=[]))
+        capability['pools'].append(pool_capability)
+    for capability in capabilities.values():
+        # Report times are set again when the reports are delivered.
+        capability.pop('timestamp', None)
+        for pool_capability in capability['pools']:
+            pool_capability.pop('timestamp', None)
+            # Not reported by every driver; the scheduler would estimate it
+            # from the shares in the database.
+            pool_capability.setdefault(
+                'provisioned_capacity_gb',
+                pool_capability.get('allocated_capacity_gb', 0))
+    return capabilities
+
+
+def load_requests(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def replay(capabilities, requests):
+    scheduler = filter_driver.FilterScheduler()
+    scheduler.host_manager = BenchmarkHostManager(capabilities)
+    ctxt = context.get_admin_context()
+
+    latencies = []
+    no_valid_host = 0
+    for i, request_spec in enumerate(requests):
+        if CONF.update_every and i and i % CONF.update_every == 0:
+            scheduler.host_manager.deliver_capabilities()
+        request_spec = copy.deepcopy(request_spec)
+        start = time.perf_counter()
+        try:
+            scheduler._schedule_share(ctxt, request_spec, {})
+        except exception.NoValidHost:
+            no_valid_host += 1
+        latencies.append(time.perf_counter() - start)
+    return latencies, no_valid_host, scheduler.host_manager.stats
+
+
+def report(latencies, no_valid_host, stats, pools):
+    result = {
+        'pools': pools,
+        'requests': len(latencies),
+        'no_valid_host': no_valid_host,
+        'decision_ms': {
+            'p50': percentile(latencies, 50) * 1000,
+            'p99': percentile(latencies, 99) * 1000,
+            'max': max(latencies) * 1000,
+        },
+        'stages': {},
+    }
+    for name, stage in stats.items():
+        result['stages'][name] = {
+            'calls': len(stage.durations),
+            'p50_ms': percentile(stage.durations, 50) * 1000,
+            'p99_ms': percentile(stage.durations, 99) * 1000,
+            'total_ms': sum(stage.durations) * 1000,
+        }
+        if stage.allocated:
+            result['stages'][name]['allocated_kib_p50'] = (
+                percentile(stage.allocated, 50) / 1024.0)
+            result['stages'][name]['allocated_kib_max'] = (
+                max(stage.allocated) / 1024.0)
+
+    if CONF.json:
+        print(json.dumps(result, indent=4, sort_keys=True))
+        return
+
+    print("%(requests)d requests on %(pools)d pools, "
+          "%(no_valid_host)d without a valid host" % result)
+    print("decision latency: p50 %(p50).3f ms  p99 %(p99).3f ms  "
+          "max %(max).3f ms" % result['decision_ms'])
+    print()
+    print("%-28s %8s %10s %10s %12s %14s" % (
+        'filter/weigher', 'calls', 'p50 ms', 'p99 ms', 'total ms',
+        'alloc KiB max'))
+    for name, stage in result['stages'].items():
+        print("%-28s %8d %10.3f %10.3f %12.1f %14s" % (
+            name, stage['calls'], stage['p50_ms'], stage['p99_ms'],
+            stage['total_ms'],
+            '%.1f' % stage['allocated_kib_max']
+            if 'allocated_kib_max' in stage else '-'))
+
+
+def main():
+    CONF.register_cli_opts(cli_opts)
+    CONF(sys.argv[1:], project='manila')
+    if not CONF.verbose:
+        logging.disable(logging.WARNING)
+    # The scheduler driver creates RPC clients, they are never used here.
+    rpc.init(CONF)
+
+    rand = random.Random(CONF.seed)
+    if CONF.capabilities_file:
+        capabilities = load_capabilities(CONF.capabilities_file)
+    else:
+        capabilities = synthesise_capabilities(rand)
+    if CONF.requests_file:
+        requests = load_requests(CONF.requests_file)
+    else:
+        requests = synthesise_requests(rand)
+    pools = sum(len(capability.get('pools') or [None])
+                for capability in capabilities.values())
+
+    latencies, no_valid_host, stats = replay(capabilities, requests)
+    if CONF.allocations:
+        tracemalloc.start()
+        try:
+            allocation_stats = replay(capabilities, requests)[2]
+        finally:
+            tracemalloc.stop()
+        for name, stage in allocation_stats.items():
+            stats[name].allocated = stage.allocated
+
+    report(latencies, no_valid_host, stats, pools)
+
+
+if __name__ == '__main__':
+    main()
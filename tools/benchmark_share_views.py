@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+# Measure the cost of rendering the detailed list view of shares, with and
+# without the cached selection of the share instance.
+#
+# Usage: python tools/benchmark_share_views.py [shares] [replicas] [runs]
+
+import sys
+import timeit
+
+from manila.api.openstack import api_version_request as api_version
+from manila.api.openstack import wsgi
+from manila.api.views import shares as shares_views
+from manila.common import constants
+from manila import context
+from manila.db.sqlalchemy import models
+
+
+def make_shares(count, replicas):
+    shares = []
+    for i in range(count):
+        share_id = 'share-%d' % i
+        instances = [
+            models.ShareInstance(
+                id='%s-instance-%d' % (share_id, r), share_id=share_id,
+                host='host@backend#pool', status=constants.STATUS_AVAILABLE,
+                replica_state=(constants.REPLICA_STATE_ACTIVE if r == 0 else
+                               constants.REPLICA_STATE_IN_SYNC)
+                if replicas > 1 else None,
+                access_rules_status=constants.STATUS_ACTIVE,
+                share_type_id='fake-type')
+            for r in range(replicas)]
+        share = models.Share(
+            id=share_id, display_name='share %d' % i, size=1,
+            share_proto='NFS', project_id='fake-project', is_public=False,
+            instances=instances)
+        shares.append(share)
+    return shares
+
+
+def make_request():
+    request = wsgi.Request.blank('/fake-project/shares/detail',
+                                 base_url='http://localhost/share/v2')
+    request.environ['manila.context'] = context.get_admin_context()
+    request.api_version_request = api_version.APIVersionRequest(
+        api_version._MAX_API_VERSION)
+    return request
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    replicas = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    runs = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+
+    builder = shares_views.ViewBuilder()
+    request = make_request()
+    cached = models.Share.instance
+    uncached = property(
+        lambda self: self._select_instance(list(self.instances)))
+
+    for label, prop in (('uncached', uncached), ('cached', cached)):
+        models.Share.instance = prop
+        shares = make_shares(count, replicas)
+        elapsed = timeit.timeit(
+            lambda: builder.detail_list(request, shares), number=runs)
+        print("%-8s %d shares, %d instances each: %.2f ms per list" %
+              (label, count, replicas, elapsed * 1000 / runs))
+    models.Share.instance = cached
+
+
+if __name__ == '__main__':
+    main()